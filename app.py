@@ -1,8 +1,12 @@
 
+import logging
+
 import dash
-from dash import html, dcc, Input, Output, State
+from dash import ClientsideFunction, ctx, html, dcc, Input, Output, State, no_update
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-import pandas as pd
+from flask import has_request_context, request
+import plotly.io
 
 from components.charts import (
     create_category_sales_chart,
@@ -19,203 +23,441 @@ from components.filters import (
 )
 from components.kpi_cards import create_kpi_card
 from components.tables import create_data_table
-from utils.analytics import (
-    calculate_kpis,
-    get_region_heatmap_data,
-    get_sales_by_category,
-    get_sales_evolution,
-    get_sales_forecast,
-    get_top_products,
-    get_trend_analysis,
-)
-from utils.data_processor import load_data, process_data
-from utils.cache import get_from_cache, set_to_cache, get_cache_key
+from utils.export import EXPORT_FORMATS, ExportJobs
+from utils.ingest import create_ingestor, register_ingest_endpoint
+from utils import metrics
+from utils.cache import redis_connector, result_cache
+from utils.cache_warmer import CacheWarmer
+from utils.panels import CLIENT_PANELS, DASHBOARD_PANELS
+from utils.regression import fit_cache_stats
+from utils.startup import DeferredSource, load_source, read_metadata, register_startup_endpoints
+from config import settings
+
+# As consultas (pandas, cubo, filtros, payload do navegador) são importadas dentro dos
+# callbacks: na partida rápida, o processo responde antes de carregá-las, junto com os dados.
+logger = logging.getLogger(__name__)
 
 # Inicializar app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "Sales Analytics Dashboard"
+server = app.server
+
+# Fonte de dados (CSV/snapshot em memória ou banco SQL, conforme DATA_SOURCE); na partida rápida,
+# carregada em segundo plano por `start_background_tasks`, com o layout montado a partir dos metadados
+if settings.LAZY_STARTUP:
+    data_source = DeferredSource(
+        lambda: load_source(settings.DATA_PATH, settings.STARTUP_METADATA_PATH),
+        metadata=read_metadata(settings.DATA_PATH, settings.STARTUP_METADATA_PATH),
+        timeout=settings.STARTUP_WAIT_TIMEOUT,
+    )
+else:
+    from utils.data_source import create_data_source
+
+    data_source = create_data_source(settings.DATA_PATH)
+register_startup_endpoints(server, data_source)
+
+# Ingestão incremental de vendas (INGEST_PATH); a thread roda em cada worker
+ingestor = create_ingestor(data_source, settings.INGEST_PATH, interval=settings.INGEST_POLL_INTERVAL)
+if ingestor is not None:
+    register_ingest_endpoint(server, settings.INGEST_PATH)
+
+# Exportações em segundo plano, gravadas em arquivos temporários e entregues por dcc.Download
+export_jobs = ExportJobs(
+    data_source,
+    settings.EXPORT_DIR,
+    max_workers=settings.EXPORT_WORKERS,
+    chunk_rows=settings.EXPORT_CHUNK_ROWS,
+    ttl=settings.EXPORT_TTL_SECONDS,
+)
+
+
+def _layout_source():
+    if not isinstance(data_source, DeferredSource):
+        return data_source
+    # A validação do Dash (na importação e na primeira requisição, que pode ser um health check)
+    # não espera a carga; só o layout entregue ao navegador precisa dos valores reais
+    return data_source.describe(wait=has_request_context() and request.path.endswith('/_dash-layout'))
 
-# Carregar e processar dados
-df = load_data('data/sales_data.csv')
-df = process_data(df)
-
-# Layout
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col([
-            html.H1("📊 Sales Analytics Dashboard", className="text-center mb-4 mt-4"),
-            html.Hr()
-        ])
-    ]),
+
+# Layout (montado a cada carga da página, com os limites atuais dos dados)
+def serve_layout():
+    source = _layout_source()
+    start_date, end_date = source.date_bounds()
+    return dbc.Container([
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.H1("📊 Sales Analytics Dashboard", className="text-center mb-4 mt-4"),
+                html.Hr()
+            ])
+        ]),
     
-    # Filtros
-    dbc.Row([
-        dbc.Col([html.Label("Período:"), create_date_range_filter(df)], md=4),
-        dbc.Col([html.Label("Categoria:"), create_category_filter(df)], md=4),
-        dbc.Col([html.Label("Região:"), create_region_filter(df)], md=4)
-    ], className="mb-4"),
-
-    dcc.Store(id='filtered-data-store'),
-
-    # KPIs
-    dbc.Row(id='kpi-cards', className="mb-4"),
-
-    # Gráficos
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='sales-evolution-chart'), md=12),
-    ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='category-sales-chart'), md=6),
-        dbc.Col(dcc.Graph(id='top-products-chart'), md=6),
-    ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='region-heatmap'), md=6),
-        dbc.Col(dcc.Graph(id='trend-analysis-chart'), md=6),
-    ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='sales-forecast-chart'), md=12),
-    ]),
+        # Filtros
+        dbc.Row([
+            dbc.Col([html.Label("Período:"), create_date_range_filter(start_date, end_date)], md=4),
+            dbc.Col([html.Label("Categoria:"), create_category_filter(source.dimension_values('categoria'))], md=4),
+            dbc.Col([html.Label("Região:"), create_region_filter(source.dimension_values('regiao'))], md=4)
+        ], className="mb-4"),
+
+        dcc.Store(id='filtered-data-store'),
+        # Modo de agregação no navegador: payload da janela de datas e painéis do servidor (sem payload)
+        dcc.Store(id='client-payload'),
+        dcc.Store(id='server-panels'),
+        dcc.Store(id='dataset-version', data={'version': source.version, 'max_date': str(end_date)}),
+        dcc.Interval(id='dataset-poll', interval=settings.LIVE_REFRESH_INTERVAL_MS, disabled=ingestor is None),
+
+        # KPIs
+        dbc.Row(id='kpi-cards', className="mb-4"),
+
+        # Gráficos
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='sales-evolution-chart'), md=12),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='category-sales-chart'), md=6),
+            dbc.Col(dcc.Graph(id='top-products-chart'), md=6),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='region-heatmap'), md=6),
+            dbc.Col(dcc.Graph(id='trend-analysis-chart'), md=6),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='sales-forecast-chart'), md=12),
+        ]),
     
-    # Tabela de Dados
-    dbc.Row([
-        dbc.Col(html.Div(id='data-table-container'), md=12)
-    ], className="mt-4"),
+        # Tabela de Dados
+        dbc.Row([
+            dbc.Col(html.Div(create_data_table(source.columns), id='data-table-container'), md=12)
+        ], className="mt-4"),
+
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(
+                id='export-format',
+                options=[{'label': label, 'value': key} for key, (label, _, _) in EXPORT_FORMATS.items()],
+                value='xlsx',
+                clearable=False,
+            ), md=2, className="mt-4"),
+            dbc.Col(dbc.Button("Exportar", id="export-button", color="success", className="mt-4"), md=2),
+            dbc.Col([
+                dbc.Progress(id='export-progress', value=0, className="mt-4"),
+                html.Small(id='export-status', className="text-muted"),
+            ], md=8),
+        ]),
+        dcc.Store(id='export-job'),
+        dcc.Interval(id='export-poll', interval=settings.EXPORT_POLL_INTERVAL_MS, disabled=True),
+        dcc.Download(id='export-download'),
 
-    dbc.Row([
-        dbc.Col(dbc.Button("Exportar para Excel", id="export-excel-button", color="success", className="mt-4"), md=2),
-    ])
+    ], fluid=True)
 
-], fluid=True)
+
+app.layout = serve_layout
 
 
 @app.callback(
-    Output('filtered-data-store', 'data'),
     [
-        Input('date-range', 'start_date'),
-        Input('date-range', 'end_date'),
-        Input('category-filter', 'value'),
-        Input('region-filter', 'value')
-    ]
+        Output('dataset-version', 'data'),
+        Output('date-range', 'end_date'),
+    ],
+    Input('dataset-poll', 'n_intervals'),
+    [
+        State('dataset-version', 'data'),
+        State('date-range', 'end_date'),
+    ],
+    prevent_initial_call=True,
 )
-def update_filtered_data(start_date, end_date, category, region):
-    filters = {
-        'start_date': start_date,
-        'end_date': end_date,
-        'category': category,
-        'region': region
-    }
-    cache_key = get_cache_key(filters)
-    
-    cached_data = get_from_cache(cache_key)
-    
-    if cached_data is not None:
-        return cached_data.to_json(date_format='iso', orient='split')
+def poll_dataset_version(n_intervals, current, end_date):
+    # Só propaga quando a versão dos dados muda; o período acompanha as vendas novas
+    # se o usuário estava olhando até a última data
+    if current is not None and current['version'] == data_source.version:
+        raise PreventUpdate
+    _, max_date = data_source.date_bounds()
+    following = current is None or not end_date or str(end_date)[:10] >= current['max_date']
+    return (
+        {'version': data_source.version, 'max_date': str(max_date)},
+        str(max_date) if following else no_update,
+    )
 
-    dff = df[
-        (df['data'] >= pd.to_datetime(start_date)) & 
-        (df['data'] <= pd.to_datetime(end_date))
-    ]
-    
-    if category != 'all':
-        dff = dff[dff['categoria'] == category]
-    
-    if region != 'all':
-        dff = dff[dff['regiao'] == region]
-    
-    set_to_cache(cache_key, dff)
-        
-    return dff.to_json(date_format='iso', orient='split')
+FILTER_INPUTS = [
+    Input('date-range', 'start_date'),
+    Input('date-range', 'end_date'),
+    Input('category-filter', 'value'),
+    Input('region-filter', 'value'),
+    Input('dataset-version', 'data'),
+]
 
-@app.callback(
-    Output('data-table-container', 'children'),
-    Input('filtered-data-store', 'data')
-)
-def update_data_table(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    return create_data_table(dff)
+
+def update_filtered_data(start_date, end_date, category, region, dataset_version):
+    from utils.filter_engine import make_filters
+
+    with metrics.phase('compute'):
+        return data_source.make_handle(make_filters(start_date, end_date, category, region))
 
 @app.callback(
-    Output('kpi-cards', 'children'),
-    Input('filtered-data-store', 'data')
+    [
+        Output('data-table', 'data'),
+        Output('data-table', 'page_count'),
+    ],
+    [
+        Input('filtered-data-store', 'data'),
+        Input('data-table', 'page_current'),
+        Input('data-table', 'page_size'),
+        Input('data-table', 'sort_by'),
+        Input('data-table', 'filter_query'),
+    ]
 )
-def update_kpi_cards(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    receita_total, total_vendas, ticket_medio = calculate_kpis(dff)
-    
-    kpi_cards = [
+def update_data_table(filtered_data, page_current, page_size, sort_by, filter_query):
+    with metrics.phase('compute'):
+        return data_source.page(filtered_data, page_current, page_size, sort_by, filter_query)
+
+# Saídas dos painéis, na ordem de DASHBOARD_PANELS
+PANEL_OUTPUTS = {
+    'kpis': Output('kpi-cards', 'children'),
+    'sales_evolution': Output('sales-evolution-chart', 'figure'),
+    'category_sales': Output('category-sales-chart', 'figure'),
+    'top_products': Output('top-products-chart', 'figure'),
+    'region_heatmap': Output('region-heatmap', 'figure'),
+    'trend_analysis': Output('trend-analysis-chart', 'figure'),
+    'sales_forecast': Output('sales-forecast-chart', 'figure'),
+}
+SERVER_PANELS = tuple(panel for panel in DASHBOARD_PANELS if panel not in CLIENT_PANELS)
+
+
+def update_dashboard(filtered_data):
+    # Saída pronta por seleção e versão dos dados: calculada uma vez entre todos os workers
+    return _dashboard_output(filtered_data)
+
+
+def update_dashboard_clientside(start_date, end_date, category, region, dataset_version):
+    # Uma requisição por interação: registra a fatia, reenvia o payload só quando a janela de
+    # datas (ou a versão dos dados) muda e calcula os painéis que ficam no servidor; sem payload,
+    # os painéis do navegador também vão prontos em `server-panels`
+    from utils.filter_engine import make_filters
+
+    with metrics.phase('compute'):
+        handle = data_source.make_handle(make_filters(start_date, end_date, category, region))
+    payload = _client_payload(start_date, end_date)
+    panels = SERVER_PANELS if payload is not None else tuple(DASHBOARD_PANELS)
+    outputs = dict(zip(panels, _dashboard_output(handle, panels)))
+    triggered = set(ctx.triggered_prop_ids.values())
+    window_changed = not triggered or bool(triggered - {'category-filter', 'region-filter'})
+    return (
+        handle,
+        payload if window_changed else no_update,
+        *(outputs[panel] for panel in SERVER_PANELS),
+        [outputs[panel] for panel in CLIENT_PANELS] if payload is None else no_update,
+    )
+
+
+if settings.CLIENTSIDE_AGGREGATION:
+    app.callback(
+        [
+            Output('filtered-data-store', 'data'),
+            Output('client-payload', 'data'),
+            *(PANEL_OUTPUTS[panel] for panel in SERVER_PANELS),
+            Output('server-panels', 'data'),
+        ],
+        FILTER_INPUTS,
+    )(update_dashboard_clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='render'),
+        [PANEL_OUTPUTS[panel] for panel in CLIENT_PANELS],
+        [
+            Input('client-payload', 'data'),
+            Input('category-filter', 'value'),
+            Input('region-filter', 'value'),
+            Input('server-panels', 'data'),
+        ],
+    )
+else:
+    app.callback(Output('filtered-data-store', 'data'), FILTER_INPUTS)(update_filtered_data)
+    app.callback(list(PANEL_OUTPUTS.values()), Input('filtered-data-store', 'data'))(update_dashboard)
+
+
+def _dashboard_output(handle, panels=tuple(DASHBOARD_PANELS)):
+    key = f"dashboard:{handle['key']}:{handle['data_version']}"
+    if panels != tuple(DASHBOARD_PANELS):
+        key += ':' + ','.join(panels)
+    return result_cache.get_or_compute(
+        key,
+        lambda: _build_dashboard(handle, panels),
+        encode=plotly.io.json.to_json_plotly,
+    )
+
+
+def _client_payload(start_date, end_date):
+    """Payload da janela de datas (todas as categorias e regiões), ou None acima de CLIENTSIDE_MAX_PAYLOAD_BYTES."""
+    from utils.filter_engine import make_filters
+
+    handle = data_source.make_handle(make_filters(start_date, end_date, None, None))
+    payload = result_cache.get_or_compute(
+        f"client-payload:{handle['key']}:{handle['data_version']}",
+        # {} marca a janela grande demais (None não fica no cache)
+        lambda: _build_client_payload(handle) or {},
+    )
+    return payload or None
+
+
+def _build_client_payload(handle):
+    from utils.client_payload import build_client_payload
+
+    with metrics.phase('deserialize'):
+        aggregates = data_source.select(handle['filters']).aggregates()
+    # As figuras da janela inteira servem de molde para o navegador
+    panels = tuple(panel for panel in CLIENT_PANELS if panel != 'kpis')
+    figures = dict(zip(panels, _dashboard_output(handle, panels)))
+    return build_client_payload(aggregates, figures, settings.CLIENTSIDE_MAX_PAYLOAD_BYTES)
+
+
+def _kpi_cards(kpis):
+    receita_total, total_vendas, ticket_medio = kpis
+    return [
         create_kpi_card("Receita Total", receita_total),
         create_kpi_card("Total de Vendas", total_vendas, formatter=lambda x: f"{x:,}"),
         create_kpi_card("Ticket Médio", ticket_medio),
     ]
-    return kpi_cards
 
-@app.callback(
-    Output('sales-evolution-chart', 'figure'),
-    Input('filtered-data-store', 'data')
-)
-def update_sales_evolution_chart(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    sales_evolution = get_sales_evolution(dff)
-    return create_sales_evolution_chart(sales_evolution)
 
-@app.callback(
-    Output('category-sales-chart', 'figure'),
-    Input('filtered-data-store', 'data')
-)
-def update_category_sales_chart(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    category_sales = get_sales_by_category(dff)
-    return create_category_sales_chart(category_sales)
+# painel -> montagem da saída a partir do resultado de compute_dashboard
+PANEL_FIGURES = {
+    'kpis': _kpi_cards,
+    'sales_evolution': create_sales_evolution_chart,
+    'category_sales': create_category_sales_chart,
+    'top_products': create_top_products_chart,
+    'region_heatmap': create_region_heatmap,
+    'trend_analysis': lambda result: create_trend_analysis_chart(*result),
+    'sales_forecast': lambda result: create_sales_forecast_chart(*result),
+}
 
-@app.callback(
-    Output('top-products-chart', 'figure'),
-    Input('filtered-data-store', 'data')
-)
-def update_top_products_chart(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    top_products = get_top_products(dff)
-    return create_top_products_chart(top_products)
 
-@app.callback(
-    Output('region-heatmap', 'figure'),
-    Input('filtered-data-store', 'data')
-)
-def update_region_heatmap(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    region_heatmap_data = get_region_heatmap_data(dff)
-    return create_region_heatmap(region_heatmap_data)
+def _build_dashboard(filtered_data, panels=tuple(DASHBOARD_PANELS)):
+    # Uma única consulta: as somas parciais da seleção alimentam todos os painéis
+    from utils.dashboard_query import compute_dashboard
 
-@app.callback(
-    Output('trend-analysis-chart', 'figure'),
-    Input('filtered-data-store', 'data')
-)
-def update_trend_analysis_chart(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    daily_sales, trend_line = get_trend_analysis(dff)
-    return create_trend_analysis_chart(daily_sales, trend_line)
+    fit_key = f"{filtered_data['key']}:{filtered_data['data_version']}"
+    with metrics.phase('deserialize'):
+        aggregates = data_source.select(filtered_data['filters'], fit_key=fit_key).aggregates()
+    with metrics.phase('compute'):
+        results = compute_dashboard(aggregates, panels)
 
-@app.callback(
-    Output('sales-forecast-chart', 'figure'),
-    Input('filtered-data-store', 'data')
-)
-def update_sales_forecast_chart(filtered_data):
-    dff = pd.read_json(filtered_data, orient='split')
-    daily_sales, trend_line, future_days, future_sales = get_sales_forecast(dff)
-    return create_sales_forecast_chart(daily_sales, trend_line, future_days, future_sales)
+    with metrics.phase('figure'):
+        return tuple(PANEL_FIGURES[panel](results[panel]) for panel in panels)
 
 @app.callback(
-    Output("export-excel-button", "n_clicks"),
-    Input("export-excel-button", "n_clicks"),
-    State('filtered-data-store', 'data'),
+    [
+        Output('export-job', 'data'),
+        Output('export-poll', 'disabled'),
+        Output('export-progress', 'value'),
+        Output('export-progress', 'label'),
+        Output('export-status', 'children'),
+        Output('export-download', 'data'),
+    ],
+    [
+        Input('export-button', 'n_clicks'),
+        Input('export-poll', 'n_intervals'),
+    ],
+    [
+        State('export-format', 'value'),
+        State('filtered-data-store', 'data'),
+        State('export-job', 'data'),
+    ],
     prevent_initial_call=True,
 )
-def export_to_excel(n_clicks, filtered_data):
-    if n_clicks > 0:
-        dff = pd.read_json(filtered_data, orient='split')
-        dff.to_excel("dados_exportados.xlsx", index=False)
-        print("Dados exportados para dados_exportados.xlsx")
-    return n_clicks
+def export_data(n_clicks, n_intervals, export_format, filtered_data, job):
+    # O clique só agenda o job; o intervalo acompanha o progresso e entrega o arquivo pronto
+    if ctx.triggered_id == 'export-button':
+        with metrics.phase('compute'):
+            job_id = export_jobs.submit(filtered_data, export_format)
+        return {'id': job_id}, False, 0, "", "Exportação iniciada...", no_update
+
+    status = export_jobs.status(job['id']) if job else None
+    if status is None:
+        return None, True, 0, "", "Exportação não encontrada.", no_update
+    if status['status'] == 'error':
+        return None, True, 0, "", f"Falha na exportação: {status['error']}", no_update
+    if status['status'] == 'done':
+        return (
+            None, True, 100, "100%", f"{status['rows']:,} linhas exportadas.",
+            dcc.send_file(status['path'], filename=status['filename']),
+        )
+    percent = int(100 * status['rows'] / status['total']) if status['total'] else 0
+    total = f"{status['total']:,}" if status['total'] is not None else "..."
+    return no_update, False, percent, f"{percent}%", f"Exportando {status['rows']:,} de {total} linhas...", no_update
+
+
+def _cache_stats():
+    stats = {**result_cache.stats, 'fit': fit_cache_stats}
+    # Durante a carga em segundo plano ainda não há registros de fatias
+    source = data_source.source if isinstance(data_source, DeferredSource) else data_source
+    if hasattr(source, 'slices'):
+        stats.update(slices=source.slices.stats, tables=source.tables.stats)
+    return stats
+
+
+def _warm_dashboard(filters):
+    # Pré-calcula o que a interação vai pedir: no modo do navegador, o payload e os painéis do servidor
+    handle = data_source.make_handle(filters)
+    if settings.CLIENTSIDE_AGGREGATION and _client_payload(filters['start_date'], filters['end_date']) is not None:
+        return _dashboard_output(handle, SERVER_PANELS)
+    return _dashboard_output(handle)
+
+
+# Pré-cálculo da visão padrão e das combinações categoria × região (na partida e quando os dados param de mudar)
+cache_warmer = None
+if settings.CACHE_WARMING:
+    cache_warmer = CacheWarmer(
+        data_source,
+        _warm_dashboard,
+        interval=settings.CACHE_WARM_INTERVAL,
+        debounce=settings.CACHE_WARM_DEBOUNCE,
+    )
+
+
+# Instrumentação: latência por callback e por fase, payloads, caches e memória em /metrics
+if settings.METRICS_ENABLED:
+    metrics.registry.configure(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+    metrics.registry.register_collector(metrics.cache_collector(_cache_stats))
+    metrics.registry.register_collector(metrics.process_memory_collector)
+    profiler = None
+    if settings.METRICS_PROFILE_SLOW_MS > 0:
+        profiler = metrics.SlowCallbackProfiler(
+            settings.METRICS_PROFILE_SLOW_MS / 1000,
+            interval=settings.METRICS_PROFILE_INTERVAL_MS / 1000,
+            directory=settings.METRICS_PROFILE_DIR,
+        )
+    metrics.instrument_callbacks(app, profiler)
+    metrics.register_metrics_endpoint(server)
+
+def _start_data_tasks(source):
+    if ingestor is not None:
+        if hasattr(source, 'append'):
+            ingestor.start()
+        else:
+            logger.warning("A fonte de dados %s não aceita ingestão incremental.", type(source).__name__)
+    if cache_warmer is not None:
+        cache_warmer.start()
+
+
+def start_background_tasks():
+    """
+    Inicia as threads de fundo do processo: conexão com o Redis e carga dos
+    dados (partida rápida), ingestão incremental e aquecimento do cache, as
+    duas últimas só com os dados carregados. Chamada em cada worker, já que
+    threads não sobrevivem ao fork.
+    """
+    if redis_connector is not None:
+        redis_connector.start()
+    if isinstance(data_source, DeferredSource):
+        # As consultas (e o pandas) são importadas aqui, antes da thread de carga: o JSON do
+        # plotly consulta `sys.modules` e não pode encontrar o pandas importado pela metade
+        import utils.dashboard_query
+        import utils.data_source
+
+        data_source.when_ready(_start_data_tasks)
+        data_source.start()
+    else:
+        _start_data_tasks(data_source)
+
 
 if __name__ == '__main__':
+    start_background_tasks()
     app.run_server(debug=True, port=8050)
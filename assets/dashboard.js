@@ -0,0 +1,138 @@
+// Modo de agregação no navegador (CLIENTSIDE_AGGREGATION).
+//
+// O servidor envia, por janela de datas, as somas mês × categoria × região
+// (typed arrays em base64, ver utils/client_payload.py) e as figuras dos
+// painéis montadas para a janela inteira. A cada troca de categoria ou região,
+// os KPIs, a evolução mensal, as vendas por categoria e o mapa de calor são
+// refiltrados e reagregados aqui, com as mesmas regras de SalesAggregates, sem
+// ida ao servidor. Sem payload (janela acima de CLIENTSIDE_MAX_PAYLOAD_BYTES),
+// os painéis vêm prontos do servidor em `server-panels`.
+(function () {
+    const TYPED_ARRAYS = {int32: Int32Array, float64: Float64Array};
+
+    function decode(encoded) {
+        const binary = atob(encoded.data);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPED_ARRAYS[encoded.dtype](bytes.buffer);
+    }
+
+    // Mesma regra de utils.filter_engine.normalize_selection: vazio, nulo ou 'all' = todas
+    function selectedIndex(values, selected) {
+        const all = values.map((_, i) => i);
+        if (selected === null || selected === undefined || selected === 'all') {
+            return all;
+        }
+        const wanted = new Set(typeof selected === 'string' ? [selected] : selected);
+        if (!wanted.size || wanted.has('all')) {
+            return all;
+        }
+        return all.filter(i => wanted.has(values[i]));
+    }
+
+    function formatNumber(value, decimals) {
+        return value.toLocaleString('en-US', {minimumFractionDigits: decimals, maximumFractionDigits: decimals});
+    }
+
+    // Mesma estrutura de components.kpi_cards.create_kpi_card
+    function kpiCard(title, text) {
+        const component = (namespace, type, props) => ({props: props, type: type, namespace: namespace});
+        return component('dash_bootstrap_components', 'Col', {
+            children: component('dash_bootstrap_components', 'Card', {
+                children: component('dash_bootstrap_components', 'CardBody', {
+                    children: [
+                        component('dash_html_components', 'H4', {children: title, className: 'card-title'}),
+                        component('dash_html_components', 'P', {children: text, className: 'card-text'}),
+                    ],
+                }),
+            }),
+            md: 4,
+        });
+    }
+
+    function figure(payload, panel, update) {
+        const fig = JSON.parse(JSON.stringify(payload.figures[panel]));
+        fig.layout.template = payload.template;
+        Object.assign(fig.data[0], update);
+        return fig;
+    }
+
+    function renderPanels(payload, category, region) {
+        const nCat = payload.categorias.length;
+        const nReg = payload.regioes.length;
+        const nMes = payload.meses.length;
+        const receita = decode(payload.receita);
+        const quantidade = decode(payload.quantidade);
+        const linhas = decode(payload.linhas);
+        const cats = selectedIndex(payload.categorias, category);
+        const regs = selectedIndex(payload.regioes, region);
+
+        // Uma passada: totais por mês e por célula (região × categoria) da seleção
+        const receitaMes = new Float64Array(nMes);
+        const linhasMes = new Float64Array(nMes);
+        const receitaCelula = new Float64Array(regs.length * cats.length);
+        const linhasCelula = new Float64Array(regs.length * cats.length);
+        let totalVendas = 0;
+        for (let m = 0; m < nMes; m++) {
+            for (let a = 0; a < cats.length; a++) {
+                const base = (m * nCat + cats[a]) * nReg;
+                for (let b = 0; b < regs.length; b++) {
+                    const k = base + regs[b];
+                    receitaMes[m] += receita[k];
+                    linhasMes[m] += linhas[k];
+                    receitaCelula[b * cats.length + a] += receita[k];
+                    linhasCelula[b * cats.length + a] += linhas[k];
+                    totalVendas += quantidade[k];
+                }
+            }
+        }
+
+        const receitaTotal = receitaMes.reduce((total, value) => total + value, 0);
+        const ticketMedio = totalVendas > 0 ? receitaTotal / totalVendas : 0;
+        const kpis = [
+            kpiCard('Receita Total', 'R$ ' + formatNumber(receitaTotal, 2)),
+            kpiCard('Total de Vendas', formatNumber(totalVendas, 0)),
+            kpiCard('Ticket Médio', 'R$ ' + formatNumber(ticketMedio, 2)),
+        ];
+
+        const meses = [...payload.meses.keys()].filter(m => linhasMes[m] > 0);
+        const evolution = figure(payload, 'sales_evolution', {
+            x: meses.map(m => payload.meses[m]),
+            y: meses.map(m => receitaMes[m]),
+        });
+
+        const sumColumn = (values, a) => regs.reduce((total, _, b) => total + values[b * cats.length + a], 0);
+        const sumRow = (values, b) => cats.reduce((total, _, a) => total + values[b * cats.length + a], 0);
+        const catsPresentes = [...cats.keys()].filter(a => sumColumn(linhasCelula, a) > 0);
+        const regsPresentes = [...regs.keys()].filter(b => sumRow(linhasCelula, b) > 0);
+        const categorySales = figure(payload, 'category_sales', {
+            labels: catsPresentes.map(a => payload.categorias[cats[a]]),
+            values: catsPresentes.map(a => sumColumn(receitaCelula, a)),
+        });
+        const heatmap = figure(payload, 'region_heatmap', {
+            x: catsPresentes.map(a => payload.categorias[cats[a]]),
+            y: regsPresentes.map(b => payload.regioes[regs[b]]),
+            z: regsPresentes.map(b => catsPresentes.map(a => receitaCelula[b * cats.length + a])),
+        });
+        return [kpis, evolution, categorySales, heatmap];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            render: function (payload, category, region, serverPanels) {
+                if (payload) {
+                    return renderPanels(payload, category, region);
+                }
+                // Sem payload: só repassa os painéis quando o servidor os envia
+                const context = window.dash_clientside.callback_context;
+                const triggered = context ? context.triggered.map(t => t.prop_id) : [];
+                if (serverPanels && triggered.some(id => id.startsWith('server-panels.'))) {
+                    return serverPanels;
+                }
+                return Array(4).fill(window.dash_clientside.no_update);
+            },
+        },
+    });
+})();
@@ -0,0 +1,69 @@
+"""
+Mede o custo dos gráficos de tendência e previsão por tamanho da série
+diária: bytes do JSON da figura enviada ao navegador e tempo de montagem no
+servidor, com redução (LTTB + WebGL + arredondamento) e sem ela (todos os
+pontos, traços SVG).
+
+    python benchmarks/bench_charts.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _series(n, rng):
+    dias = np.arange(n, dtype=np.float64)
+    receita = 5000 + 2.5 * dias + np.sin(dias / 30) * 800 + rng.normal(0, 400, n)
+    daily_sales = pd.DataFrame({'dias_desde_inicio': dias, 'receita': receita})
+    future_days = np.arange(n, n + 30).reshape(-1, 1)
+    return daily_sales, 2.5 * dias + 5000, future_days, 2.5 * future_days.ravel() + 5000
+
+
+def _measure(build, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = build().to_json()
+        timings.append(time.perf_counter() - started)
+    return len(payload), float(np.median(timings))
+
+
+def main(sizes=(365, 3_650, 20_000, 100_000)):
+    from components.charts import create_sales_forecast_chart
+    from config import settings
+
+    rng = np.random.default_rng(0)
+    print(f"CHART_MAX_POINTS={settings.CHART_MAX_POINTS}  "
+          f"CHART_WEBGL_THRESHOLD={settings.CHART_WEBGL_THRESHOLD}  "
+          f"CHART_FLOAT_DECIMALS={settings.CHART_FLOAT_DECIMALS}\n")
+    print(f"{'pontos':>8}  {'modo':<10}{'KB':>10}{'ms':>10}")
+    for n in sizes:
+        args = _series(n, rng)
+        for label, max_points in (('completo', 0), ('reduzido', None)):
+            if max_points == 0:
+                # Linha de base: o gráfico como era, todos os pontos com precisão total
+                def build():
+                    daily_sales, trend_line, future_days, future_sales = args
+                    fig = go.Figure()
+                    fig.add_trace(go.Scatter(x=daily_sales['dias_desde_inicio'], y=daily_sales['receita'], mode='markers'))
+                    fig.add_trace(go.Scatter(x=daily_sales['dias_desde_inicio'], y=trend_line, mode='lines'))
+                    fig.add_trace(go.Scatter(x=future_days.flatten(), y=future_sales, mode='lines'))
+                    fig.update_layout(title='Previsão de Vendas (Próximos 30 dias)', xaxis_title='Dias desde o Início do Período', yaxis_title='Receita')
+                    fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+                    return fig
+            else:
+                def build():
+                    return create_sales_forecast_chart(*args, max_points=max_points)
+            size, elapsed = _measure(build)
+            print(f"{n:>8,}  {label:<10}{size / 1024:>10.1f}{elapsed * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,186 @@
+"""
+Compara uma sessão de uso do dashboard com e sem CLIENTSIDE_AGGREGATION:
+requisições ao servidor, bytes recebidos e latência de cada interação até
+os painéis atualizarem.
+
+A sessão é a mesma nos dois modos: carga inicial seguida de trocas de
+categoria e região, com uma troca da janela de datas a cada `--date-every`
+interações. Cada modo roda em um processo próprio (o app lê as
+configurações na importação), com caches frios e sem aquecimento. Os
+callbacks do servidor são chamados pelo endpoint do Dash, como o navegador
+faria; a latência soma o tempo de servidor de cada requisição em série com
+`--rtt-ms` de rede por ida e volta. No modo do navegador, o tempo dos
+painéis reagregados é o do `assets/dashboard.js` medido no node.
+
+    python benchmarks/bench_clientside.py data/sales_data.csv --rtt-ms 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSET = os.path.join(ROOT, 'assets', 'dashboard.js')
+
+CATEGORIES = [[], ['Eletrônicos'], ['Roupas', 'Livros'], ['Móveis'], ['Esportes', 'Eletrônicos']]
+REGIONS = [[], ['Sul'], ['Norte', 'Sudeste'], []]
+# Janelas de datas: fração do período total, a partir do fim
+WINDOWS = [1.0, 0.25, 0.5, 1 / 12]
+
+
+def session(n_interactions, date_every):
+    """Sequência de (janela, categorias, regiões, o que mudou) da sessão simulada."""
+    steps = [(0, [], [], 'load')]
+    window = 0
+    for i in range(1, n_interactions + 1):
+        if i % date_every == 0:
+            window = (window + 1) % len(WINDOWS)
+            steps.append((window, steps[-1][1], steps[-1][2], 'date'))
+        elif i % 2:
+            steps.append((window, CATEGORIES[i % len(CATEGORIES)], steps[-1][2], 'category'))
+        else:
+            steps.append((window, steps[-1][1], REGIONS[i % len(REGIONS)], 'region'))
+    return steps
+
+
+def _node_render_ms(calls):
+    """Tempo (ms) do render clientside para cada (payload, categorias, regiões), no node."""
+    if not calls:
+        return []
+    script = (
+        "global.window = {dash_clientside: {no_update: null}};"
+        f"require({json.dumps(ASSET)});"
+        "const render = window.dash_clientside.dashboard.render;"
+        "const calls = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "for (let i = 0; i < 20; i++) render(...calls[0], null);"
+        "const times = calls.map(args => {"
+        "  const started = process.hrtime.bigint(); render(...args, null);"
+        "  return Number(process.hrtime.bigint() - started) / 1e6; });"
+        "process.stdout.write(JSON.stringify(times));"
+    )
+    result = subprocess.run(['node', '-e', script], input=json.dumps(calls), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def run_mode(n_interactions, date_every):
+    """Executa a sessão no modo configurado no ambiente e imprime o resultado em JSON."""
+    from bench_suite import DashClient
+    import app as dashboard
+    from config import settings
+
+    client = DashClient(dashboard.app)
+    start, end = (np.datetime64(str(d)) for d in dashboard.data_source.date_bounds())
+    version = {'version': dashboard.data_source.version}
+    requests, received, steps = 0, 0, []
+    handle, payload, renders = None, None, []
+
+    def call(outputs, inputs, changed=None):
+        nonlocal requests, received
+        started = time.perf_counter()
+        response = client.call(outputs, inputs, changed=changed)
+        elapsed = time.perf_counter() - started
+        requests += 1
+        received += len(json.dumps(response, separators=(',', ':'))) if response else 0
+        return response, elapsed
+
+    for window, category, region, changed in session(n_interactions, date_every):
+        days = int((end - start).astype(int) * WINDOWS[window])
+        inputs = [
+            ('date-range', 'start_date', str(end - days)),
+            ('date-range', 'end_date', str(end)),
+            ('category-filter', 'value', category),
+            ('region-filter', 'value', region),
+            ('dataset-version', 'data', version),
+        ]
+        changed_prop = {'load': None, 'date': ('date-range', 'start_date'),
+                        'category': ('category-filter', 'value'), 'region': ('region-filter', 'value')}[changed]
+        if settings.CLIENTSIDE_AGGREGATION:
+            outputs = [('filtered-data-store', 'data'), ('client-payload', 'data'), ('top-products-chart', 'figure'),
+                       ('trend-analysis-chart', 'figure'), ('sales-forecast-chart', 'figure'), ('server-panels', 'data')]
+            response, server = call(outputs, inputs, changed_prop)
+            handle = response['filtered-data-store']['data']
+            if 'client-payload' in response:
+                payload = response['client-payload']['data']
+            heavy = server
+            chain = 1
+            rendered = payload is not None
+            if rendered:
+                renders.append([payload, category, region])
+                # Só a troca de janela espera o payload; o render clientside soma-se depois
+                light, light_chain = (server, 1) if 'client-payload' in response else (0.0, 0)
+            else:
+                light, light_chain = server, chain
+        else:
+            response, filtered = call([('filtered-data-store', 'data')], inputs, changed_prop)
+            handle = response['filtered-data-store']['data']
+            _, server = call([('kpi-cards', 'children'), ('sales-evolution-chart', 'figure'),
+                              ('category-sales-chart', 'figure'), ('top-products-chart', 'figure'),
+                              ('region-heatmap', 'figure'), ('trend-analysis-chart', 'figure'),
+                              ('sales-forecast-chart', 'figure')], [('filtered-data-store', 'data', handle)])
+            light = heavy = filtered + server
+            chain = light_chain = 2
+            rendered = False
+        # A tabela depende do handle nos dois modos
+        call([('data-table', 'data'), ('data-table', 'page_count')], [
+            ('filtered-data-store', 'data', handle), ('data-table', 'page_current', 0),
+            ('data-table', 'page_size', 10), ('data-table', 'sort_by', []), ('data-table', 'filter_query', ''),
+        ])
+        steps.append({'changed': changed, 'light': light, 'heavy': heavy, 'round_trips': chain,
+                      'light_round_trips': light_chain, 'render': rendered})
+
+    render_ms = iter(_node_render_ms(renders))
+    for step in steps:
+        if step.pop('render'):
+            step['light'] += next(render_ms) / 1000
+    print(json.dumps({'requests': requests, 'received': received, 'steps': steps}))
+
+
+def main(csv_path, n_interactions, date_every, rtt_ms):
+    results = {}
+    for mode in ('False', 'True'):
+        env = {**os.environ, 'DATA_PATH': csv_path, 'CLIENTSIDE_AGGREGATION': mode,
+               'CACHE_WARMING': 'False', 'REDIS_URL': '', 'INGEST_PATH': ''}
+        output = subprocess.run(
+            [sys.executable, __file__, '--run-mode', '--interactions', str(n_interactions), '--date-every', str(date_every)],
+            env=env, capture_output=True, text=True, check=True, cwd=ROOT,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    rtt = rtt_ms / 1000
+    print(f"sessão: {n_interactions} interações + carga inicial, janela de datas trocada a cada {date_every}, "
+          f"rede {rtt_ms:.0f} ms por ida e volta\n")
+    print(f"{'modo':<12}{'requisições':>13}{'KB recebidos':>14}"
+          f"{'KPIs/evol./cat./calor p50 ms':>30}{'p95 ms':>9}{'top/tendência/previsão p50 ms':>32}")
+    for mode, label in (('False', 'servidor'), ('True', 'navegador')):
+        result = results[mode]
+        steps = [step for step in result['steps'] if step['changed'] != 'load']
+        light = [1000 * (step['light'] + step['light_round_trips'] * rtt) for step in steps]
+        heavy = [1000 * (step['heavy'] + step['round_trips'] * rtt) for step in steps]
+        print(f"{label:<12}{result['requests']:>13}{result['received'] / 1024:>14.0f}"
+              f"{np.percentile(light, 50):>30.1f}{np.percentile(light, 95):>9.1f}{np.percentile(heavy, 50):>32.1f}")
+
+    print("\nsó trocas de categoria/região (p50 ms até os painéis reagregados)")
+    for mode, label in (('False', 'servidor'), ('True', 'navegador')):
+        steps = [step for step in results[mode]['steps'] if step['changed'] in ('category', 'region')]
+        light = [1000 * (step['light'] + step['light_round_trips'] * rtt) for step in steps]
+        print(f"{label:<12}{np.percentile(light, 50):>10.2f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('--interactions', type=int, default=40)
+    parser.add_argument('--date-every', type=int, default=8)
+    parser.add_argument('--rtt-ms', type=float, default=50)
+    parser.add_argument('--run-mode', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_mode:
+        run_mode(args.interactions, args.date_every)
+    else:
+        main(os.path.abspath(args.csv), args.interactions, args.date_every, args.rtt_ms)
@@ -0,0 +1,130 @@
+"""
+Partida de um worker com e sem LAZY_STARTUP: tempo até o primeiro byte de
+`/health` e do layout (`/_dash-layout`), até os dados ficarem prontos
+(`/ready`) e o tempo de importação de cada módulo.
+
+Cada modo sobe o gunicorn (`gunicorn.conf.py`, sem preload) em um processo
+novo, com caches frios e sem Redis. A partida rápida roda duas vezes: sem o
+arquivo de metadados (primeira partida: o layout espera os dados) e com ele.
+A importação por módulo vem de `python -X importtime -c "import app"`
+(tempo acumulado, incluindo os módulos que cada um importa).
+
+    python benchmarks/bench_cold_start.py /tmp/vendas_10M.csv
+"""
+import argparse
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['app', 'dash', 'components.charts', 'utils.cache', 'utils.data_source',
+           'pandas', 'plotly.express', 'pyarrow', 'numpy', 'redis']
+_IMPORT_LINE = re.compile(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _env(csv_path, lazy):
+    return dict(os.environ, DATA_PATH=csv_path, LAZY_STARTUP=str(lazy), GUNICORN_PRELOAD='False',
+                REDIS_URL='', CACHE_WARMING='False', INGEST_PATH='', METRICS_ENABLED='False')
+
+
+def import_times(csv_path, lazy):
+    """Tempo acumulado de importação (s) de cada módulo de MODULES em `import app` (ausentes os não importados)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                            env=_env(csv_path, lazy), capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match and match.group(3) in MODULES:
+            times.setdefault(match.group(3), int(match.group(1)) / 1e6)
+    return times
+
+
+def _first_byte(port, path, started, deadline, status=200):
+    """Segundos desde `started` até `path` responder com `status` (o primeiro byte do corpo)."""
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=60) as response:
+                response.read(1)
+                if response.status == status:
+                    return time.perf_counter() - started
+        except urllib.error.HTTPError:
+            pass
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{path} não respondeu a tempo")
+
+
+def boot(csv_path, lazy, timeout=600):
+    """(primeiro byte de /health, do layout, /ready 200) em segundos desde o início do processo."""
+    port = _free_port()
+    started = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', '1', '-b', f'127.0.0.1:{port}', 'app:server'],
+        cwd=ROOT, env=_env(csv_path, lazy), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    try:
+        health = _first_byte(port, '/health', started, deadline)
+        layout = _first_byte(port, '/_dash-layout', started, deadline)
+        ready = _first_byte(port, '/ready', started, deadline)
+        return health, layout, ready
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main(csv_path, repeat):
+    sys.path.insert(0, ROOT)
+    from utils.snapshot import snapshot_path
+
+    csv_path = os.path.abspath(csv_path)
+    metadata = os.path.splitext(csv_path)[0] + '.meta.json'
+    # O snapshot Arrow já existe nas partidas reais (gerado no build); a primeira carga o cria
+    if not os.path.exists(snapshot_path(csv_path)):
+        subprocess.run([sys.executable, '-m', 'utils.snapshot', csv_path], cwd=ROOT, check=True, capture_output=True)
+
+    runs = []
+    for label, lazy, keep_metadata in (('completa', False, True), ('rápida, sem metadados', True, False),
+                                       ('rápida, com metadados', True, True)):
+        timings = []
+        for _ in range(repeat):
+            if not keep_metadata and os.path.exists(metadata):
+                os.remove(metadata)
+            timings.append(boot(csv_path, lazy))
+        runs.append((label, [min(values) for values in zip(*timings)]))
+
+    print(f"gunicorn, 1 worker, {csv_path}: melhor de {repeat} (s desde o início do processo)\n")
+    print(f"{'partida':<26}{'/health':>10}{'layout':>10}{'/ready':>10}")
+    for label, (health, layout, ready) in runs:
+        print(f"{label:<26}{health:>10.2f}{layout:>10.2f}{ready:>10.2f}")
+
+    eager, lazy = import_times(csv_path, False), import_times(csv_path, True)
+    print(f"\nimportação (ms, acumulado) em `import app`")
+    print(f"{'módulo':<26}{'completa':>10}{'rápida':>10}")
+    for module in MODULES:
+        cells = [f"{times[module] * 1000:>10.0f}" if module in times else f"{'—':>10}" for times in (eager, lazy)]
+        print(f"{module:<26}{''.join(cells)}")
+    print("\n(na completa, `app` inclui a carga dos dados; na rápida, as consultas e o pandas são importados"
+          " depois, em `start_background_tasks`)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.csv, args.repeat)
@@ -0,0 +1,72 @@
+"""
+Compara o caminho unificado do dashboard (uma seleção do cubo e os sete
+painéis derivados das mesmas somas parciais, `compute_dashboard`) com o
+caminho antigo, em que cada callback agrupava a fatia filtrada por conta
+própria com as funções de `utils/analytics.py`.
+
+    python benchmarks/bench_dashboard.py data/sales_data.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _best(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(csv_path, repeat):
+    import pandas as pd
+    from utils import analytics
+    from utils.cube import build_cube
+    from utils.dashboard_query import compute_dashboard
+    from utils.data_processor import load_data, process_data
+
+    df = process_data(load_data(csv_path))
+    cube = build_cube(df)
+    start, end = df['data'].min(), df['data'].max()
+    middle = start + (end - start) / 2
+    queries = {
+        'tudo': {'start_date': str(start.date()), 'end_date': str(end.date()), 'category': 'all', 'region': 'all'},
+        '6 meses': {'start_date': str(middle.date()), 'end_date': str((middle + pd.DateOffset(months=6)).date()),
+                    'category': 'all', 'region': 'all'},
+        '1 ano, 2 categorias': {'start_date': str(middle.date()), 'end_date': str((middle + pd.DateOffset(years=1)).date()),
+                                'category': ['Livros', 'Roupas'], 'region': 'all'},
+    }
+    print(f"{len(df):,} linhas\n")
+    print(f"{'seleção':<24}{'linhas':>12}{'callbacks ms':>14}{'unificado ms':>14}{'×':>8}")
+    for label, filters in queries.items():
+        mask = (df['data'] >= filters['start_date']) & (df['data'] < pd.Timestamp(filters['end_date']) + pd.Timedelta(days=1))
+        if filters['category'] != 'all':
+            mask &= df['categoria'].isin(filters['category'])
+        dff = df[mask]
+
+        def per_callback():
+            analytics.calculate_kpis(dff)
+            analytics.get_sales_evolution(dff)
+            analytics.get_sales_by_category(dff)
+            analytics.get_top_products(dff)
+            analytics.get_region_heatmap_data(dff)
+            analytics.get_trend_analysis(dff.copy())
+            analytics.get_sales_forecast(dff.copy())
+
+        separate = _best(per_callback, repeat)
+        fused = _best(lambda: compute_dashboard(cube.select(filters).aggregates()), repeat)
+        print(f"{label:<24}{len(dff):>12,}{separate * 1000:>14.1f}{fused * 1000:>14.1f}{separate / fused:>8.1f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.csv, args.repeat)
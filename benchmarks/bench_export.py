@@ -0,0 +1,75 @@
+"""
+Mede as exportações da fatia filtrada por formato: tempo, tamanho do
+arquivo e pico de memória adicional do processo, comparadas com a
+exportação antiga (fatia inteira materializada + `DataFrame.to_excel`).
+
+Cada exportação roda em um processo filho (fork) com os dados já
+carregados, e o pico é o `ru_maxrss` do filho menos o RSS no início:
+
+    python benchmarks/bench_export.py data/sales_data.csv --months 12
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _run(source, handle, export_format, directory, queue):
+    from utils.export import EXPORT_FORMATS, ExportJobs
+
+    baseline = _rss()
+    started = time.perf_counter()
+    if export_format == 'to_excel':
+        path = os.path.join(directory, 'antigo.xlsx')
+        source.frame(handle).to_excel(path, index=False)
+    else:
+        jobs = ExportJobs(source, directory, max_workers=1)
+        job_id = jobs.submit(handle, export_format)
+        jobs._pool().shutdown(wait=True)
+        path = jobs.status(job_id)['path']
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    queue.put((elapsed, os.path.getsize(path), max(peak - baseline, 0)))
+
+
+def main(csv_path, months, formats):
+    import pandas as pd
+    from utils.data_source import MemorySource
+
+    source = MemorySource.from_csv(csv_path)
+    start_date, end_date = source.date_bounds()
+    start = max(pd.Timestamp(end_date) - pd.DateOffset(months=months), pd.Timestamp(start_date)) if months else start_date
+    filters = {'start_date': str(pd.Timestamp(start).date()), 'end_date': str(end_date), 'category': 'all', 'region': 'all'}
+    handle = source.make_handle(filters)
+    print(f"Fatia: {filters['start_date']} a {filters['end_date']}, {source.count(handle):,} linhas\n")
+    print(f"{'formato':<12}{'segundos':>10}{'arquivo MB':>12}{'pico MB':>10}")
+
+    context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as directory:
+        for export_format in formats:
+            queue = context.Queue()
+            process = context.Process(target=_run, args=(source, handle, export_format, directory, queue))
+            process.start()
+            elapsed, size, peak = queue.get()
+            process.join()
+            print(f"{export_format:<12}{elapsed:>10.2f}{size / 2**20:>12.1f}{peak / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_path', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('--months', type=int, default=0, help='últimos N meses (0 = período completo)')
+    parser.add_argument('--formats', nargs='+', default=['to_excel', 'xlsx', 'csv', 'parquet'])
+    args = parser.parse_args()
+    main(args.csv_path, args.months, args.formats)
@@ -0,0 +1,64 @@
+"""
+Latência de filtro: máscaras booleanas sobre todas as linhas vs. motor de
+índices (busca binária + bitmaps). O período selecionado tem tamanho fixo
+(~30 dias), então o motor deve ficar constante enquanto as máscaras crescem
+com o total de linhas.
+
+    python benchmarks/bench_filters.py
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic(n_rows, rng):
+    import pandas as pd
+    from utils.schema import CATEGORIAS, REGIOES
+
+    df = pd.DataFrame({
+        'data': pd.date_range('2022-01-01', periods=n_rows, freq='min'),
+        'categoria': pd.Categorical.from_codes(rng.integers(0, len(CATEGORIAS), n_rows), CATEGORIAS),
+        'regiao': pd.Categorical.from_codes(rng.integers(0, len(REGIOES), n_rows), REGIOES),
+    })
+    return df
+
+
+def timeit(fn, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    import numpy as np
+    import pandas as pd
+    from utils.filter_engine import FilterEngine, make_filters
+
+    rng = np.random.default_rng(0)
+    filters = make_filters('2022-01-10', '2022-02-08', ['Roupas', 'Livros'], ['Sul', 'Sudeste'])
+    start, end = pd.Timestamp('2022-01-10'), pd.Timestamp('2022-02-09')
+
+    print(f"{'linhas':>12}{'selecionadas':>14}{'máscaras (ms)':>16}{'índices (ms)':>15}")
+    for n_rows in (100_000, 1_000_000, 5_000_000, 20_000_000):
+        df = synthetic(n_rows, rng)
+        engine = FilterEngine(df)
+
+        def masks():
+            mask = (df['data'] >= start) & (df['data'] < end)
+            mask &= df['categoria'].isin(filters['category'])
+            mask &= df['regiao'].isin(filters['region'])
+            return np.flatnonzero(mask.to_numpy())
+
+        selected = len(engine.filter(filters))
+        assert selected == len(masks())
+        print(f"{n_rows:>12,}{selected:>14,}{timeit(masks):>16.2f}{timeit(lambda: engine.filter(filters)):>15.2f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
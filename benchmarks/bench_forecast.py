@@ -0,0 +1,86 @@
+"""
+Mede o modelo sazonal de previsão: vazão do ajuste em lote (séries por
+segundo, contra ajustar série a série), custo da previsão por requisição
+(ajuste da janela pelos prefixos contra a reta ajustada na hora) e acurácia fora da
+amostra (WAPE dos últimos `--horizon` dias, sazonal contra reta).
+
+    python benchmarks/bench_forecast.py data/sales_data.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _best(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(csv_path, horizon, synthetic_series):
+    from utils.data_source import MemorySource
+    from utils.forecast import backtest, fit_forecast_model, fit_seasonal
+    from utils.regression import clear_fit_cache
+
+    source = MemorySource.from_csv(csv_path, forecast_harmonics=None)
+    cube = source.cube
+    days = cube.dias.astype(np.int64)
+    n_cells = len(cube.categorias) * len(cube.regioes)
+    print(f"{len(days)} dias, {n_cells} séries categoria × região\n")
+
+    # Vazão: as séries do cubo e um lote sintético maior com o mesmo calendário
+    rng = np.random.default_rng(0)
+    cells = cube.receita.reshape(len(days), -1)
+    batch = np.tile(cells, (1, -(-synthetic_series // n_cells)))[:, :synthetic_series]
+    batch = batch * rng.uniform(0.5, 1.5, batch.shape[1])
+    loop_sample = batch[:, :200]
+    print(f"{'ajuste':<34}{'séries':>8}{'ms':>10}{'séries/s':>12}")
+    for label, values, fit in (
+        ('cubo, em lote', cells, lambda v: fit_seasonal(days, v)),
+        ('sintético, em lote', batch, lambda v: fit_seasonal(days, v)),
+        ('sintético, série a série', loop_sample,
+         lambda v: [fit_seasonal(days, v[:, i]) for i in range(v.shape[1])]),
+    ):
+        elapsed = _best(lambda: fit(values))
+        print(f"{label:<34}{values.shape[1]:>8,}{elapsed * 1000:>10.1f}{values.shape[1] / elapsed:>12,.0f}")
+    model = fit_forecast_model(cube)
+    print(f"{'prefixos (fit_forecast_model)':<34}{model.n_series:>8}{model.fit_seconds * 1000:>10.1f}\n")
+
+    # Custo por requisição da previsão de uma seleção (somas parciais já prontas, sem cache de ajustes)
+    start_date, end_date = (str(date) for date in source.date_bounds())
+    filters = {'start_date': start_date, 'end_date': end_date, 'category': ['Livros', 'Roupas'], 'region': ['Sul']}
+    aggregates = cube.select(filters).aggregates()
+
+    def forecast(model):
+        def run():
+            clear_fit_cache()
+            aggregates.forecast, aggregates._trend = model, None
+            aggregates.get_sales_forecast()
+        return run
+
+    print(f"{'previsão por requisição':<34}{'ms':>10}")
+    for label, func in (('reta ajustada na hora', forecast(None)), ('sazonal, prefixos da janela', forecast(model))):
+        print(f"{label:<34}{_best(func, 20) * 1000:>10.2f}")
+
+    print(f"\nWAPE fora da amostra (últimos {horizon} dias)")
+    print(f"{'nível':<14}{'sazonal':>10}{'reta':>10}")
+    for level, errors in backtest(cube, horizon).items():
+        print(f"{level:<14}{errors['sazonal']:>10.1%}{errors['linear']:>10.1%}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--synthetic-series', type=int, default=10_000)
+    args = parser.parse_args()
+    main(args.csv, args.horizon, args.synthetic_series)
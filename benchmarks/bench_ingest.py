@@ -0,0 +1,112 @@
+"""
+Mede a ingestão incremental de vendas sobre o dataset de exemplo:
+
+- vazão de `MemorySource.append` por tamanho de lote, comparada com
+  recarregar e reindexar tudo;
+- latência de frescor ponta a ponta: do registro gravado no arquivo de
+  ingestão até a versão nova dos dados e o dashboard recalculado.
+
+    python benchmarks/bench_ingest.py data/sales_data.csv
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _batch(last_date, n, rng):
+    """Lote de vendas com datas posteriores à última venda carregada."""
+    from utils.schema import CATEGORIAS, REGIOES
+
+    datas = last_date + pd.to_timedelta(np.sort(rng.integers(1, 3600 * 24, n)), unit='s')
+    return pd.DataFrame({
+        'data': datas,
+        'valor': np.round(rng.exponential(100, n) + 50, 2),
+        'quantidade': rng.poisson(5, n) + 1,
+        'categoria': rng.choice(CATEGORIAS, n),
+        'regiao': rng.choice(REGIOES, n),
+        'produto': rng.choice([f'Produto {i}' for i in range(1, 101)], n),
+    })
+
+
+def bench_throughput(source, rng, sizes=(100, 1_000, 10_000), repeat=5):
+    from utils.cube import build_cube
+    from utils.data_processor import process_data
+    from utils.filter_engine import FilterEngine
+
+    print(f"{'lote (linhas)':<16}{'ms/lote':>10}{'linhas/s':>14}")
+    for size in sizes:
+        timings = []
+        for _ in range(repeat):
+            batch = _batch(source.df['data'].iloc[-1], size, rng)
+            started = time.perf_counter()
+            source.append(batch)
+            timings.append(time.perf_counter() - started)
+        elapsed = float(np.median(timings))
+        print(f"{size:<16}{elapsed * 1000:>10.2f}{size / elapsed:>14,.0f}")
+
+    batch = _batch(source.df['data'].iloc[-1], 1_000, rng)
+    started = time.perf_counter()
+    df = process_data(pd.concat([source.df, batch.assign(receita=batch['valor'] * batch['quantidade'])], ignore_index=True))
+    build_cube(df)
+    FilterEngine(df)
+    print(f"{'recarga total':<16}{(time.perf_counter() - started) * 1000:>10.2f}{'':>14}   ({len(df):,} linhas)")
+
+
+def bench_freshness(source, rng, interval=0.05, repeat=10):
+    from config import settings
+    from utils.dashboard_query import compute_dashboard
+    from utils.ingest import Ingestor, FileTailer, append_records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ingest.jsonl')
+        ingestor = Ingestor(source, FileTailer(path), interval=interval)
+        ingestor.start()
+        latencies, dashboards = [], []
+        try:
+            for _ in range(repeat):
+                batch = _batch(source.df['data'].iloc[-1], 50, rng)
+                version = source.version
+                started = time.perf_counter()
+                append_records(path, batch.to_dict('records'))
+                while source.version == version:
+                    time.sleep(0.001)
+                latencies.append(time.perf_counter() - started)
+
+                start_date, end_date = source.date_bounds()
+                filters = {'start_date': str(start_date), 'end_date': str(end_date), 'category': 'all', 'region': 'all'}
+                started = time.perf_counter()
+                compute_dashboard(source.select(filters, fit_key=f'bench:{source.version}').aggregates())
+                dashboards.append(time.perf_counter() - started)
+        finally:
+            ingestor.stop()
+
+    ingest = float(np.median(latencies))
+    dashboard = float(np.median(dashboards))
+    refresh = settings.LIVE_REFRESH_INTERVAL_MS / 1000
+    print(f"\narquivo -> nova versão (poll {interval * 1000:.0f} ms): {ingest * 1000:.1f} ms (mediana)")
+    print(f"dashboard recalculado (período completo): {dashboard * 1000:.1f} ms")
+    print(f"pior caso na tela com INGEST_POLL_INTERVAL={settings.INGEST_POLL_INTERVAL}s e "
+          f"LIVE_REFRESH_INTERVAL_MS={settings.LIVE_REFRESH_INTERVAL_MS}: "
+          f"{settings.INGEST_POLL_INTERVAL + ingest + refresh + dashboard:.2f} s")
+
+
+def main(csv_path):
+    from utils.data_source import MemorySource
+
+    rng = np.random.default_rng(0)
+    started = time.perf_counter()
+    source = MemorySource.from_csv(csv_path)
+    print(f"Carga inicial: {len(source.df):,} linhas em {time.perf_counter() - started:.2f} s\n")
+    bench_throughput(source, rng)
+    bench_freshness(source, rng)
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main(sys.argv[1] if len(sys.argv) > 1 else 'data/sales_data.csv')
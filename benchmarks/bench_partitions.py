@@ -0,0 +1,55 @@
+"""
+Curva de escala da construção do cubo (`build_cube`) por partições
+mensais, de 1 a N threads.
+
+O ganho depende dos núcleos livres da máquina (`os.cpu_count()`).
+
+    python data/generate_sample_data.py --rows 10000000 --output /tmp/vendas_10M.csv
+    python benchmarks/bench_partitions.py /tmp/vendas_10M.csv --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _best(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(csv_path, workers, repeat):
+    from utils.cube import build_cube
+    from utils.data_processor import load_data, process_data
+    from utils.partitions import SalesPartitions
+
+    df = process_data(load_data(csv_path))
+    started = time.perf_counter()
+    partitions = SalesPartitions(df)
+    split = time.perf_counter() - started
+    print(f"{len(df):,} linhas, {len(partitions)} partições mensais, {os.cpu_count()} núcleos; "
+          f"divisão em partições {split * 1000:.0f} ms\n")
+
+    print("construção do cubo")
+    print(f"{'threads':<16}{'s':>8}{'× 1 thread':>12}")
+    serial = None
+    for n in workers:
+        elapsed = _best(lambda: build_cube(df, workers=n), repeat)
+        serial = serial or elapsed
+        print(f"{n:<16}{elapsed:>8.2f}{serial / elapsed:>12.2f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.csv, args.workers, args.repeat)
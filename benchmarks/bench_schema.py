@@ -0,0 +1,36 @@
+"""
+Relatório de memória por coluna antes e depois do schema compacto.
+
+    python benchmarks/bench_schema.py data/sales_data.csv
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(csv_path):
+    import pandas as pd
+    from utils.schema import apply_schema, memory_report
+
+    before = pd.read_csv(csv_path, parse_dates=['data'])
+    before['mes'] = before['data'].dt.to_period('M').astype(str)
+    after = apply_schema(before.copy())
+
+    report = memory_report(before, after)
+    pd.set_option('display.float_format', '{:,.2f}'.format)
+    print((report[['antes', 'depois']] / 1024 ** 2).assign(reducao=report['reducao']).to_string())
+
+    # Custo de um filtro de igualdade + groupby nas duas representações
+    for name, frame in (('object', before), ('schema', after)):
+        t0 = time.perf_counter()
+        for _ in range(10):
+            dff = frame[frame['categoria'] == 'Roupas']
+            dff.groupby('regiao', observed=True)['receita'].sum()
+        print(f"filtro + groupby ({name}): {(time.perf_counter() - t0) / 10 * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main(sys.argv[1] if len(sys.argv) > 1 else 'data/sales_data.csv')
@@ -0,0 +1,54 @@
+"""
+Compara o tempo de inicialização (carga + processamento) e o pico de memória
+entre a leitura do CSV e o snapshot Arrow IPC.
+
+Cada modo roda em um processo novo, como um worker do gunicorn subindo:
+
+    python benchmarks/bench_startup.py data/sales_data.csv
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORKER = """
+import resource, sys, time
+t0 = time.perf_counter()
+from utils.data_processor import load_data, process_data
+df = process_data(load_data(sys.argv[1], snapshot=sys.argv[2] == 'snapshot'))
+elapsed = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{elapsed:.3f} {rss:.0f} {len(df)}")
+"""
+
+
+def run(csv_path, mode):
+    result = subprocess.run(
+        [sys.executable, '-c', _WORKER, csv_path, mode],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed, rss, rows = result.stdout.strip().splitlines()[-1].split()
+    return float(elapsed), float(rss), int(rows)
+
+
+def main(csv_path, repeat=3):
+    from utils.snapshot import snapshot_path
+
+    path = snapshot_path(os.path.join(ROOT, csv_path))
+    if os.path.exists(path):
+        os.remove(path)
+
+    rows = [('csv', *run(csv_path, 'csv'))]
+    rows.append(('snapshot (geração)', *run(csv_path, 'snapshot')))
+    for _ in range(repeat):
+        rows.append(('snapshot (mmap)', *run(csv_path, 'snapshot')))
+
+    print(f"{'modo':<22}{'tempo (s)':>12}{'pico RSS (MB)':>16}{'linhas':>12}")
+    for mode, elapsed, rss, n in rows:
+        print(f"{mode:<22}{elapsed:>12.3f}{rss:>16.0f}{n:>12}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main(sys.argv[1] if len(sys.argv) > 1 else 'data/sales_data.csv')
@@ -0,0 +1,430 @@
+"""
+Suíte de benchmarks dos caminhos quentes, em escala.
+
+Gera dados sintéticos (com o gerador de `data/generate_sample_data.py`)
+em 100 mil, 1, 10 e 50 milhões de linhas e mede, para cada tamanho:
+
+- `load_data` (CSV e snapshot) e `process_data`;
+- cada função de `utils/analytics.py` sobre o dataset inteiro;
+- `ResultCache.get_or_compute` (Redis simulado por fakeredis e L1);
+- cada callback do `app.py` ponta a ponta, por requisições ao servidor Flask
+  (`/_dash-update-component`), incluindo a exportação até o download.
+
+Cada tamanho roda em um processo próprio (o app é carregado com
+`DATA_PATH` apontando para o dataset sintético). O resultado é um JSON com
+percentis dos tempos e pico de memória por caso:
+
+    python benchmarks/bench_suite.py run --sizes 100k 1M --output resultados.json
+    python benchmarks/bench_suite.py run --sizes 100k --baseline base.json
+    python benchmarks/bench_suite.py compare base.json resultados.json --threshold 0.15
+
+`compare` (ou `run --baseline`) sai com código 1 quando algum caso fica
+mais lento ou usa mais memória que a linha de base além da tolerância.
+"""
+import argparse
+import datetime
+import gc
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIZES = {'100k': 100_000, '1M': 1_000_000, '10M': 10_000_000, '50M': 50_000_000}
+
+FILTERS = [
+    {'start_date': '2022-01-01', 'end_date': '2024-12-31', 'category': 'all', 'region': 'all'},
+    {'start_date': '2023-03-01', 'end_date': '2023-08-31', 'category': ['Roupas', 'Livros'], 'region': 'all'},
+    {'start_date': '2022-06-01', 'end_date': '2024-06-30', 'category': 'all', 'region': ['Sul', 'Nordeste']},
+    {'start_date': '2024-01-01', 'end_date': '2024-01-31', 'category': ['Eletrônicos'], 'region': ['Norte']},
+]
+
+
+# --- Dados sintéticos -------------------------------------------------------
+
+def dataset_path(data_dir, label, seed, workers=None):
+    """CSV sintético do tamanho (gerado na primeira vez e reaproveitado)."""
+    from utils.sample_data import write_dataset
+
+    path = os.path.join(data_dir, f'vendas_{label}_{seed}.csv')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        started = time.perf_counter()
+        write_dataset(path, SIZES[label], workers=workers, seed=seed)
+        print(f"  dataset {label} gerado em {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return path
+
+
+# --- Medição ------------------------------------------------------------------
+
+def summarize(timings):
+    """Percentis (em segundos) de uma lista de tempos."""
+    values = np.asarray(timings, dtype=np.float64)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        'n': int(len(values)),
+        'min': float(values.min()),
+        'mean': float(values.mean()),
+        'p50': float(p50),
+        'p90': float(p90),
+        'p99': float(p99),
+        'max': float(values.max()),
+    }
+
+
+def measure(func, repeat, warmup=1, setup=None):
+    """
+    Tempos de `repeat` execuções (após `warmup`) e o pico de memória
+    alocada, medido em uma execução à parte com tracemalloc (que deixaria
+    os tempos mais lentos).
+
+    `func` recebe o índice da execução, para variar filtros e chaves.
+    """
+    for i in range(warmup):
+        if setup:
+            setup()
+        func(i)
+    timings = []
+    for i in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        func(warmup + i)
+        timings.append(time.perf_counter() - started)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(warmup + repeat)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {**summarize(timings), 'peak_bytes': int(peak)}
+
+
+class DashClient:
+    """Dispara callbacks do app pelo endpoint do Dash, como o navegador faria."""
+
+    def __init__(self, dash_app):
+        self.client = dash_app.server.test_client()
+
+    def call(self, outputs, inputs, state=(), changed=None):
+        """
+        `outputs`, `inputs` e `state` são tuplas (id, propriedade[, valor]).
+        Retorna {id: {propriedade: valor}}, ou None quando o callback não atualiza nada.
+        """
+        spec = [{'id': id_, 'property': prop} for id_, prop in outputs]
+        if len(outputs) == 1:
+            output, spec = f'{outputs[0][0]}.{outputs[0][1]}', spec[0]
+        else:
+            output = '..' + '...'.join(f'{id_}.{prop}' for id_, prop in outputs) + '..'
+        changed = changed or inputs[0]
+        response = self.client.post('/_dash-update-component', json={
+            'output': output,
+            'outputs': spec,
+            'inputs': [{'id': id_, 'property': prop, 'value': value} for id_, prop, value in inputs],
+            'state': [{'id': id_, 'property': prop, 'value': value} for id_, prop, value in state],
+            'changedPropIds': [f'{changed[0]}.{changed[1]}'],
+        })
+        if response.status_code == 204:
+            return None
+        if response.status_code != 200:
+            raise RuntimeError(f'{output}: HTTP {response.status_code}: {response.get_data(as_text=True)[:500]}')
+        return response.get_json()['response']
+
+
+def _filters(i):
+    return FILTERS[i % len(FILTERS)]
+
+
+def bench_data(path, repeat):
+    from utils.data_processor import load_data, process_data
+
+    raw = load_data(path, snapshot=False)
+    load_data(path, snapshot=True)  # gera o snapshot antes de medir a leitura
+    return {
+        'data.load_csv': measure(lambda i: load_data(path, snapshot=False), repeat, warmup=0),
+        'data.load_snapshot': measure(lambda i: load_data(path, snapshot=True), repeat),
+        'data.process_data': measure(lambda i: process_data(raw), repeat),
+    }, process_data(raw)
+
+
+def bench_analytics(df, repeat):
+    from utils import analytics
+
+    functions = [
+        'calculate_kpis', 'get_sales_evolution', 'get_sales_by_category', 'get_top_products',
+        'get_region_heatmap_data', 'get_daily_sales', 'get_trend_analysis', 'get_sales_forecast',
+    ]
+    return {
+        f'analytics.{name}': measure(lambda i, f=getattr(analytics, name): f(df), repeat)
+        for name in functions
+    }
+
+
+def bench_cache(df, repeat):
+    import fakeredis
+    from utils.cache import LocalCache, ResultCache
+
+    # Um resultado típico guardado no cache: a série diária de receita, em JSON
+    daily = df.groupby(df['data'].dt.date.astype(str))['receita'].sum()
+    value = {'x': daily.index.tolist(), 'y': daily.tolist()}
+    cache = ResultCache(fakeredis.FakeRedis(), LocalCache())
+    cache.get_or_compute('bench', lambda: value)
+    keys = itertools.count()
+    return {
+        # Chave nova a cada execução: calcula, codifica, comprime (lz4) e grava nos dois níveis
+        'cache.set': measure(lambda i: cache.get_or_compute(f'bench:{next(keys)}', lambda: value), repeat),
+        # Sem o L1: descomprime e decodifica o JSON vindo do Redis
+        'cache.get_redis': measure(lambda i: cache.get_or_compute('bench', lambda: value), repeat, setup=cache.local.clear),
+        'cache.get_l1': measure(lambda i: cache.get_or_compute('bench', lambda: value), repeat),
+    }
+
+
+def bench_callbacks(repeat):
+    started = time.perf_counter()
+    import app as dashboard
+    startup = time.perf_counter() - started
+    client = DashClient(dashboard.app)
+
+    def filtered(i):
+        filters = _filters(i)
+        response = client.call(
+            [('filtered-data-store', 'data')],
+            [
+                ('date-range', 'start_date', filters['start_date']),
+                ('date-range', 'end_date', filters['end_date']),
+                ('category-filter', 'value', filters['category']),
+                ('region-filter', 'value', filters['region']),
+                ('dataset-version', 'data', {'version': dashboard.data_source.version}),
+            ],
+        )
+        return response['filtered-data-store']['data']
+
+    handles = [filtered(i) for i in range(len(FILTERS))]
+
+    def dashboard_update(i):
+        client.call(
+            [
+                ('kpi-cards', 'children'), ('sales-evolution-chart', 'figure'),
+                ('category-sales-chart', 'figure'), ('top-products-chart', 'figure'),
+                ('region-heatmap', 'figure'), ('trend-analysis-chart', 'figure'),
+                ('sales-forecast-chart', 'figure'),
+            ],
+            [('filtered-data-store', 'data', handles[i % len(handles)])],
+        )
+
+    def table(i):
+        client.call(
+            [('data-table', 'data'), ('data-table', 'page_count')],
+            [
+                ('filtered-data-store', 'data', handles[i % len(handles)]),
+                ('data-table', 'page_current', i % 5),
+                ('data-table', 'page_size', 10),
+                ('data-table', 'sort_by', [{'column_id': 'receita', 'direction': 'desc'}] if i % 2 else []),
+                ('data-table', 'filter_query', ''),
+            ],
+        )
+
+    def poll(i):
+        client.call(
+            [('dataset-version', 'data'), ('date-range', 'end_date')],
+            [('dataset-poll', 'n_intervals', i)],
+            state=[
+                ('dataset-version', 'data', {'version': dashboard.data_source.version, 'max_date': ''}),
+                ('date-range', 'end_date', None),
+            ],
+        )
+
+    def export(i):
+        outputs = [
+            ('export-job', 'data'), ('export-poll', 'disabled'), ('export-progress', 'value'),
+            ('export-progress', 'label'), ('export-status', 'children'), ('export-download', 'data'),
+        ]
+        state = [('export-format', 'value', 'csv'), ('filtered-data-store', 'data', handles[1])]
+        job = client.call(outputs, [('export-button', 'n_clicks', i + 1), ('export-poll', 'n_intervals', 0)],
+                          state=state + [('export-job', 'data', None)])['export-job']['data']
+        while True:
+            response = client.call(outputs, [('export-button', 'n_clicks', i + 1), ('export-poll', 'n_intervals', 1)],
+                                   state=state + [('export-job', 'data', job)], changed=('export-poll', 'n_intervals'))
+            if 'export-download' in response:
+                return
+            if response['export-poll']['disabled']:
+                raise RuntimeError(response['export-status']['children'])
+            time.sleep(0.005)
+
+    results = {'app.startup': {**summarize([startup]), 'peak_bytes': None}}
+    results['app.update_filtered_data'] = measure(filtered, repeat)
+    results['app.update_dashboard'] = measure(dashboard_update, repeat)
+    results['app.update_data_table'] = measure(table, repeat)
+    results['app.poll_dataset_version'] = measure(poll, repeat)
+    results['app.export_data_csv'] = measure(export, max(1, repeat // 2))
+    return results
+
+
+def run_size(path, repeat):
+    """Mede todos os casos para um dataset (executado no processo filho)."""
+    cases, df = bench_data(path, repeat)
+    cases.update(bench_analytics(df, repeat))
+    cases.update(bench_cache(df, repeat))
+    rows = len(df)
+    del df
+    gc.collect()
+    cases.update(bench_callbacks(repeat))
+    return {
+        'rows': rows,
+        'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'cases': cases,
+    }
+
+
+# --- Orquestração e comparação ----------------------------------------------
+
+def _metadata(repeat, seed):
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': repeat,
+        'seed': seed,
+    }
+
+
+def run(sizes, repeat, data_dir, seed, output=None, workers=None):
+    results = {'meta': _metadata(repeat, seed), 'sizes': {}}
+    for label in sizes:
+        path = dataset_path(data_dir, label, seed, workers)
+        print(f"[{label}] medindo...", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, 'resultado.json')
+            env = dict(os.environ, DATA_PATH=path, INGEST_PATH='', DATA_SOURCE='memory', EXPORT_DIR=os.path.join(tmp, 'exports'))
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '_size', path, '--repeat', str(repeat), '--output', out],
+                cwd=ROOT, env=env, check=True,
+            )
+            with open(out) as f:
+                results['sizes'][label] = json.load(f)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def compare(baseline, current, threshold=0.15, min_seconds=0.001, metric='p50'):
+    """
+    Compara dois resultados; retorna as linhas da comparação e se houve regressão.
+
+    Um caso regride quando o tempo (`metric`) cresce mais que `threshold`
+    (fração) e mais que `min_seconds` em valor absoluto, ou quando o pico
+    de memória cresce mais que `threshold`.
+    """
+    rows, regressed = [], False
+    for label, size in current['sizes'].items():
+        base_size = baseline.get('sizes', {}).get(label)
+        if base_size is None:
+            continue
+        for case, stats in size['cases'].items():
+            base = base_size['cases'].get(case)
+            if base is None:
+                continue
+            ratio = stats[metric] / base[metric] if base[metric] else float('inf')
+            slower = ratio > 1 + threshold and stats[metric] - base[metric] > min_seconds
+            peak, base_peak = stats.get('peak_bytes'), base.get('peak_bytes')
+            memory_ratio = peak / base_peak if peak is not None and base_peak else None
+            heavier = memory_ratio is not None and memory_ratio > 1 + threshold and peak - base_peak > 1024 * 1024
+            flag = 'REGRESSÃO' if slower or heavier else ('melhora' if ratio < 1 - threshold else '')
+            regressed |= slower or heavier
+            rows.append((label, case, base[metric], stats[metric], ratio, memory_ratio, flag))
+    return rows, regressed
+
+
+def print_results(results):
+    for label, size in results['sizes'].items():
+        print(f"\n{label} ({size['rows']:,} linhas, RSS máximo {size['max_rss_bytes'] / 2**20:,.0f} MB)")
+        print(f"  {'caso':<32}{'p50 ms':>12}{'p90 ms':>12}{'p99 ms':>12}{'pico MB':>10}")
+        for case, stats in size['cases'].items():
+            peak = '' if stats['peak_bytes'] is None else f"{stats['peak_bytes'] / 2**20:.1f}"
+            print(f"  {case:<32}{stats['p50'] * 1000:>12.2f}{stats['p90'] * 1000:>12.2f}{stats['p99'] * 1000:>12.2f}{peak:>10}")
+
+
+def print_comparison(rows):
+    print(f"\n  {'tamanho':<8}{'caso':<32}{'base ms':>10}{'atual ms':>10}{'razão':>8}{'memória':>9}  ")
+    for label, case, base, current, ratio, memory_ratio, flag in rows:
+        memory = '' if memory_ratio is None else f'{memory_ratio:.2f}x'
+        print(f"  {label:<8}{case:<32}{base * 1000:>10.2f}{current * 1000:>10.2f}{ratio:>7.2f}x{memory:>9}  {flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='executa a suíte')
+    run_parser.add_argument('--sizes', nargs='+', default=['100k', '1M'], choices=list(SIZES))
+    run_parser.add_argument('--repeat', type=int, default=10)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'sales-bench-data'))
+    run_parser.add_argument('--workers', type=int, default=None, help='processos para gerar os datasets')
+    run_parser.add_argument('--output', help='grava o resultado em JSON')
+    run_parser.add_argument('--baseline', help='compara com um resultado salvo')
+    run_parser.add_argument('--threshold', type=float, default=0.15)
+
+    compare_parser = commands.add_parser('compare', help='compara dois resultados salvos')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.15)
+    compare_parser.add_argument('--metric', default='p50', choices=['min', 'mean', 'p50', 'p90', 'p99', 'max'])
+
+    size_parser = commands.add_parser('_size', help=argparse.SUPPRESS)
+    size_parser.add_argument('path')
+    size_parser.add_argument('--repeat', type=int, default=10)
+    size_parser.add_argument('--output', required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == '_size':
+        with open(args.output, 'w') as f:
+            json.dump(run_size(args.path, args.repeat), f)
+        return 0
+
+    if args.command == 'run':
+        current = run(args.sizes, args.repeat, args.data_dir, args.seed, args.output, args.workers)
+        print_results(current)
+        if not args.baseline:
+            return 0
+        baseline_path, threshold, metric = args.baseline, args.threshold, 'p50'
+    else:
+        with open(args.current) as f:
+            current = json.load(f)
+        baseline_path, threshold, metric = args.baseline, args.threshold, args.metric
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    rows, regressed = compare(baseline, current, threshold=threshold, metric=metric)
+    print_comparison(rows)
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
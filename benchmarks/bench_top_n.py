@@ -0,0 +1,125 @@
+"""
+Compara o top N de produtos por modo, em seleções típicas do dashboard:
+
+- `varredura`: como era (máscara sobre a tabela lateral + `nlargest`);
+- `exato`: índice célula → dia + `argpartition`;
+- `aprox-K`: resumos de K produtos por (mês, célula).
+
+Mostra o tempo por consulta, a memória das estruturas e, no modo
+aproximado, o acerto dos N produtos e o erro máximo informado em relação à
+receita do N-ésimo. Use um catálogo grande para ver a diferença:
+
+    python data/generate_sample_data.py --rows 2000000 --products 200000 --output /tmp/vendas_sku.csv
+    python benchmarks/bench_top_n.py /tmp/vendas_sku.csv --sketch-sizes 64 256
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _best(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def _index_bytes(index):
+    arrays = [index._dia, index._produto, index._receita, index._linhas]
+    if index.sketch_size:
+        arrays = [index._items, index._counts, index._floor]
+    return sum(array.nbytes for array in arrays)
+
+
+def main(csv_path, n, sketch_sizes):
+    import pandas as pd
+    from utils.cube import build_cube
+    from utils.data_processor import load_data, process_data
+    from utils.top_n import top_n_indices
+
+    df = process_data(load_data(csv_path))
+    start_date, end_date = (str(d.date()) for d in (df['data'].min(), df['data'].max()))
+    middle = df['data'].min() + (df['data'].max() - df['data'].min()) / 2
+    queries = {
+        'tudo': {'start_date': start_date, 'end_date': end_date, 'category': 'all', 'region': 'all'},
+        '1 categoria, 6 meses': {
+            'start_date': str(middle.date()), 'end_date': str((middle + pd.DateOffset(months=6)).date()),
+            'category': ['Livros'], 'region': 'all',
+        },
+        '2 categorias × 1 região': {
+            'start_date': start_date, 'end_date': end_date, 'category': ['Livros', 'Roupas'], 'region': ['Sul'],
+        },
+    }
+
+    modes = {}
+    started = time.perf_counter()
+    modes['exato'] = build_cube(df)
+    build = {'exato': time.perf_counter() - started}
+    for size in sketch_sizes:
+        started = time.perf_counter()
+        modes[f'aprox-{size}'] = build_cube(df, sketch_size=size)
+        build[f'aprox-{size}'] = time.perf_counter() - started
+    exact = modes['exato']
+    print(f"{len(df):,} linhas, {len(exact.produtos):,} produtos, "
+          f"{len(exact.tabela_produtos):,} entradas (dia, categoria, região, produto)\n")
+    print(f"{'modo':<12}{'construção s':>14}{'estrutura MB':>14}")
+    for mode, cube in modes.items():
+        print(f"{mode:<12}{build[mode]:>14.2f}{_index_bytes(cube.product_index) / 1e6:>14.1f}")
+
+    def scan(filters):
+        # Como era: máscara sobre a tabela lateral + nlargest do pandas
+        cube_slice = exact.select(filters)
+        tabela = exact.tabela_produtos
+        dias = tabela['dia'].to_numpy()
+        tabela = tabela.iloc[np.searchsorted(dias, cube_slice.lo):np.searchsorted(dias, cube_slice.hi)]
+        mask = (
+            np.isin(tabela['categoria'].to_numpy(), cube_slice.cat_idx) &
+            np.isin(tabela['regiao'].to_numpy(), cube_slice.reg_idx)
+        )
+        produtos = tabela['produto'].to_numpy()[mask]
+        receita = np.bincount(produtos, weights=tabela['receita'].to_numpy()[mask], minlength=len(exact.produtos))
+        linhas = np.bincount(produtos, weights=tabela['linhas'].to_numpy()[mask], minlength=len(exact.produtos))
+        series = pd.Series(receita[linhas > 0], index=np.flatnonzero(linhas > 0))
+        return series.nlargest(n).sort_values(ascending=True).index.to_numpy()[::-1]
+
+    def indexed(cube, filters):
+        receita, linhas, error = cube.select(filters)._product_totals()
+        return top_n_indices(receita, n, linhas > 0), receita, error
+
+    for label, filters in queries.items():
+        print(f"\n{label}")
+        print(f"{'modo':<12}{'ms':>10}{'acerto':>10}{'erro/N-ésimo':>14}")
+        elapsed, _ = _best(lambda: scan(filters))
+        print(f"{'varredura':<12}{elapsed * 1000:>10.1f}")
+        expected, expected_receita, _ = indexed(exact, filters)
+        for mode, cube in modes.items():
+            elapsed, (top, _, error) = _best(lambda: indexed(cube, filters))
+            recall = len(set(top) & set(expected)) / max(len(expected), 1)
+            relative = error / expected_receita[expected[-1]] if len(expected) else 0.0
+            print(f"{mode:<12}{elapsed * 1000:>10.1f}{recall:>10.0%}{relative:>14.1%}")
+
+    # Ingestão em fluxo: custo de anexar um lote de vendas do último dia em cada modo
+    last_day = df[df['data'].dt.normalize() == df['data'].max().normalize()]
+    batch = last_day.sample(min(len(last_day), 5000), replace=True, random_state=0).sort_values('data')
+    print(f"\nanexar {len(batch):,} linhas")
+    for mode, cube in modes.items():
+        started = time.perf_counter()
+        cube.appended(batch)
+        print(f"{mode:<12}{(time.perf_counter() - started) * 1000:>10.1f} ms")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', default='data/sales_data.csv')
+    parser.add_argument('-n', type=int, default=10)
+    parser.add_argument('--sketch-sizes', type=int, nargs='*', default=[64, 256])
+    args = parser.parse_args()
+    main(args.csv, args.n, args.sketch_sizes)
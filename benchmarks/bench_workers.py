@@ -0,0 +1,84 @@
+"""
+Compara a memória por worker do gunicorn com e sem o carregamento
+compartilhado dos dados (`GUNICORN_PRELOAD`).
+
+Para cada modo, sobe o gunicorn com `gunicorn.conf.py`, espera os workers
+responderem e lê RSS, PSS e USS de cada processo:
+
+    python benchmarks/bench_workers.py --workers 4
+
+O RSS conta as páginas compartilhadas em todos os processos; o PSS as divide
+entre eles e é o número que soma o consumo real do container.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port, workers, timeout):
+    """Espera até que `workers` requisições seguidas sejam respondidas."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            for _ in range(workers * 4):
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/_dash-layout', timeout=30).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError("gunicorn não ficou pronto a tempo")
+
+
+def run(preload, workers, timeout=300):
+    from utils.process_memory import child_pids, process_memory
+
+    port = _free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD=str(preload), GUNICORN_WORKERS=str(workers))
+    started = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:server'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(port, workers, timeout)
+        elapsed = time.perf_counter() - started
+        return elapsed, process_memory(master.pid), [process_memory(pid) for pid in child_pids(master.pid)]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    print(f"{'modo':<14}{'processo':<12}{'RSS (MB)':>10}{'PSS (MB)':>10}{'USS (MB)':>10}")
+    for preload in (False, True):
+        mode = 'compartilhado' if preload else 'por worker'
+        elapsed, master, workers = run(preload, args.workers)
+        processes = [('master', master)] + [(f'worker {i}', m) for i, m in enumerate(workers)]
+        for name, memory in processes:
+            if memory is None:
+                continue
+            print(f"{mode:<14}{name:<12}{memory['rss'] / mb:>10.0f}{memory['pss'] / mb:>10.0f}{memory['uss'] / mb:>10.0f}")
+        total = sum(m['pss'] for _, m in processes if m is not None)
+        print(f"{mode:<14}{'total PSS':<12}{'':>10}{total / mb:>10.0f}{'':>10}   pronto em {elapsed:.1f}s\n")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
@@ -1,49 +1,94 @@
 
-import plotly.express as px
+import numpy as np
 import plotly.graph_objects as go
 
+from config import settings
+from utils.downsample import lttb
+
+# `plotly.express` (e o pandas que ele carrega) é importado dentro dos gráficos
+# que o usam: a importação do app não paga por ele, só a primeira figura.
+
+
+def _series_trace(x, y, max_points=None, **kwargs):
+    """
+    Traço de série temporal com custo de renderização limitado.
+
+    Séries acima de `max_points` são reduzidas por LTTB (preserva picos e
+    formato); acima de CHART_WEBGL_THRESHOLD pontos o traço usa WebGL
+    (`Scattergl`). Os valores são arredondados para encurtar o JSON da figura.
+    `max_points=0` desliga a redução.
+    """
+    max_points = settings.CHART_MAX_POINTS if max_points is None else max_points
+    x = np.asarray(x)
+    y = np.round(np.asarray(y, dtype=np.float64), settings.CHART_FLOAT_DECIMALS)
+    if max_points and len(x) > max_points:
+        x, y = lttb(x, y, max_points)
+    trace = go.Scattergl if len(x) > settings.CHART_WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+def _line_trace(x, y, **kwargs):
+    """Reta (tendência/previsão linear): só as extremidades são necessárias para desenhá-la."""
+    x = np.asarray(x).ravel()
+    y = np.round(np.asarray(y, dtype=np.float64), settings.CHART_FLOAT_DECIMALS)
+    if len(x) > 2:
+        x, y = x[[0, -1]], y[[0, -1]]
+    return go.Scatter(x=x, y=y, mode='lines', **kwargs)
+
 def create_sales_evolution_chart(sales_evolution):
     """Cria o gráfico de evolução de vendas."""
+    import plotly.express as px
+
     fig = px.line(sales_evolution, x='data', y='receita', title='Evolução de Vendas', labels={'data': 'Mês', 'receita': 'Receita'})
     fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
     return fig
 
 def create_category_sales_chart(category_sales):
     """Cria o gráfico de vendas por categoria."""
+    import plotly.express as px
+
     fig = px.pie(category_sales, names='categoria', values='receita', title='Vendas por Categoria')
     fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
     return fig
 
 def create_top_products_chart(top_products):
-    """Cria o gráfico de top 10 produtos."""
-    fig = px.bar(top_products, x='receita', y='produto', orientation='h', title='Top 10 Produtos por Receita')
+    """Cria o gráfico de top N produtos (com o erro máximo no título quando aproximado)."""
+    import plotly.express as px
+
+    title = f'Top {settings.TOP_N} Produtos por Receita'
+    if 'erro_max' in top_products.columns and len(top_products):
+        title += f" (aproximado, erro ≤ {top_products['erro_max'].iloc[0]:,.0f})"
+    fig = px.bar(top_products, x='receita', y='produto', orientation='h', title=title)
     fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
     return fig
 
 def create_region_heatmap(region_heatmap_data):
     """Cria o mapa de calor de vendas por região."""
+    import plotly.express as px
+
     fig = px.imshow(region_heatmap_data, title='Mapa de Calor: Receita por Região e Categoria', labels=dict(x="Categoria", y="Região", color="Receita"))
     fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
     return fig
 
-def create_trend_analysis_chart(daily_sales, trend_line):
+def create_trend_analysis_chart(daily_sales, trend_line, max_points=None):
     """Cria o gráfico de análise de tendência."""
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=daily_sales['dias_desde_inicio'], y=daily_sales['receita'], mode='markers', name='Vendas Diárias'))
+    fig.add_trace(_series_trace(daily_sales['dias_desde_inicio'], daily_sales['receita'], max_points, mode='markers', name='Vendas Diárias'))
     if trend_line is not None:
-        fig.add_trace(go.Scatter(x=daily_sales['dias_desde_inicio'], y=trend_line, mode='lines', name='Linha de Tendência', line=dict(color='red')))
+        fig.add_trace(_line_trace(daily_sales['dias_desde_inicio'], trend_line, name='Linha de Tendência', line=dict(color='red')))
     fig.update_layout(title='Análise de Tendência de Vendas', xaxis_title='Dias desde o Início do Período', yaxis_title='Receita')
     fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
     return fig
 
-def create_sales_forecast_chart(daily_sales, trend_line, future_days, future_sales):
+def create_sales_forecast_chart(daily_sales, trend_line, future_days, future_sales, max_points=None):
     """Cria o gráfico de previsão de vendas."""
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=daily_sales['dias_desde_inicio'], y=daily_sales['receita'], mode='markers', name='Vendas Diárias'))
+    fig.add_trace(_series_trace(daily_sales['dias_desde_inicio'], daily_sales['receita'], max_points, mode='markers', name='Vendas Diárias'))
+    # O modelo sazonal não é uma reta: as curvas vão inteiras (reduzidas por LTTB se longas)
     if trend_line is not None:
-        fig.add_trace(go.Scatter(x=daily_sales['dias_desde_inicio'], y=trend_line, mode='lines', name='Linha de Tendência', line=dict(color='red')))
+        fig.add_trace(_series_trace(daily_sales['dias_desde_inicio'], trend_line, max_points, mode='lines', name='Modelo Ajustado', line=dict(color='red')))
     if future_days is not None:
-        fig.add_trace(go.Scatter(x=future_days.flatten(), y=future_sales, mode='lines', name='Previsão (30 dias)', line=dict(color='green', dash='dash')))
+        fig.add_trace(_series_trace(np.asarray(future_days).ravel(), future_sales, max_points, mode='lines', name='Previsão (30 dias)', line=dict(color='green', dash='dash')))
     fig.update_layout(title='Previsão de Vendas (Próximos 30 dias)', xaxis_title='Dias desde o Início do Período', yaxis_title='Receita')
     fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
     return fig
@@ -1,32 +1,32 @@
 
 from dash import dcc
-import pandas as pd
 
-def create_date_range_filter(df):
+
+def create_date_range_filter(start_date, end_date):
     """Cria o filtro de período."""
     return dcc.DatePickerRange(
         id='date-range',
-        start_date=df['data'].min().date(),
-        end_date=df['data'].max().date(),
+        start_date=start_date,
+        end_date=end_date,
         display_format='DD/MM/YYYY'
     )
 
-def create_category_filter(df):
-    """Cria o filtro de categoria."""
+def create_category_filter(categorias):
+    """Cria o filtro de categoria (seleção múltipla; vazio = todas)."""
     return dcc.Dropdown(
         id='category-filter',
-        options=[{'label': 'Todas', 'value': 'all'}] + 
-                [{'label': cat, 'value': cat} for cat in df['categoria'].unique()],
-        value='all',
-        clearable=False
+        options=[{'label': cat, 'value': cat} for cat in categorias],
+        value=[],
+        multi=True,
+        placeholder='Todas'
     )
 
-def create_region_filter(df):
-    """Cria o filtro de região."""
+def create_region_filter(regioes):
+    """Cria o filtro de região (seleção múltipla; vazio = todas)."""
     return dcc.Dropdown(
         id='region-filter',
-        options=[{'label': 'Todas', 'value': 'all'}] + 
-                [{'label': reg, 'value': reg} for reg in df['regiao'].unique()],
-        value='all',
-        clearable=False
+        options=[{'label': reg, 'value': reg} for reg in regioes],
+        value=[],
+        multi=True,
+        placeholder='Todas'
     )
@@ -1,15 +1,51 @@
 
 from dash import dash_table
 
-def create_data_table(df):
-    """Cria uma tabela de dados interativa."""
+TABLE_COLUMN_TYPES = ('datetime', 'numeric', 'text')
+
+
+def column_type(dtype, name=None):
+    """
+    Tipo da coluna `name` na DataTable; tipos já resolvidos (metadados da
+    partida rápida) passam direto. Colunas de mês são exibidas como texto
+    'AAAA-MM', embora guardadas como código inteiro.
+    """
+    if isinstance(dtype, str) and dtype in TABLE_COLUMN_TYPES:
+        return dtype
+    import pandas as pd
+
+    from utils.schema import MONTH_COLUMNS
+
+    if name in MONTH_COLUMNS:
+        return 'text'
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+        return 'numeric'
+    return 'text'
+
+
+def create_data_table(columns, page_size=10):
+    """
+    Cria uma tabela de dados interativa com paginação, ordenação e filtro no servidor.
+
+    `columns` mapeia o nome de cada coluna para o seu dtype (ou o tipo da
+    tabela, ver `column_type`); os registros de cada página são enviados por
+    callback.
+    """
     return dash_table.DataTable(
         id='data-table',
-        columns=[{"name": i, "id": i} for i in df.columns],
-        data=df.to_dict('records'),
-        page_size=10,
-        sort_action="native",
-        filter_action="native",
+        columns=[{"name": name, "id": name, "type": column_type(dtype, name)} for name, dtype in columns.items()],
+        data=[],
+        page_current=0,
+        page_size=page_size,
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
         style_table={'overflowX': 'auto'},
         style_cell={
             'height': 'auto',
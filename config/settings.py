@@ -1,5 +1,7 @@
 
 import os
+import tempfile
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,3 +10,98 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 REDIS_URL = os.getenv("REDIS_URL")
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 PORT = int(os.getenv("PORT", 8050))
+
+# Registro de fatias filtradas mantidas no servidor
+SLICE_REGISTRY_MAX_ENTRIES = int(os.getenv("SLICE_REGISTRY_MAX_ENTRIES", 32))
+SLICE_REGISTRY_MAX_BYTES = int(os.getenv("SLICE_REGISTRY_MAX_BYTES", 64 * 1024 * 1024))
+
+# Snapshot colunar (Arrow IPC) gerado a partir do CSV de vendas
+DATA_SNAPSHOT = os.getenv("DATA_SNAPSHOT", "True").lower() in ("true", "1", "t")
+DATA_SNAPSHOT_VERIFY_HASH = os.getenv("DATA_SNAPSHOT_VERIFY_HASH", "False").lower() in ("true", "1", "t")
+
+# Cache (L1 em processo + Redis)
+CACHE_TIMEOUT = int(os.getenv("CACHE_TIMEOUT", 3600))
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "lz4").lower() or None
+if CACHE_COMPRESSION == "none":
+    CACHE_COMPRESSION = None
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+
+# Gunicorn: com preload, o master carrega os dados uma vez e os workers os compartilham
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", 4))
+GUNICORN_PRELOAD = os.getenv("GUNICORN_PRELOAD", "True").lower() in ("true", "1", "t")
+GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+
+# Fonte de dados: "memory" (CSV/snapshot em memória) ou "sql" (banco em DATABASE_URL)
+DATA_SOURCE = os.getenv("DATA_SOURCE", "memory").lower()
+DATA_PATH = os.getenv("DATA_PATH", "data/sales_data.csv")
+SALES_TABLE = os.getenv("SALES_TABLE", "vendas")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Intervalo mínimo (s) entre leituras da versão da tabela (linhas e última data)
+SQL_VERSION_TTL = float(os.getenv("SQL_VERSION_TTL", 30))
+
+# Ingestão incremental: arquivo CSV/JSONL acompanhado pelos workers (vazio = desabilitada)
+INGEST_PATH = os.getenv("INGEST_PATH", "")
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", 0.5))
+LIVE_REFRESH_INTERVAL_MS = int(os.getenv("LIVE_REFRESH_INTERVAL_MS", 1000))
+
+# Gráficos de séries longas: pontos por traço (~largura em pixels), limiar do WebGL e casas decimais
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", 1500))
+CHART_WEBGL_THRESHOLD = int(os.getenv("CHART_WEBGL_THRESHOLD", 1000))
+CHART_FLOAT_DECIMALS = int(os.getenv("CHART_FLOAT_DECIMALS", 2))
+
+# Exportação em segundo plano: diretório dos arquivos, threads por worker, linhas por bloco e validade dos arquivos
+EXPORT_DIR = os.getenv("EXPORT_DIR", "") or os.path.join(tempfile.gettempdir(), "sales-dashboard-exports")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 50_000))
+EXPORT_TTL_SECONDS = int(os.getenv("EXPORT_TTL_SECONDS", 3600))
+EXPORT_POLL_INTERVAL_MS = int(os.getenv("EXPORT_POLL_INTERVAL_MS", 500))
+
+# Métricas em /metrics (formato Prometheus); com vários workers, METRICS_DIR guarda o snapshot de cada um
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "t")
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+# Perfil por amostragem dos callbacks acima do limite (0 = desligado)
+METRICS_PROFILE_SLOW_MS = int(os.getenv("METRICS_PROFILE_SLOW_MS", 0))
+METRICS_PROFILE_INTERVAL_MS = float(os.getenv("METRICS_PROFILE_INTERVAL_MS", 5))
+METRICS_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR", "") or os.path.join(tempfile.gettempdir(), "sales-dashboard-profiles")
+
+# Cache de resultados do dashboard (L1 + Redis) com computação única por chave entre threads e workers
+RESULT_CACHE_L1_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_L1_MAX_ENTRIES", 128))
+RESULT_CACHE_L1_MAX_BYTES = int(os.getenv("RESULT_CACHE_L1_MAX_BYTES", 128 * 1024 * 1024))
+SINGLE_FLIGHT_LOCK_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_LOCK_TIMEOUT", 30))
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", 30))
+# Pré-cálculo da visão padrão e das combinações categoria × região na partida e a cada nova versão dos dados
+CACHE_WARMING = os.getenv("CACHE_WARMING", "True").lower() in ("true", "1", "t")
+CACHE_WARM_INTERVAL = float(os.getenv("CACHE_WARM_INTERVAL", 5))
+# Segundos sem mudança na versão dos dados antes de reaquecer (evita aquecer a cada lote ingerido)
+CACHE_WARM_DEBOUNCE = float(os.getenv("CACHE_WARM_DEBOUNCE", 30))
+
+# Previsão sazonal (tendência + dia da semana + harmônicos anuais) ajustada em lote a cada carga dos dados
+FORECAST_SEASONAL = os.getenv("FORECAST_SEASONAL", "True").lower() in ("true", "1", "t")
+FORECAST_ANNUAL_HARMONICS = int(os.getenv("FORECAST_ANNUAL_HARMONICS", 3))
+# Intervalo mínimo (s) entre reajustes do modelo por vendas ingeridas
+FORECAST_REFIT_INTERVAL = float(os.getenv("FORECAST_REFIT_INTERVAL", 60))
+
+# Top N de produtos: 'exact' (totais exatos por célula) ou 'approximate' (resumos de tamanho fixo por mês e célula)
+TOP_N = int(os.getenv("TOP_N", 10))
+TOP_N_MODE = os.getenv("TOP_N_MODE", "exact")
+TOP_N_SKETCH_SIZE = int(os.getenv("TOP_N_SKETCH_SIZE", 256))
+
+# Agregação no navegador: KPIs, evolução, categorias e mapa de calor recalculados em callbacks clientside
+# a partir de um payload mês × categoria × região por janela de datas (acima do limite, volta ao servidor)
+CLIENTSIDE_AGGREGATION = os.getenv("CLIENTSIDE_AGGREGATION", "False").lower() in ("true", "1", "t")
+CLIENTSIDE_MAX_PAYLOAD_BYTES = int(os.getenv("CLIENTSIDE_MAX_PAYLOAD_BYTES", 512 * 1024))
+
+# Threads da construção do cubo na carga dos dados (partições mensais; o NumPy libera o GIL); vazio = núcleos da máquina
+AGGREGATION_WORKERS = int(os.getenv("AGGREGATION_WORKERS", "") or os.cpu_count() or 1)
+
+# Partida rápida: dados carregados em segundo plano (GET /ready responde 200 quando terminam), filtros e datas do
+# layout lidos dos metadados gravados na última carga e Redis conectado em segundo plano. STARTUP_WAIT_TIMEOUT limita
+# quanto um callback espera pelos dados (abaixo do timeout do gunicorn); depois disso a resposta é 503
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "False").lower() in ("true", "1", "t")
+STARTUP_METADATA_PATH = os.getenv("STARTUP_METADATA_PATH") or os.path.splitext(DATA_PATH)[0] + ".meta.json"
+STARTUP_WAIT_TIMEOUT = float(os.getenv("STARTUP_WAIT_TIMEOUT", 20))
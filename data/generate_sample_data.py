@@ -1,27 +1,62 @@
+"""
+Gera dados sintéticos de vendas.
+
+    python data/generate_sample_data.py                                  # 500 mil linhas em data/sales_data.csv
+    python data/generate_sample_data.py --rows 50000000 --workers 8 --output /dados/vendas_50M.csv
+    python data/generate_sample_data.py --rows 10000000 --format parquet --output /dados/vendas_10M
+
+Os dados são gerados em blocos de tamanho fixo por um pool de processos,
+cada bloco com o seu próprio gerador aleatório: a memória não cresce com o
+número de linhas e a saída é a mesma para qualquer número de processos.
+"""
+import argparse
+import os
+import sys
+import time
+
 import pandas as pd
-import numpy as np
-
-def generate_data(n_records=500000):
-    """Gera dados sintéticos de vendas."""
-    np.random.seed(42)
-    dates = pd.to_datetime(pd.date_range(start='2022-01-01', periods=n_records, freq='h'))
-    
-    df = pd.DataFrame({
-        'data': dates,
-        'valor': np.random.exponential(scale=100, size=n_records) + 50,
-        'quantidade': np.random.poisson(lam=5, size=n_records) + 1,
-        'categoria': np.random.choice(['Eletrônicos', 'Roupas', 'Alimentos', 'Livros', 'Móveis', 'Esportes', 'Brinquedos', 'Automotivo'], n_records),
-        'regiao': np.random.choice(['Norte', 'Sul', 'Leste', 'Oeste', 'Centro', 'Nordeste', 'Sudeste'], n_records),
-        'produto': np.random.choice([f'Produto {i}' for i in range(1, 101)], n_records)
-    })
-    
-    df['receita'] = df['valor'] * df['quantidade']
-    df['mes'] = df['data'].dt.to_period('M').astype(str)
-    df['ano'] = df['data'].dt.year
-    
-    return df
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sample_data import DEFAULT_OPTIONS, generate_chunk, write_dataset  # noqa: E402
+
+
+def generate_data(n_records=500000, seed=42, chunk_rows=1_000_000, **options):
+    """Gera dados sintéticos de vendas em memória (para volumes que cabem nela)."""
+    chunks = [
+        generate_chunk(index, chunk_rows, n_records, seed, **options)
+        for index in range(-(-n_records // chunk_rows))
+    ]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--output', default='data/sales_data.csv')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=None, help='processos (padrão: todos os núcleos)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start', default=DEFAULT_OPTIONS['start'])
+    parser.add_argument('--end', default=DEFAULT_OPTIONS['end'], help='fim do período (exclusivo)')
+    parser.add_argument('--products', type=int, default=DEFAULT_OPTIONS['n_products'])
+    parser.add_argument('--regions', type=int, default=DEFAULT_OPTIONS['n_regions'])
+    parser.add_argument('--product-skew', type=float, default=DEFAULT_OPTIONS['product_skew'],
+                        help='expoente de Zipf da popularidade dos produtos (0 = uniforme)')
+    parser.add_argument('--seasonality', type=float, default=DEFAULT_OPTIONS['seasonality'],
+                        help='amplitude da sazonalidade anual e semanal (0 = uniforme)')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows = write_dataset(
+        args.output, args.rows,
+        chunk_rows=args.chunk_rows, workers=args.workers, seed=args.seed, output_format=args.format,
+        start=args.start, end=args.end, n_products=args.products, n_regions=args.regions,
+        product_skew=args.product_skew, seasonality=args.seasonality,
+    )
+    print(f"{rows} registros foram gerados e salvos em '{args.output}' em {time.perf_counter() - started:.1f} s")
+
 
 if __name__ == '__main__':
-    df = generate_data()
-    df.to_csv('data/sales_data.csv', index=False)
-    print(f"{len(df)} registros foram gerados e salvos em 'data/sales_data.csv'")
+    main()
@@ -0,0 +1,83 @@
+"""
+Configuração do gunicorn.
+
+Com `preload_app`, o master importa `app` uma única vez (snapshot mapeado,
+cubo e índices de filtro) e os workers são criados por fork, compartilhando
+essas páginas em vez de cada um carregar sua própria cópia. Um worker que
+morre ou é reciclado (`max_requests`) é substituído por outro fork do
+master, sem reprocessar os dados.
+
+Na partida rápida (`LAZY_STARTUP`), cada worker responde assim que sobe e
+carrega os dados em segundo plano; use sem preload. Com preload, o master
+termina a carga antes do fork, para os workers ainda compartilharem os dados.
+"""
+import gc
+import logging
+
+from config import settings
+from utils.process_memory import process_memory
+from utils.sql_source import dispose_engines
+
+bind = f"0.0.0.0:{settings.PORT}"
+workers = settings.GUNICORN_WORKERS
+preload_app = settings.GUNICORN_PRELOAD
+max_requests = settings.GUNICORN_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def _format_memory(memory):
+    if memory is None:
+        return "memória indisponível"
+    mb = 1024 * 1024
+    return f"RSS={memory['rss'] / mb:.0f}MB PSS={memory['pss'] / mb:.0f}MB USS={memory['uss'] / mb:.0f}MB"
+
+
+def on_starting(server):
+    # Snapshots de métricas de uma execução anterior não devem entrar nos totais
+    if settings.METRICS_DIR:
+        from utils.metrics import registry
+
+        registry.configure(settings.METRICS_DIR)
+        registry.clear_directory()
+
+
+def when_ready(server):
+    if preload_app:
+        import app
+        from utils.startup import DeferredSource
+
+        if isinstance(app.data_source, DeferredSource):
+            app.data_source.load()
+        # Move os objetos já carregados para fora do alcance do GC: as varreduras
+        # nos workers não tocam mais seus cabeçalhos e as páginas seguem compartilhadas.
+        gc.collect()
+        gc.freeze()
+    logger.info("Master pronto (%s)", _format_memory(process_memory()))
+
+
+def post_fork(server, worker):
+    # Conexões SQL abertas pelo master não podem ser compartilhadas entre processos
+    dispose_engines()
+
+
+def post_worker_init(worker):
+    # Threads não sobrevivem ao fork: cada worker inicia a sua ingestão incremental
+    # e o seu aquecimento de cache (o lock no Redis divide o trabalho entre eles)
+    import app
+
+    app.start_background_tasks()
+    worker.log.info("Worker %s iniciado (%s)", worker.pid, _format_memory(process_memory()))
+
+
+def worker_exit(server, worker):
+    # Grava as últimas métricas do worker antes de ele sair
+    from utils.metrics import registry
+
+    if settings.METRICS_ENABLED:
+        registry.flush()
+
+
+def child_exit(server, worker):
+    server.log.info("Worker %s encerrado; o substituto é um novo fork do master", worker.pid)
@@ -0,0 +1,38 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+
+CATEGORIAS = ('Eletrônicos', 'Roupas', 'Livros')
+REGIOES = ('Norte', 'Sul')
+
+
+def _sales(n, seed=0, start='2022-01-01', days=365, categorias=CATEGORIAS, regioes=REGIOES, produtos=20,
+           hourly=True, cents=True, zipf=False, rng=None):
+    """
+    Vendas sintéticas brutas (com `receita`), em ordem de data.
+
+    As datas caem em `days` dias a partir de `start`, com hora (`hourly`) ou
+    à meia-noite. Com `cents`, os preços são centavos exatos (o schema guarda
+    o dinheiro em float32); sem, seguem uma exponencial e ficam em float64.
+    `zipf` concentra a receita em poucos produtos. Passe `rng` para gerar
+    lotes seguidos do mesmo gerador (ex.: ingestão).
+    """
+    rng = np.random.default_rng(seed) if rng is None else rng
+    steps = days * 24 if hourly else days
+    weights = 1 / np.arange(1, produtos + 1) if zipf else None
+    df = pd.DataFrame({
+        'data': pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, steps, n)), unit='h' if hourly else 'D'),
+        'valor': rng.integers(1000, 50000, n) / 100 if cents else rng.exponential(100, n) + 50,
+        'quantidade': rng.integers(1, 10, n),
+        'categoria': rng.choice(list(categorias), n),
+        'regiao': rng.choice(list(regioes), n),
+        'produto': [f'Produto {i}' for i in rng.choice(produtos, n, p=None if weights is None else weights / weights.sum()) + 1],
+    })
+    return df.assign(receita=df['valor'] * df['quantidade'])
+
+
+@pytest.fixture(scope='session')
+def make_sales():
+    """Fábrica de vendas sintéticas: `make_sales(n, seed=0, start=..., days=..., ...)`."""
+    return _sales
@@ -0,0 +1,131 @@
+
+import json
+import threading
+import time
+
+import fakeredis
+import pytest
+from utils.cache import LocalCache, ResultCache, get_cache_key, pack_value, unpack_value
+
+
+def test_get_cache_key():
+    """Testa que a chave independe da ordem dos filtros."""
+    assert get_cache_key({'a': 1, 'b': 2}) == get_cache_key({'b': 2, 'a': 1})
+
+
+@pytest.mark.parametrize('compression', [None, 'lz4', 'zstd'])
+def test_pack_value_roundtrip(compression):
+    """Testa o binário gravado no Redis: o codec vai no cabeçalho e a leitura não precisa sabê-lo."""
+    text = '{"receita": [' + ', '.join(['1234.5'] * 1000) + ']}'
+    data = pack_value(text, compression)
+    assert unpack_value(data) == text.encode('utf-8')
+    if compression is not None:
+        assert len(data) < len(text) / 10
+    with pytest.raises(ValueError):
+        unpack_value(text.encode('utf-8'))
+
+
+def test_result_cache_counts_bytes_per_tier():
+    """Testa que o Redis recebe o valor comprimido e os contadores de cada nível."""
+    client = fakeredis.FakeRedis()
+    value = {'receita': [1234.5] * 1000}
+    writer = ResultCache(redis_client=client, compression='zstd')
+    assert writer.get_or_compute('k', lambda: value) == value
+    stored = client.get('result:k')
+    assert len(stored) < len(json.dumps(value)) / 10
+    assert writer.stats['redis']['misses'] == 1
+    assert writer.stats['redis']['sets'] == 1 and writer.stats['redis']['bytes_written'] == len(stored)
+    assert writer.stats['l1']['sets'] == 1 and writer.stats['l1']['bytes_written'] == len(stored)
+
+    # Outro worker: L1 vazio, o valor vem do Redis e passa a ficar no L1
+    reader = ResultCache(redis_client=client)
+    assert reader.get_or_compute('k', lambda: None) == value
+    assert reader.get_or_compute('k', lambda: None) == value
+    assert reader.stats['redis']['hits'] == 1 and reader.stats['redis']['bytes_read'] == len(stored)
+    assert reader.stats['l1']['hits'] == 1 and reader.stats['l1']['bytes_read'] == len(stored)
+    assert reader.stats['compute']['computed'] == 0
+
+    # Valor em formato antigo (JSON puro) é recalculado
+    client.set('result:antigo', json.dumps(value))
+    assert reader.get_or_compute('antigo', lambda: {'novo': 1}) == {'novo': 1}
+
+
+def test_local_cache_limits(monkeypatch):
+    """Testa o descarte por entradas, bytes e TTL no L1."""
+    local = LocalCache(max_entries=2, max_bytes=100, ttl=10)
+    local.set('a', 1, 10)
+    local.set('b', 2, 10)
+    local.set('c', 3, 10)
+    assert local.get('a') is None
+    local.set('d', 4, 95)
+    assert local.nbytes <= 100
+
+    now = [1000.0]
+    monkeypatch.setattr('utils.cache.time.monotonic', lambda: now[0])
+    local.set('e', 5, 1)
+    now[0] += 11
+    assert local.get('e') is None
+
+
+def test_result_cache_computes_once_across_workers():
+    """Testa que dois workers (caches distintos, mesmo Redis) calculam o resultado uma única vez."""
+    client = fakeredis.FakeRedis()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'total': 42}
+
+    workers = [ResultCache(redis_client=client, timeout=60, poll_interval=0.005) for _ in range(2)]
+    results = []
+    threads = [
+        threading.Thread(target=lambda c=c: results.append(c.get_or_compute('k', compute)))
+        for c in workers for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [{'total': 42}] * 6
+    assert len(calls) == 1
+    assert sum(c.stats['compute']['computed'] for c in workers) == 1
+    assert client.get('result:k') is not None
+    assert client.get('result:lock:k') is None
+    assert workers[0].get_or_compute('k', compute) == {'total': 42}
+    assert len(calls) == 1
+
+
+def test_result_cache_waits_and_falls_back():
+    """Testa que, com o lock preso em outro worker, a espera termina no cálculo local."""
+    client = fakeredis.FakeRedis()
+    client.set('result:lock:k', b'outro-worker', px=60_000)
+    cache = ResultCache(redis_client=client, wait_timeout=0.05, poll_interval=0.01)
+    assert cache.get_or_compute('k', lambda: [1, 2]) == [1, 2]
+    assert cache.stats['compute'] == {'computed': 1, 'waited': 1}
+    # O lock alheio não é liberado por quem não o detém
+    assert client.get('result:lock:k') == b'outro-worker'
+
+
+def test_result_cache_exception_releases_lock():
+    """Testa que uma falha no cálculo propaga a exceção e libera o lock."""
+    client = fakeredis.FakeRedis()
+    cache = ResultCache(redis_client=client)
+
+    def fail():
+        raise ValueError('falhou')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('k', fail)
+    assert client.get('result:lock:k') is None
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+
+def test_result_cache_without_redis():
+    """Testa o cache de resultados só com o L1 quando o Redis não está disponível."""
+    cache = ResultCache(redis_client=None)
+    assert cache.get_or_compute('k', lambda: {'a': 1}) == {'a': 1}
+    assert cache.get_or_compute('k', lambda: {'a': 2}) == {'a': 1}
+    assert cache.stats['l1']['hits'] == 1 and cache.stats['l1']['misses'] == 1
+    assert cache.stats['redis'] == {'hits': 0, 'misses': 0, 'sets': 0, 'bytes_read': 0, 'bytes_written': 0}
@@ -0,0 +1,81 @@
+
+import pandas as pd
+import pytest
+from utils.cache_warmer import CacheWarmer, warm_filters
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+
+
+@pytest.fixture
+def source(make_sales):
+    return MemorySource(process_data(make_sales(500)))
+
+def test_warm_filters(source):
+    """Testa a visão padrão mais cada combinação categoria × região."""
+    filters = warm_filters(source)
+    assert len(filters) == 1 + 3 * 2
+    assert filters[0]['category'] == 'all' and filters[0]['region'] == 'all'
+    assert len({(tuple(f['category']), tuple(f['region'])) for f in filters[1:]}) == 6
+
+
+def test_warmer_runs_on_version_change(source):
+    """Testa que o aquecimento roda na partida e de novo só quando a versão dos dados muda."""
+    warmed = []
+    warmer = CacheWarmer(source, lambda filters: warmed.append(source.make_handle(filters)))
+    assert warmer.run_once() == 7
+    assert warmer.version == source.version
+    assert len(source.slices) == 7
+    assert all(handle['version'] == source.version for handle in warmed)
+
+    source.append(pd.DataFrame({
+        'data': [pd.Timestamp('2023-01-01')], 'valor': [10.0], 'quantidade': [1],
+        'categoria': ['Livros'], 'regiao': ['Sul'], 'produto': ['Produto 1'],
+    }))
+    assert source.version != warmer.version
+    warmer.run_once()
+    assert warmer.stats['runs'] == 2 and warmer.stats['warmed'] == 14
+
+    # Versão já aquecida: a thread não refaz o trabalho
+    warmer.start()
+    warmer.stop(timeout=5)
+    assert warmer.stats['runs'] == 2
+
+
+def test_warmer_rewarms_only_changed_selections(source):
+    """Testa que um lote que não muda o período só reaquece as seleções que recebem linhas."""
+    warmed = []
+    warmer = CacheWarmer(source, warmed.append)
+    warmer.run_once()
+
+    source.append(pd.DataFrame({
+        'data': [source.df['data'].iloc[-1]], 'valor': [10.0], 'quantidade': [1],
+        'categoria': ['Livros'], 'regiao': ['Sul'], 'produto': ['Produto 1'],
+    }))
+    assert warmer.run_once() == 2
+    assert [(f['category'], f['region']) for f in warmed[7:]] == [('all', 'all'), (['Livros'], ['Sul'])]
+    assert warmer.stats['skipped'] == 5 and warmer.version == source.version
+
+
+def test_warmer_waits_for_a_stable_version(source):
+    """Testa que a primeira versão é aquecida logo e as seguintes só após `debounce` segundos sem mudança."""
+    warmer = CacheWarmer(source, lambda filters: None, debounce=30)
+    assert warmer.due(500, 0)
+    warmer.version = 500
+    assert not warmer.due(500, 60)
+    assert not warmer.due(501, 5)
+    assert warmer.due(501, 30)
+
+
+def test_warmer_counts_errors(source):
+    """Testa que uma seleção com erro não interrompe o aquecimento das demais."""
+    calls = []
+
+    def warm(filters):
+        calls.append(filters)
+        if len(calls) == 1:
+            raise RuntimeError('falhou')
+
+    warmer = CacheWarmer(source, warm)
+    assert warmer.run_once() == 6
+    assert warmer.stats['errors'] == 1
+    assert len(calls) == 7
@@ -0,0 +1,114 @@
+
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from components.charts import create_category_sales_chart, create_region_heatmap, create_sales_evolution_chart
+from utils.client_payload import build_client_payload, decode_array, encode_array, monthly_cells, payload_bytes
+from utils.cube import build_cube
+from utils.data_processor import process_data
+
+ASSET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'dashboard.js')
+WINDOW = {'start_date': '2022-02-10', 'end_date': '2022-11-20', 'category': 'all', 'region': 'all'}
+
+
+@pytest.fixture(scope='module')
+def cube(make_sales):
+    df = make_sales(5000, days=400, regioes=('Norte', 'Sul', 'Leste', 'Oeste'), produtos=30, hourly=False, cents=False)
+    # Célula sem vendas na janela: Livros no Norte só antes de fevereiro
+    df = df[~((df['categoria'] == 'Livros') & (df['regiao'] == 'Norte') & (df['data'] >= '2022-02-01'))]
+    return build_cube(process_data(df))
+
+@pytest.fixture(scope='module')
+def payload(cube):
+    aggregates = cube.select(WINDOW).aggregates()
+    figures = {
+        'sales_evolution': create_sales_evolution_chart(aggregates.get_sales_evolution()),
+        'category_sales': create_category_sales_chart(aggregates.get_sales_by_category()),
+        'region_heatmap': create_region_heatmap(aggregates.get_region_heatmap_data()),
+    }
+    return build_client_payload(aggregates, figures)
+
+
+@pytest.mark.parametrize('values, dtype', [
+    (np.arange(12, dtype=np.int64).reshape(2, 3, 2), 'int32'),
+    (np.array([1.5, -2.25, 1e12]), 'float64'),
+    (np.array([2 ** 40, 1]), 'float64'),
+])
+def test_encode_array_round_trip(values, dtype):
+    """Testa que os arrays voltam iguais e que inteiros só vão como int32 quando cabem."""
+    encoded = encode_array(values)
+    assert encoded['dtype'] == dtype
+    np.testing.assert_array_equal(decode_array(encoded), values)
+
+
+def test_monthly_cells_match_daily_sums(cube):
+    """Testa que as somas mensais por célula preservam os totais do eixo diário."""
+    aggregates = cube.select(WINDOW).aggregates()
+    meses, receita, quantidade, linhas = monthly_cells(aggregates)
+
+    assert meses == [f'2022-{month:02d}' for month in range(2, 12)]
+    assert receita.shape == (len(meses),) + aggregates.receita.shape[1:]
+    assert np.isclose(receita.sum(), aggregates.receita.sum())
+    assert quantidade.sum() == aggregates.quantidade.sum()
+    np.testing.assert_array_equal(linhas.sum(axis=0), aggregates.linhas.sum(axis=0))
+    evolution = aggregates.get_sales_evolution()
+    np.testing.assert_allclose(receita.sum(axis=(1, 2)), evolution['receita'])
+
+
+def test_payload_shares_one_template_and_respects_limit(cube, payload):
+    """Testa que o template do plotly vai uma vez só e que o limite de bytes desliga o payload."""
+    assert payload['template'] is not None
+    assert all('template' not in figure['layout'] for figure in payload['figures'].values())
+    aggregates = cube.select(WINDOW).aggregates()
+    assert build_client_payload(aggregates, {}, max_bytes=payload_bytes(payload) // 10) is None
+
+
+def _render(payload, category, region):
+    script = (
+        "global.window = {dash_clientside: {no_update: null}};"
+        f"require({json.dumps(ASSET)});"
+        "const args = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "const out = window.dash_clientside.dashboard.render(args[0], args[1], args[2], null);"
+        "process.stdout.write(JSON.stringify(out));"
+    )
+    result = subprocess.run(
+        ['node', '-e', script], input=json.dumps([payload, category, region]),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node não instalado')
+@pytest.mark.parametrize('category, region', [
+    ([], []),
+    (['Roupas'], []),
+    (['Livros', 'Roupas'], ['Norte']),
+    (['Livros'], ['Norte']),
+])
+def test_clientside_render_matches_server_panels(cube, payload, category, region):
+    """Testa que o callback clientside reproduz os painéis calculados no servidor."""
+    kpis, evolution, category_sales, heatmap = _render(payload, category, region)
+    aggregates = cube.select({**WINDOW, 'category': category or 'all', 'region': region or 'all'}).aggregates()
+
+    receita_total, total_vendas, ticket_medio = aggregates.calculate_kpis()
+    texts = [card['props']['children']['props']['children']['props']['children'][1]['props']['children'] for card in kpis]
+    assert texts == [f"R$ {receita_total:,.2f}", f"{total_vendas:,}", f"R$ {ticket_medio:,.2f}"]
+
+    expected = aggregates.get_sales_evolution()
+    assert evolution['data'][0]['x'] == list(expected['data'])
+    np.testing.assert_allclose(evolution['data'][0]['y'], expected['receita'])
+    assert evolution['layout']['template'] == payload['template']
+
+    expected = aggregates.get_sales_by_category()
+    assert category_sales['data'][0]['labels'] == list(expected['categoria'])
+    np.testing.assert_allclose(category_sales['data'][0]['values'], expected['receita'])
+
+    expected = aggregates.get_region_heatmap_data()
+    assert heatmap['data'][0]['x'] == list(expected.columns)
+    assert heatmap['data'][0]['y'] == list(expected.index)
+    np.testing.assert_allclose(np.array(heatmap['data'][0]['z']).reshape(expected.shape), expected.to_numpy())
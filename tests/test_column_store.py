@@ -0,0 +1,48 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.column_store import ColumnStore
+
+
+def _frame(n, start=0):
+    return pd.DataFrame({
+        'valor': np.arange(start, start + n, dtype=np.float32) + 0.25,
+        'quantidade': np.arange(n, dtype=np.int8),
+        'categoria': pd.Categorical(['Roupas', 'Livros'] * (n // 2), categories=['Roupas', 'Livros']),
+    })
+
+
+def test_append_reuses_buffers():
+    """Testa que anexar dentro da capacidade não realoca e que o frame é uma view."""
+    store = ColumnStore(_frame(4), capacity=10)
+    buffer = store._buffers['valor']
+    store.append(_frame(4, start=4))
+    frame = store.frame()
+    assert store._buffers['valor'] is buffer
+    assert np.shares_memory(frame['valor'].to_numpy(), buffer)
+    assert frame['valor'].tolist() == [i + 0.25 for i in range(8)]
+    assert frame['categoria'].tolist() == ['Roupas', 'Livros'] * 4
+
+
+def test_append_grows_and_widens():
+    """Testa o crescimento da capacidade e a ampliação do dtype quando o lote não cabe."""
+    store = ColumnStore(_frame(2))
+    batch = _frame(2)
+    batch['quantidade'] = np.array([1, 300])
+    batch['valor'] = np.array([0.001, 1.5])
+    store.append(batch)
+    frame = store.frame()
+    assert len(frame) == 4 and store.capacity >= 4
+    assert frame['quantidade'].tolist() == [0, 1, 1, 300]
+    assert frame['valor'].dtype == np.float64 and frame['valor'].iloc[2] == 0.001
+
+
+def test_append_rejects_unknown_category():
+    """Testa que categorias desconhecidas não são anexadas."""
+    store = ColumnStore(_frame(2))
+    batch = _frame(2)
+    batch['categoria'] = ['Roupas', 'Brinquedos']
+    with pytest.raises(KeyError):
+        store.append(batch)
+    assert len(store.frame()) == 2
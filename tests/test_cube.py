@@ -0,0 +1,93 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils import analytics
+from utils.cube import build_cube
+from utils.data_processor import process_data
+
+
+@pytest.fixture(scope='module')
+def sales(make_sales):
+    return process_data(make_sales(5000, days=400, regioes=('Norte', 'Sul', 'Leste', 'Oeste'), produtos=30, hourly=False, cents=False))
+
+FILTERS = [
+    {'start_date': '2022-01-01', 'end_date': '2023-12-31', 'category': 'all', 'region': 'all'},
+    {'start_date': '2022-03-10', 'end_date': '2022-09-30', 'category': 'Roupas', 'region': 'all'},
+    {'start_date': '2022-02-01', 'end_date': '2022-12-31', 'category': 'Livros', 'region': 'Sul'},
+]
+
+
+def _slice(df, filters):
+    dff = df[(df['data'] >= filters['start_date']) & (df['data'] <= filters['end_date'])]
+    if filters['category'] != 'all':
+        dff = dff[dff['categoria'] == filters['category']]
+    if filters['region'] != 'all':
+        dff = dff[dff['regiao'] == filters['region']]
+    return dff.copy()
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_cube_matches_analytics(sales, filters):
+    """Testa que o cubo retorna os mesmos resultados das funções de análise."""
+    cube_slice = build_cube(sales).select(filters)
+    dff = _slice(sales, filters)
+
+    assert np.allclose(cube_slice.calculate_kpis(), analytics.calculate_kpis(dff))
+    pd.testing.assert_frame_equal(cube_slice.get_sales_evolution(), analytics.get_sales_evolution(dff))
+    pd.testing.assert_frame_equal(cube_slice.get_sales_by_category(), analytics.get_sales_by_category(dff))
+    pd.testing.assert_frame_equal(cube_slice.get_top_products(), analytics.get_top_products(dff))
+    pd.testing.assert_frame_equal(
+        cube_slice.get_region_heatmap_data(), analytics.get_region_heatmap_data(dff), check_names=False
+    )
+
+    daily_sales, trend_line = cube_slice.get_trend_analysis()
+    expected_daily, expected_trend = analytics.get_trend_analysis(dff.copy())
+    pd.testing.assert_frame_equal(daily_sales, expected_daily, check_dtype=False)
+    assert np.allclose(trend_line, expected_trend)
+
+    forecast = cube_slice.get_sales_forecast()
+    expected = analytics.get_sales_forecast(dff.copy())
+    assert np.array_equal(forecast[2], expected[2])
+    assert np.allclose(forecast[3], expected[3])
+
+
+def test_cube_is_smaller_than_rows(sales):
+    """Testa a forma do cubo: dias × categorias × regiões."""
+    cube = build_cube(sales)
+    assert cube.shape == (sales['data'].nunique(), 3, 4)
+    assert cube.linhas.sum() == len(sales)
+
+
+def test_cube_empty_selection(sales):
+    """Testa uma seleção sem vendas."""
+    cube_slice = build_cube(sales).select(
+        {'start_date': '2030-01-01', 'end_date': '2030-12-31', 'category': 'all', 'region': 'all'}
+    )
+    assert cube_slice.calculate_kpis() == (0.0, 0, 0)
+    daily_sales, trend_line = cube_slice.get_trend_analysis()
+    assert daily_sales.empty
+    assert trend_line is None
+
+
+def test_appended_leaves_the_current_cube_untouched(sales):
+    """Testa que incluir vendas devolve um cubo novo igual ao reconstruído e não altera o atual."""
+    # Corte no meio de um dia: o lote também soma no último dia do cubo atual
+    dias = sales['data'].dt.normalize()
+    split = int(np.flatnonzero((dias.iloc[1:].to_numpy() == dias.iloc[:-1].to_numpy()))[len(sales) // 2]) + 1
+    cube = build_cube(sales.iloc[:split].reset_index(drop=True))
+    before = {name: getattr(cube, name).copy() for name in ('dias', 'receita', 'quantidade', 'linhas')}
+    kpis = cube.select(FILTERS[0]).calculate_kpis()
+    top = cube.select(FILTERS[1]).get_top_products()
+
+    appended = cube.appended(sales.iloc[split:])
+    for name, values in before.items():
+        np.testing.assert_array_equal(getattr(cube, name), values)
+    assert cube.select(FILTERS[0]).calculate_kpis() == kpis
+    pd.testing.assert_frame_equal(cube.select(FILTERS[1]).get_top_products(), top)
+
+    rebuilt = build_cube(sales)
+    for filters in FILTERS:
+        assert np.allclose(appended.select(filters).calculate_kpis(), rebuilt.select(filters).calculate_kpis())
+        pd.testing.assert_frame_equal(appended.select(filters).get_top_products(), rebuilt.select(filters).get_top_products())
+    assert cube.appended(sales.iloc[:10]) is None
@@ -0,0 +1,97 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils import analytics
+from utils.cube import CubeSlice, build_cube
+from utils.dashboard_query import compute_dashboard
+from utils.data_processor import process_data
+
+
+def _sales(make_sales, n, seed=0):
+    return process_data(make_sales(n, seed=seed, days=700, categorias=('Eletrônicos', 'Roupas', 'Livros', 'Móveis'),
+                                   regioes=('Norte', 'Sul', 'Leste'), produtos=100, hourly=False, cents=False))
+
+
+@pytest.fixture(scope='module')
+def sales(make_sales):
+    return _sales(make_sales, 20000)
+
+def _per_callback(dff):
+    """Caminho antigo: cada painel agrupa a fatia por conta própria."""
+    return {
+        'kpis': analytics.calculate_kpis(dff),
+        'sales_evolution': analytics.get_sales_evolution(dff),
+        'category_sales': analytics.get_sales_by_category(dff),
+        'top_products': analytics.get_top_products(dff),
+        'region_heatmap': analytics.get_region_heatmap_data(dff),
+        'trend_analysis': analytics.get_trend_analysis(dff.copy()),
+        'sales_forecast': analytics.get_sales_forecast(dff.copy()),
+    }
+
+
+def _assert_same(fused, expected):
+    assert np.allclose(fused['kpis'], expected['kpis'])
+    for key in ('sales_evolution', 'category_sales', 'top_products'):
+        pd.testing.assert_frame_equal(fused[key], expected[key])
+    pd.testing.assert_frame_equal(fused['region_heatmap'], expected['region_heatmap'], check_names=False)
+    pd.testing.assert_frame_equal(fused['trend_analysis'][0], expected['trend_analysis'][0], check_dtype=False)
+    assert np.allclose(fused['trend_analysis'][1], expected['trend_analysis'][1])
+    assert np.allclose(fused['sales_forecast'][3], expected['sales_forecast'][3])
+
+
+def test_fused_slice_matches_per_callback(sales):
+    """Testa que a seleção por região gera os mesmos painéis que as funções isoladas."""
+    filters = {'start_date': '2022-05-01', 'end_date': '2023-12-31', 'category': 'all', 'region': ['Sul', 'Leste']}
+    dff = sales[sales['regiao'].isin(['Sul', 'Leste']) & (sales['data'] >= '2022-05-01')]
+    _assert_same(compute_dashboard(build_cube(sales).select(filters).aggregates()), _per_callback(dff))
+
+
+def test_fused_cube_matches_per_callback(sales):
+    """Testa que a seleção do cubo gera os mesmos painéis que as funções isoladas."""
+    filters = {'start_date': '2022-03-01', 'end_date': '2023-06-30', 'category': ['Roupas', 'Livros'], 'region': 'all'}
+    dff = sales[
+        (sales['data'] >= '2022-03-01') & (sales['data'] <= '2023-06-30') &
+        sales['categoria'].isin(['Roupas', 'Livros'])
+    ]
+    aggregates = build_cube(sales).select(filters).aggregates()
+    _assert_same(compute_dashboard(aggregates), _per_callback(dff))
+
+
+def test_fused_empty_slice(sales):
+    """Testa o caminho unificado em uma seleção vazia."""
+    filters = {'start_date': '2030-01-01', 'end_date': '2030-01-31', 'category': 'all', 'region': 'all'}
+    results = compute_dashboard(build_cube(sales).select(filters).aggregates())
+    assert results['kpis'] == (0.0, 0, 0)
+    assert results['trend_analysis'][1] is None
+
+
+def test_fused_path_reads_the_selection_once(sales, monkeypatch):
+    """Testa que os sete painéis saem de uma única leitura da seleção, sem agrupar as linhas."""
+    calls = {'cells': 0, 'products': 0}
+    cells, products = CubeSlice._cells, CubeSlice._product_totals
+
+    def count_cells(self, values):
+        calls['cells'] += 1
+        return cells(self, values)
+
+    def count_products(self):
+        calls['products'] += 1
+        return products(self)
+
+    def no_groupby(*args, **kwargs):
+        raise AssertionError('o caminho unificado não deve agrupar linhas')
+
+    cube = build_cube(sales)
+    monkeypatch.setattr(CubeSlice, '_cells', count_cells)
+    monkeypatch.setattr(CubeSlice, '_product_totals', count_products)
+    monkeypatch.setattr(pd.DataFrame, 'groupby', no_groupby)
+
+    cube_slice = cube.select({'start_date': '2022-03-01', 'end_date': '2023-06-30', 'category': 'all', 'region': 'all'})
+    results = compute_dashboard(cube_slice.aggregates())
+    for method in ('calculate_kpis', 'get_sales_evolution', 'get_top_products', 'get_sales_forecast'):
+        getattr(cube_slice, method)()
+
+    assert len(results) == 7
+    # receita, quantidade e linhas das células, mais os totais por produto: uma vez cada
+    assert calls == {'cells': 3, 'products': 1}
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from components.charts import create_sales_forecast_chart, create_trend_analysis_chart
+from utils.downsample import lttb, lttb_indices
+
+
+def _series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.float64)
+    y = np.sin(x / 50) * 100 + rng.normal(0, 10, n)
+    return x, y
+
+
+def test_lttb_keeps_requested_length_and_endpoints():
+    x, y = _series(10_000)
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_preserves_extremes():
+    x, y = _series(10_000)
+    y[1234], y[8765] = 1e4, -1e4
+    _, reduced = lttb(x, y, 200)
+    assert reduced.max() == 1e4
+    assert reduced.min() == -1e4
+
+
+def _sequential_lttb(x, y, n_out):
+    """LTTB original, balde a balde, com o ponto escolhido no balde anterior."""
+    n = len(x)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected, a = [0], 0
+    for i, (start, stop) in enumerate(zip(edges[:-1], edges[1:])):
+        if i + 2 < len(edges):
+            c_x, c_y = x[stop:edges[i + 2]].mean(), y[stop:edges[i + 2]].mean()
+        else:
+            c_x, c_y = x[-1], y[-1]
+        xs, ys = x[start:stop], y[start:stop]
+        area = np.abs((x[a] - c_x) * (ys - y[a]) - (x[a] - xs) * (c_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected.append(a)
+    return np.array(selected + [n - 1])
+
+
+def test_lttb_agrees_with_the_sequential_algorithm():
+    """Testa que a versão vetorizada escolhe quase sempre os mesmos pontos do LTTB balde a balde."""
+    x, y = _series(3650)
+    indices = lttb_indices(x, y, 1500)
+    assert np.mean(indices == _sequential_lttb(x, y, 1500)) > 0.9
+
+
+def test_lttb_returns_everything_when_series_is_short():
+    x, y = _series(100)
+    np.testing.assert_array_equal(lttb_indices(x, y, 100), np.arange(100))
+    np.testing.assert_array_equal(lttb_indices(x, y, 500), np.arange(100))
+
+
+def _daily(n):
+    x, y = _series(n)
+    daily_sales = pd.DataFrame({'dias_desde_inicio': x, 'receita': y})
+    return daily_sales, 3.0 * x + 10
+
+
+def test_long_series_is_downsampled_and_rendered_with_webgl():
+    daily_sales, trend_line = _daily(20_000)
+    fig = create_trend_analysis_chart(daily_sales, trend_line, max_points=1500)
+    points, trend = fig.data
+    assert isinstance(points, go.Scattergl)
+    assert len(points.x) == 1500
+    # A reta de tendência é desenhada só pelas extremidades
+    assert list(trend.x) == [0, 19_999]
+    assert list(trend.y) == [10, 3.0 * 19_999 + 10]
+
+
+def test_short_series_keeps_every_point_with_svg():
+    daily_sales, trend_line = _daily(365)
+    future_days = np.arange(365, 395).reshape(-1, 1)
+    fig = create_sales_forecast_chart(daily_sales, trend_line, future_days, 3.0 * future_days.ravel() + 10)
+    points = fig.data[0]
+    assert isinstance(points, go.Scatter)
+    assert len(points.x) == 365
+    np.testing.assert_array_equal(points.y, np.round(daily_sales['receita'], 2))
+    assert list(fig.data[2].x) == list(range(365, 395))
+
+
+def test_max_points_zero_disables_downsampling():
+    daily_sales, trend_line = _daily(5_000)
+    fig = create_trend_analysis_chart(daily_sales, trend_line, max_points=0)
+    assert len(fig.data[0].x) == 5_000
@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+from utils import export
+from utils.export import ExportJobs
+
+
+@pytest.fixture(scope='module')
+def source(make_sales):
+    return MemorySource(process_data(make_sales(2500, seed=11, days=200)))
+
+FILTERS = {'start_date': '2022-02-01', 'end_date': '2022-05-31', 'category': ['Roupas', 'Livros'], 'region': 'all'}
+
+
+def _wait(jobs, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = jobs.status(job_id)
+        if status['status'] in ('done', 'error'):
+            return status
+        time.sleep(0.01)
+    raise AssertionError('exportação não terminou')
+
+
+def _read(path, export_format):
+    if export_format == 'csv':
+        return pd.read_csv(path, parse_dates=['data'])
+    if export_format == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
+
+def test_iter_frames_covers_the_slice_in_chunks(source):
+    handle = source.make_handle(FILTERS)
+    chunks = list(source.iter_frames(handle, chunk_rows=300))
+    expected = source.frame(handle)[list(source.columns)]
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == source.count(handle) == len(expected)
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'parquet', 'xlsx'])
+def test_export_job_writes_the_whole_slice(source, tmp_path, export_format):
+    jobs = ExportJobs(source, str(tmp_path), chunk_rows=300)
+    handle = source.make_handle(FILTERS)
+    status = _wait(jobs, jobs.submit(handle, export_format))
+
+    assert status['status'] == 'done'
+    assert status['rows'] == status['total'] == source.count(handle)
+    assert status['path'].endswith('.' + export_format)
+    assert not list(tmp_path.glob('*.part'))
+
+    exported = _read(status['path'], export_format)
+    expected = source.frame(handle)[list(source.columns)].reset_index(drop=True)
+    assert list(exported.columns) == list(expected.columns)
+    np.testing.assert_allclose(exported['receita'], expected['receita'])
+    assert list(exported['categoria'].astype(str)) == list(expected['categoria'].astype(str))
+    assert (pd.to_datetime(exported['data']) == expected['data']).all()
+
+
+def test_each_job_gets_its_own_file(source, tmp_path):
+    jobs = ExportJobs(source, str(tmp_path))
+    handle = source.make_handle(FILTERS)
+    first = _wait(jobs, jobs.submit(handle, 'csv'))
+    second = _wait(jobs, jobs.submit(handle, 'csv'))
+    assert first['path'] != second['path']
+
+
+def test_empty_slice_exports_only_the_header(source, tmp_path):
+    jobs = ExportJobs(source, str(tmp_path))
+    handle = source.make_handle({**FILTERS, 'start_date': '2030-01-01', 'end_date': '2030-01-31'})
+    status = _wait(jobs, jobs.submit(handle, 'parquet'))
+    assert status['status'] == 'done' and status['total'] == 0
+    assert list(pd.read_parquet(status['path']).columns) == list(source.columns)
+
+
+def test_failures_are_reported_in_the_status(source, tmp_path):
+    class Broken:
+        columns = source.columns
+
+        def count(self, handle):
+            return 10
+
+        def iter_frames(self, handle, chunk_rows):
+            raise RuntimeError('banco indisponível')
+            yield
+
+    jobs = ExportJobs(Broken(), str(tmp_path))
+    status = _wait(jobs, jobs.submit({}, 'csv'))
+    assert status['status'] == 'error'
+    assert 'banco indisponível' in status['error']
+    assert not list(tmp_path.glob('*.part'))
+
+
+def test_xlsx_over_the_excel_limit_fails_before_writing(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'XLSX_MAX_ROWS', 10)
+    jobs = ExportJobs(source, str(tmp_path))
+    status = _wait(jobs, jobs.submit(source.make_handle(FILTERS), 'xlsx'))
+    assert status['status'] == 'error' and status['rows'] == 0
+    assert 'CSV ou Parquet' in status['error']
+    assert not list(tmp_path.glob('*.xlsx*'))
+
+    # Linhas que passam do limite durante a escrita também interrompem o arquivo
+    with pytest.raises(ValueError, match='Excel'):
+        export._write_xlsx(str(tmp_path / 'vendas.xlsx'), iter([pd.DataFrame({'a': range(11)})]), ['a'])
+
+
+def test_unknown_jobs_and_formats(source, tmp_path):
+    jobs = ExportJobs(source, str(tmp_path))
+    assert jobs.status('0' * 32) is None
+    assert jobs.status('../../etc/passwd') is None
+    with pytest.raises(ValueError):
+        jobs.submit(source.make_handle(FILTERS), 'pdf')
+
+
+def test_purge_removes_expired_files(source, tmp_path):
+    jobs = ExportJobs(source, str(tmp_path), ttl=60)
+    status = _wait(jobs, jobs.submit(source.make_handle(FILTERS), 'csv'))
+    jobs.purge(now=time.time() + 3600)
+    assert jobs.status(status['id']) is None
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,90 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.data_processor import process_data
+from utils.filter_engine import FilterEngine, make_filters, normalize_selection
+
+
+@pytest.fixture(scope='module')
+def sales(make_sales):
+    return process_data(make_sales(3001, seed=1, days=300, regioes=('Norte', 'Sul', 'Sudeste'), produtos=2, cents=False))
+
+def _mask_rows(df, filters):
+    start = pd.to_datetime(filters['start_date'])
+    end = pd.to_datetime(filters['end_date']) + pd.Timedelta(days=1)
+    mask = (df['data'] >= start) & (df['data'] < end)
+    for key, column in (('category', 'categoria'), ('region', 'regiao')):
+        values = normalize_selection(filters[key])
+        if values is not None:
+            mask &= df[column].isin(values)
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.mark.parametrize('category, region', [
+    ('all', 'all'),
+    ('Roupas', 'all'),
+    (['Roupas', 'Livros'], 'Sul'),
+    ([], ['Sul', 'Sudeste']),
+    ('Inexistente', 'all'),
+])
+def test_filter_matches_masks(sales, category, region):
+    """Testa que o motor de índices retorna as mesmas linhas que as máscaras booleanas."""
+    engine = FilterEngine(sales)
+    filters = make_filters('2022-02-03', '2022-08-17', category, region)
+    rows = engine.filter(filters)
+    rows = np.arange(len(sales))[rows] if isinstance(rows, slice) else rows
+    assert np.array_equal(rows, _mask_rows(sales, filters))
+
+
+def test_date_only_filter_is_a_slice(sales):
+    """Testa que o filtro só de período retorna um slice contíguo (view)."""
+    rows = FilterEngine(sales).filter(make_filters('2022-03-01', '2022-03-31', 'all', []))
+    assert isinstance(rows, slice)
+
+
+def test_make_filters_is_canonical():
+    """Testa que seleções equivalentes geram os mesmos filtros."""
+    assert make_filters('a', 'b', ['Sul', 'Norte'], []) == make_filters('a', 'b', ['Norte', 'Sul'], 'all')
+    assert make_filters('a', 'b', None, ['all'])['category'] == 'all'
+
+
+def test_engine_requires_sorted_data(sales):
+    """Testa que o motor rejeita dados fora de ordem."""
+    with pytest.raises(ValueError):
+        FilterEngine(sales.iloc[::-1])
+
+
+def test_engine_appended_matches_rebuild(sales):
+    """Testa que anexar linhas (fora do limite de byte) equivale a reconstruir os bitmaps."""
+    engine = FilterEngine(sales.iloc[:2003])
+    for start, stop in ((2003, 2010), (2010, 2500), (2500, len(sales))):
+        engine = engine.appended(sales['data'].to_numpy()[:stop], sales.iloc[start:stop])
+    for category, region in (('Roupas', 'all'), (['Livros', 'Roupas'], ['Sul']), ('all', 'Sudeste')):
+        filters = make_filters('2022-02-01', '2022-10-31', category, region)
+        rows = engine.filter(filters)
+        assert np.array_equal(np.arange(len(sales))[rows], _mask_rows(sales, filters))
+
+
+def test_engine_appended_leaves_the_current_engine_untouched(sales):
+    """Testa que o motor atual continua filtrando só as suas linhas depois de um `appended`."""
+    head = sales.iloc[:2003]
+    engine = FilterEngine(head)
+    filters = make_filters('2022-01-01', '2022-12-31', ['Livros', 'Roupas'], 'Sul')
+    expected = np.arange(len(head))[engine.filter(filters)]
+
+    appended = engine.appended(sales['data'].to_numpy()[:2500], sales.iloc[2003:2500])
+    appended.appended(sales['data'].to_numpy(), sales.iloc[2500:])
+
+    assert appended is not engine
+    assert engine.n_rows == len(head)
+    assert np.array_equal(np.arange(len(head))[engine.filter(filters)], expected)
+    assert np.array_equal(np.arange(2500)[appended.filter(filters)], _mask_rows(sales.iloc[:2500], filters))
+
+
+def test_engine_appended_rejects_older_rows(sales):
+    """Testa que linhas anteriores à última data não são anexadas."""
+    engine = FilterEngine(sales.iloc[1000:1100])
+    datas = np.concatenate([sales['data'].to_numpy()[1000:1100], sales['data'].to_numpy()[:1]])
+    assert engine.appended(datas, sales.iloc[:1]) is None
+    assert engine.n_rows == 100
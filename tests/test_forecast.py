@@ -0,0 +1,161 @@
+
+import numpy as np
+import pandas as pd
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+from utils.forecast import (
+    backtest, fit_forecast_model, fit_seasonal, seasonal_design, seasonal_forecast,
+)
+
+DAYS = np.arange(19000, 19000 + 730)
+
+
+def _seasonal(days, level, slope, weekend, annual):
+    weekday = (days + 3) % 7
+    return level + slope * (days - days[0]) + weekend * (weekday >= 5) + annual * np.cos(2 * np.pi * days / 365.25)
+
+
+class _Sales:
+    """Mesmos atributos de SalesCube/SalesAggregates usados no ajuste."""
+
+    def __init__(self, days, receita, categorias, regioes):
+        self.dias = days.astype('datetime64[D]')
+        self.receita = receita
+        self.categorias = pd.Index(categorias)
+        self.regioes = pd.Index(regioes)
+
+
+def _sales(seed=0, noise=0.0):
+    rng = np.random.default_rng(seed)
+    n_cat, n_reg = 3, 2
+    receita = np.stack([
+        _seasonal(DAYS, *rng.uniform([100, 0, 10, 5], [200, 0.2, 50, 40]))
+        for _ in range(n_cat * n_reg)
+    ], axis=1)
+    receita = receita + rng.normal(0, noise, receita.shape)
+    return _Sales(DAYS, receita.reshape(len(DAYS), n_cat, n_reg), ['A', 'B', 'C'], ['Norte', 'Sul'])
+
+
+def test_weekday_columns():
+    """Testa que os indicadores de dia da semana seguem o calendário (segunda é a referência)."""
+    monday = int((np.datetime64('2024-01-01') - np.datetime64('1970-01-01')).astype(int))
+    design = seasonal_design(np.arange(monday, monday + 7), monday, 1.0, harmonics=1)
+    assert not design[0, 2:8].any()
+    np.testing.assert_array_equal(design[1:, 2:8], np.eye(6))
+
+
+def test_batch_fit_matches_per_series_fit():
+    """Testa que o ajuste em lote dá os mesmos coeficientes que ajustar série a série."""
+    sales = _sales(noise=5.0)
+    values = sales.receita.reshape(len(DAYS), -1)
+    coef, origin, scale = fit_seasonal(DAYS, values)
+    for column in range(values.shape[1]):
+        single, _, _ = fit_seasonal(DAYS, values[:, column])
+        np.testing.assert_allclose(coef[:, column], single[:, 0])
+
+
+def test_model_recovers_seasonal_series():
+    """Testa que uma série sem ruído é reproduzida e prevista exatamente."""
+    days = np.concatenate([DAYS, np.arange(DAYS[-1] + 1, DAYS[-1] + 31)])
+    series = _seasonal(days, 150.0, 0.1, 30.0, 20.0)
+    train = len(DAYS)
+    sales = _Sales(DAYS, series[:train].reshape(-1, 1, 1), ['A'], ['Sul'])
+    fit = fit_forecast_model(sales).select(['A'], ['Sul'])
+    np.testing.assert_allclose(fit.predict(days), series, atol=1e-6)
+
+
+def test_selection_equals_fit_of_summed_series():
+    """Testa que somar coeficientes equivale a ajustar a soma das séries selecionadas."""
+    sales = _sales(noise=20.0)
+    model = fit_forecast_model(sales)
+    summed = sales.receita[:, [0, 2]][:, :, [1]].sum(axis=(1, 2))
+    coef, origin, scale = fit_seasonal(DAYS, summed)
+    fit = model.select(['A', 'C', 'Desconhecida'], ['Sul'])
+    np.testing.assert_allclose(fit.coef, coef[:, 0])
+    assert model.n_series == 6
+
+
+def test_selection_fits_only_the_days_of_the_window():
+    """Testa que o ajuste de uma janela é o de ajustar só nos dias dela, sem ver os dias seguintes."""
+    sales = _sales(noise=20.0)
+    model = fit_forecast_model(sales)
+    window = slice(100, 400)
+    future = np.arange(DAYS[399] + 1, DAYS[399] + 31)
+    coef, origin, scale = fit_seasonal(DAYS[window], sales.receita[window].sum(axis=(1, 2)))
+    fit = model.select(['A', 'B', 'C'], ['Norte', 'Sul'], DAYS[100], DAYS[400])
+    np.testing.assert_allclose(fit.predict(future), seasonal_design(future, origin, scale) @ coef[:, 0], rtol=1e-6)
+
+    # Vendas depois da janela (aqui, triplicadas) não mudam a previsão dela
+    later = (DAYS >= DAYS[400])[:, None, None]
+    changed = _Sales(DAYS, np.where(later, sales.receita * 3, sales.receita), sales.categorias, sales.regioes)
+    refit = fit_forecast_model(changed).select(['A', 'B', 'C'], ['Norte', 'Sul'], DAYS[100], DAYS[400])
+    np.testing.assert_allclose(refit.predict(future), fit.predict(future), rtol=1e-6)
+    assert model.select(['A'], ['Sul'], DAYS[0], DAYS[model.min_days - 1]) is None
+
+
+def test_seasonal_forecast_shape():
+    """Testa o formato compatível com a previsão linear (dias contados desde o primeiro)."""
+    fit = fit_forecast_model(_sales()).select(['A', 'B', 'C'], ['Norte', 'Sul'])
+    observed = DAYS[10:100:3]
+    fitted, future_days, future_sales = seasonal_forecast(observed, fit)
+    assert len(fitted) == len(observed)
+    np.testing.assert_array_equal(future_days.ravel(), np.arange(88, 118))
+    assert len(future_sales) == 30
+    assert seasonal_forecast(observed, None) == (None, None, None)
+
+
+def test_backtest_prefers_seasonal_model():
+    """Testa que, em séries sazonais, o modelo sazonal erra menos que a reta fora da amostra."""
+    errors = backtest(_sales(noise=5.0), horizon=30)
+    assert set(errors) == {'celulas', 'categorias', 'regioes', 'total'}
+    for level in errors.values():
+        assert level['sazonal'] < level['linear']
+
+
+def test_too_few_days():
+    sales = _sales()
+    short = _Sales(DAYS[:20], sales.receita[:20], sales.categorias, sales.regioes)
+    assert fit_forecast_model(short) is None
+
+
+def test_memory_source_refits_on_append(make_sales):
+    """Testa que a fonte em memória reajusta o modelo com vendas novas (no máximo uma vez por intervalo) e o usa na previsão."""
+    rng = np.random.default_rng(1)
+    raw = lambda n, start, days: make_sales(n, start=start, days=days, categorias=('Eletrônicos', 'Roupas'),
+                                            produtos=2, rng=rng)
+
+    source = MemorySource(process_data(raw(3000, '2022-01-01', 300)), forecast_refit_interval=3600)
+    model = source.forecast
+    assert model is not None and model.n_series == 4
+    # Dentro do intervalo de reajuste o lote não refaz o ajuste; depois dele, sim
+    source.append(raw(100, '2022-10-28', 5))
+    assert source.forecast is model and not source.refresh_forecast()
+    assert source.refresh_forecast(force=True) and source.forecast is not model
+    assert not source.refresh_forecast(force=True)
+
+    filters = {'start_date': '2022-01-01', 'end_date': '2022-12-31', 'category': ['Roupas'], 'region': 'all'}
+    daily_sales, fitted, future_days, future_sales = source.select(filters).get_sales_forecast()
+    assert len(fitted) == len(daily_sales) and len(future_sales) == 30
+    # Sem o modelo sazonal, a previsão volta a ser a reta
+    linear = MemorySource(source.df, forecast_harmonics=None).select(filters).get_sales_forecast()
+    assert np.allclose(np.diff(linear[3], 2), 0)
+    assert not np.allclose(np.diff(future_sales, 2), 0)
+
+
+def test_past_forecast_ignores_later_sales(make_sales):
+    """Testa que a previsão de um período passado não muda com vendas posteriores a ele."""
+    rng = np.random.default_rng(2)
+    raw = lambda n, start, days: make_sales(n, start=start, days=days, categorias=('Eletrônicos', 'Roupas'),
+                                            produtos=2, rng=rng)
+    source = MemorySource(process_data(raw(3000, '2022-01-01', 300)), forecast_refit_interval=3600)
+    filters = {'start_date': '2022-01-01', 'end_date': '2022-06-30', 'category': 'all', 'region': ['Sul']}
+    before = source.select(filters).get_sales_forecast()
+
+    source.append(raw(2000, '2022-10-28', 60))
+    assert source.refresh_forecast(force=True)
+    after = source.select(filters).get_sales_forecast()
+    np.testing.assert_allclose(after[1], before[1])
+    np.testing.assert_allclose(after[3], before[3])
+    # Com a janela até o fim dos dados, o modelo reajustado usa as vendas novas
+    filters['end_date'] = '2023-12-31'
+    assert len(source.select(filters).get_sales_forecast()[1]) > len(before[1])
@@ -0,0 +1,145 @@
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+from utils.dashboard_query import compute_dashboard
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+from utils.ingest import FileTailer, Ingestor, append_records, register_ingest_endpoint
+
+FILTERS = [
+    {'start_date': '2022-01-01', 'end_date': '2023-12-31', 'category': 'all', 'region': 'all'},
+    {'start_date': '2022-01-01', 'end_date': '2022-03-01', 'category': ['Roupas'], 'region': 'all'},
+    {'start_date': '2022-06-01', 'end_date': '2022-12-31', 'category': ['Livros'], 'region': ['Sul']},
+]
+
+def _source(raw):
+    return MemorySource(process_data(raw.copy()), forecast_refit_interval=0)
+
+
+def test_append_matches_full_reload(make_sales):
+    """Testa que anexar lotes (inclusive fora de ordem) equivale a recarregar tudo."""
+    rng = np.random.default_rng(5)
+    base = make_sales(4000, start='2022-01-01', days=200, produtos=19, rng=rng)
+    source = _source(base)
+    batches = [
+        make_sales(300, start='2022-07-20', days=10, produtos=19, rng=rng),
+        make_sales(300, start='2022-07-30', days=10, produtos=19, rng=rng),
+        make_sales(50, start='2022-02-05', days=1, produtos=19, rng=rng),
+        make_sales(300, start='2022-08-09', days=10, produtos=19, rng=rng),
+    ]
+    for batch in batches:
+        source.append(batch)
+
+    reference = _source(pd.concat([base] + batches, ignore_index=True))
+    assert source.version == len(reference.df)
+    for filters in FILTERS:
+        result = compute_dashboard(source.select(filters).aggregates())
+        expected = compute_dashboard(reference.select(filters).aggregates())
+        assert np.allclose(result['kpis'], expected['kpis'])
+        pd.testing.assert_frame_equal(result['top_products'], expected['top_products'])
+        pd.testing.assert_frame_equal(result['sales_evolution'], expected['sales_evolution'])
+        assert np.allclose(result['sales_forecast'][3], expected['sales_forecast'][3])
+        sort_by = [{'column_id': 'receita', 'direction': 'desc'}]
+        assert source.page(source.make_handle(filters), 1, 5, sort_by) == reference.page(reference.make_handle(filters), 1, 5, sort_by)
+
+
+def test_append_invalidates_only_affected_slices(make_sales):
+    """Testa que só as fatias que recebem linhas novas são recalculadas."""
+    rng = np.random.default_rng(6)
+    source = _source(make_sales(2000, start='2022-01-01', days=200, produtos=19, rng=rng))
+    for filters in FILTERS:
+        source.make_handle(filters)
+    assert len(source.slices) == 3
+
+    source.append(make_sales(100, start='2022-07-20', days=5, produtos=19, rng=rng))
+    assert source._store is not None
+    remaining = {handle_filters['start_date'] for handle_filters in source.slices._filters.values()}
+    assert remaining == {'2022-01-01'} and len(source.slices) == 1
+
+
+def test_append_publishes_new_data_and_indexes_together(make_sales):
+    """Testa que a inclusão no lugar troca DataFrame, índices e cubo sem alterar os que já foram lidos."""
+    rng = np.random.default_rng(8)
+    source = _source(make_sales(2003, start='2022-01-01', days=200, produtos=19, rng=rng))
+    df, engine, cube = source.df, source.filter_engine, source.cube
+    before = engine.filter(FILTERS[2])
+
+    source.append(make_sales(100, start='2022-07-20', days=5, produtos=19, rng=rng))
+    assert source._store is not None
+    assert source.filter_engine is not engine and source.cube is not cube
+    assert source.filter_engine.n_rows == len(source.df) == len(df) + 100
+    assert engine.n_rows == len(df) and len(cube.dias) < len(source.cube.dias)
+    assert np.array_equal(engine.filter(FILTERS[2]), before)
+
+
+def test_data_version_changes_only_for_touched_selections(make_sales):
+    """Testa que a versão de cada seleção muda com os lotes que a tocam, e a de todas com outro dataset."""
+    rng = np.random.default_rng(7)
+    base = make_sales(2000, start='2022-01-01', days=200, produtos=19, rng=rng)
+    source = MemorySource(process_data(base.copy()), forecast_refit_interval=3600)
+    before = [source.make_handle(filters)['data_version'] for filters in FILTERS]
+
+    batch = make_sales(100, start='2022-07-20', days=5, produtos=19, rng=rng).assign(categoria='Roupas')
+    source.append(batch)
+    after = [source.data_version(filters) for filters in FILTERS]
+    assert after[0] != before[0] and after[1:] == before[1:]
+
+    # Reajuste do modelo de previsão: todas as séries mudam
+    assert source.refresh_forecast(force=True)
+    assert all(source.data_version(filters) not in (old, new) for filters, old, new in zip(FILTERS, before, after))
+
+    # Outro arquivo de dados (ex.: novo deploy) não reaproveita chaves, mesmo na primeira versão
+    other = _source(pd.concat([base, batch], ignore_index=True))
+    assert other.data_version(FILTERS[1]).split('-')[0] != source.dataset_id
+
+
+def test_file_tailer_reads_only_complete_lines(tmp_path):
+    """Testa a leitura incremental de CSV, inclusive linha ainda incompleta e rotação."""
+    path = tmp_path / 'vendas.csv'
+    path.write_text('data,valor,quantidade\n2022-01-01 10:00:00,10.5,1\n2022-01-01 11:00:00,20')
+    tailer = FileTailer(str(path))
+    assert tailer.poll()['valor'].tolist() == [10.5]
+    assert tailer.poll() is None
+    with open(path, 'a') as f:
+        f.write('.0,2\n')
+    assert tailer.poll()[['valor', 'quantidade']].values.tolist() == [[20.0, 2]]
+
+    path.write_text('data,valor,quantidade\n2022-01-02 10:00:00,30.0,3\n')
+    assert tailer.poll()['valor'].tolist() == [30.0]
+
+
+def test_ingest_endpoint_feeds_the_source(make_sales, tmp_path):
+    """Testa o caminho completo: POST no endpoint, leitura do arquivo e nova versão dos dados."""
+    rng = np.random.default_rng(7)
+    source = _source(make_sales(1000, start='2022-01-01', days=100, produtos=19, rng=rng))
+    path = str(tmp_path / 'ingest.jsonl')
+    server = Flask(__name__)
+    register_ingest_endpoint(server, path)
+    ingestor = Ingestor(source, FileTailer(path))
+
+    rows = json.loads(make_sales(20, start='2022-05-01', days=2, produtos=19, rng=rng).to_json(orient='records', date_format='iso'))
+    response = server.test_client().post('/api/ingest', json=rows)
+    assert response.status_code == 202 and response.get_json() == {'aceitas': 20}
+    assert server.test_client().post('/api/ingest', json=[{'data': '2022-05-03'}]).status_code == 400
+
+    assert ingestor.poll_once() == 20
+    assert source.version == 1020 and ingestor.stats['rows'] == 20
+    assert source.date_bounds()[1] >= pd.Timestamp('2022-05-01').date()
+
+
+def test_append_records_csv_keeps_header_order(tmp_path):
+    """Testa que registros anexados a um CSV seguem a ordem do cabeçalho existente."""
+    path = tmp_path / 'vendas.csv'
+    record = {'produto': 'Produto 1', 'data': '2022-01-01 10:00', 'valor': 1.5, 'quantidade': 2,
+              'categoria': 'Roupas', 'regiao': 'Sul'}
+    append_records(str(path), [record])
+    append_records(str(path), [record])
+    lines = path.read_text().splitlines()
+    assert lines[0] == 'produto,data,valor,quantidade,categoria,regiao'
+    assert lines[1] == lines[2]
+    with pytest.raises(ValueError):
+        append_records(str(path), [{'data': '2022-01-01'}])
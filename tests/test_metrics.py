@@ -0,0 +1,152 @@
+import os
+import time
+
+import dash
+import pytest
+from dash import Input, Output, dcc, html
+from dash.exceptions import PreventUpdate
+from utils import metrics
+from utils.metrics import Registry, SlowCallbackProfiler, cache_collector, merge_snapshots, render_text
+
+
+def _series(families, name):
+    return {tuple(labels): value for labels, value in families[name]['series']}
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram('latencia_seconds', 'Latência.', ['rota'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, '/a')
+    text = render_text(registry.snapshot())
+    assert '# TYPE latencia_seconds histogram' in text
+    assert 'latencia_seconds_bucket{rota="/a",le="0.1"} 1' in text
+    assert 'latencia_seconds_bucket{rota="/a",le="1"} 3' in text
+    assert 'latencia_seconds_bucket{rota="/a",le="+Inf"} 4' in text
+    assert 'latencia_seconds_count{rota="/a"} 4' in text
+    assert 'latencia_seconds_sum{rota="/a"} 4.25' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter('eventos_total', 'Eventos.', ['nome']).inc('a"b\\c\nd')
+    assert 'eventos_total{nome="a\\"b\\\\c\\nd"} 1' in render_text(registry.snapshot())
+
+
+def test_cache_collector_reports_hits_misses_and_bytes():
+    stats = {'l1': {'hits': 3, 'misses': 1, 'sets': 1, 'bytes_read': 10, 'bytes_written': 20}, 'fit': {'hits': 2, 'misses': 5}}
+    registry = Registry()
+    registry.register_collector(cache_collector(lambda: stats))
+    families = registry.snapshot()
+    requests = _series(families, 'dashboard_cache_requests_total')
+    assert requests[('l1', 'hit')] == 3 and requests[('l1', 'miss')] == 1
+    assert requests[('fit', 'miss')] == 5
+    assert _series(families, 'dashboard_cache_bytes_total')[('l1', 'written')] == 20
+
+
+def test_snapshots_from_workers_are_summed():
+    workers = []
+    for observations in ((0.01, 0.02), (0.3,)):
+        registry = Registry()
+        histogram = registry.histogram('callback_seconds', 'Callbacks.', ['callback'], buckets=(0.1,))
+        for value in observations:
+            histogram.observe(value, 'update')
+        registry.counter('callbacks_total', 'Callbacks.', ['callback']).inc('update', amount=len(observations))
+        workers.append(registry)
+
+    snapshots = [{'pid': pid, 'families': registry.snapshot()} for pid, registry in zip((os.getpid(), 1), workers)]
+    merged = merge_snapshots(snapshots)
+    assert _series(merged, 'callbacks_total')[('update',)] == 3
+    histogram = _series(merged, 'callback_seconds')[('update',)]
+    assert histogram['counts'] == [2, 1]
+    assert histogram['sum'] == pytest.approx(0.33)
+
+
+def test_gauges_of_dead_workers_are_dropped():
+    gauge = {'type': 'gauge', 'help': 'RSS.', 'labels': ['pid'], 'buckets': [], 'series': []}
+    counter = {'type': 'counter', 'help': 'Total.', 'labels': [], 'buckets': [], 'series': [[[], 4]]}
+    snapshots = [
+        {'pid': os.getpid(), 'families': {'rss': {**gauge, 'series': [[['vivo'], 100]]}, 'total': counter}},
+        {'pid': 2 ** 22 + 12345, 'families': {'rss': {**gauge, 'series': [[['morto'], 200]]}, 'total': counter}},
+    ]
+    merged = merge_snapshots(snapshots)
+    assert _series(merged, 'rss') == {('vivo',): 100}
+    assert _series(merged, 'total') == {(): 8}
+
+
+@pytest.fixture
+def dash_app():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Input(id='entrada'), html.Div(id='saida')])
+
+    @app.callback(Output('saida', 'children'), Input('entrada', 'value'))
+    def ecoar(value):
+        if value == 'nada':
+            raise PreventUpdate
+        with metrics.phase('compute'):
+            time.sleep(0.01)
+        return value * 100
+
+    return app
+
+
+def _call(app, value):
+    return app.server.test_client().post('/_dash-update-component', json={
+        'output': 'saida.children',
+        'outputs': {'id': 'saida', 'property': 'children'},
+        'inputs': [{'id': 'entrada', 'property': 'value', 'value': value}],
+        'changedPropIds': ['entrada.value'],
+    })
+
+
+def _count(name, labels):
+    entry = _series(metrics.registry.snapshot(), name).get(labels)
+    if entry is None:
+        return 0
+    return sum(entry['counts']) if isinstance(entry, dict) else entry
+
+
+def test_instrumented_callbacks_record_latency_phases_and_payload(dash_app):
+    metrics.instrument_callbacks(dash_app)
+    metrics.instrument_callbacks(dash_app)  # idempotente
+    before = {
+        'ok': _count('dashboard_callbacks_total', ('ecoar', 'ok')),
+        'no_update': _count('dashboard_callbacks_total', ('ecoar', 'no_update')),
+        'compute': _count('dashboard_callback_phase_seconds', ('ecoar', 'compute')),
+    }
+
+    response = _call(dash_app, 'x')
+    assert response.status_code == 200
+    assert _call(dash_app, 'nada').status_code == 204
+
+    assert _count('dashboard_callbacks_total', ('ecoar', 'ok')) == before['ok'] + 1
+    assert _count('dashboard_callbacks_total', ('ecoar', 'no_update')) == before['no_update'] + 1
+    assert _count('dashboard_callback_phase_seconds', ('ecoar', 'compute')) == before['compute'] + 1
+    payload = _series(metrics.registry.snapshot(), 'dashboard_callback_response_bytes')[('ecoar',)]
+    assert payload['sum'] >= len(response.get_data())
+
+
+def test_metrics_endpoint(dash_app):
+    metrics.register_metrics_endpoint(dash_app.server)
+    response = dash_app.server.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE dashboard_callback_seconds histogram' in response.get_data(as_text=True)
+
+
+def test_slow_callbacks_are_profiled(dash_app, tmp_path):
+    profiler = SlowCallbackProfiler(threshold=0.005, interval=0.001, directory=str(tmp_path))
+    metrics.instrument_callbacks(dash_app, profiler)
+    assert _call(dash_app, 'x').status_code == 200
+
+    profiles = list(tmp_path.glob('*-ecoar-*.folded'))
+    assert len(profiles) == 1
+    stacks = profiles[0].read_text().splitlines()
+    assert any('test_metrics.py:ecoar' in line for line in stacks)
+
+
+def test_fast_callbacks_are_not_profiled(tmp_path):
+    profiler = SlowCallbackProfiler(threshold=10, interval=0.001, directory=str(tmp_path))
+    token = profiler.begin()
+    assert profiler.end(token, 'rapido', 0.001) is None
+    assert not list(tmp_path.iterdir())
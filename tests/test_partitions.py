@@ -0,0 +1,47 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.cube import build_cube
+from utils.data_processor import process_data
+from utils.partitions import SalesPartitions, local_days
+
+
+@pytest.fixture(scope='module')
+def sales(make_sales):
+    return process_data(make_sales(20000, days=500, categorias=('Eletrônicos', 'Roupas', 'Livros', 'Móveis'),
+                                   regioes=('Norte', 'Sul', 'Leste'), produtos=100, hourly=False, cents=False))
+
+def test_local_days_matches_unique():
+    """Testa que o índice de dias em O(linhas) é o mesmo de np.unique."""
+    dia = np.random.default_rng(1).choice(np.arange(19000, 19031, 3), 500).astype(np.int32)
+    dias, inverso = local_days(dia)
+    expected_dias, expected_inverso = np.unique(dia, return_inverse=True)
+    np.testing.assert_array_equal(dias, expected_dias)
+    np.testing.assert_array_equal(inverso, expected_inverso)
+    assert dias.dtype == dia.dtype
+
+
+def test_partitions_are_monthly_blocks(sales):
+    """Testa as partições mensais, também com dados fora de ordem."""
+    partitions = SalesPartitions(sales)
+    shuffled = SalesPartitions(sales.sample(frac=1, random_state=0))
+
+    assert len(partitions) == 17 and partitions.n_rows == len(sales)
+    assert str(partitions.months[0]) == '2022-01' and str(partitions.months[-1]) == '2023-05'
+    for block, other in zip(partitions.blocks, shuffled.blocks):
+        months = block['dia'].astype('datetime64[D]').astype('datetime64[M]')
+        assert (months == months[0]).all()
+        np.testing.assert_allclose(np.sort(block['receita']), np.sort(other['receita']))
+
+
+def test_parallel_cube_matches_serial(sales):
+    """Testa que o cubo montado em paralelo (e a partir de dados fora de ordem) é o mesmo do serial."""
+    serial = build_cube(sales, workers=1)
+    for cube in (build_cube(sales, workers=4), build_cube(sales.sample(frac=1, random_state=0), workers=3)):
+        np.testing.assert_array_equal(cube.dias, serial.dias)
+        np.testing.assert_allclose(cube.receita, serial.receita)
+        np.testing.assert_array_equal(cube.quantidade, serial.quantidade)
+        np.testing.assert_array_equal(cube.linhas, serial.linhas)
+        pd.testing.assert_frame_equal(cube.tabela_produtos, serial.tabela_produtos, check_exact=False)
+
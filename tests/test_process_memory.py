@@ -0,0 +1,41 @@
+
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from utils.process_memory import child_pids, process_memory
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists('/proc/self/smaps_rollup'), reason="requer /proc/<pid>/smaps_rollup"
+)
+
+
+def test_process_memory_reports_shared_pages():
+    """Testa que os dados herdados por fork contam como compartilhados no filho."""
+    data = np.ones(32 * 1024 * 1024 // 8)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Filho: só lê os dados herdados e espera ser encerrado
+        data.sum()
+        os.write(write_fd, b'1')
+        signal.pause()
+        os._exit(0)
+    try:
+        os.read(read_fd, 1)
+        assert pid in child_pids(os.getpid())
+        memory = process_memory(pid)
+        assert memory['rss'] >= memory['pss'] >= memory['uss'] > 0
+        assert memory['rss'] - memory['uss'] >= data.nbytes
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_process_memory_missing_process():
+    """Testa que um processo inexistente retorna None."""
+    assert process_memory(2 ** 22 + 1) is None
@@ -0,0 +1,70 @@
+
+import numpy as np
+import pandas as pd
+from utils.analytics import get_sales_forecast, get_trend_analysis
+from utils.regression import PrefixStats, SufficientStats, cached_fit, clear_fit_cache
+
+
+def _points(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.choice(np.arange(1000), n, replace=False))
+    y = 3.5 * x + 100 + rng.normal(0, 50, n)
+    return x, y
+
+
+def test_fit_matches_polyfit():
+    """Testa o ajuste em forma fechada contra o polyfit do NumPy."""
+    x, y = _points()
+    fit = SufficientStats.from_points(x, y).fit()
+    slope, intercept = np.polyfit(x, y, 1)
+    assert np.isclose(fit.slope, slope)
+    assert np.isclose(fit.intercept, intercept)
+
+
+def test_stats_merge_and_shift():
+    """Testa que estatísticas somadas e deslocadas equivalem a recalcular nos pontos."""
+    x, y = _points()
+    merged = SufficientStats.from_points(x[:80], y[:80]) + SufficientStats.from_points(x[80:], y[80:])
+    shifted = merged.shift(x[0]).fit()
+    expected = SufficientStats.from_points(x - x[0], y).fit()
+    assert np.allclose(shifted, expected)
+
+
+def test_prefix_stats_range():
+    """Testa o ajuste de um intervalo a partir das estatísticas acumuladas."""
+    x, y = _points()
+    prefix = PrefixStats(x, y)
+    mask = (x >= 250) & (x < 700)
+    expected = SufficientStats.from_points(x[mask] - x[mask][0], y[mask]).fit()
+    assert np.allclose(prefix.range(250, 700).fit(), expected)
+    assert prefix.range(2000, 3000).fit() is None
+
+
+def test_degenerate_fit():
+    """Testa que um único ponto não gera reta."""
+    assert SufficientStats.from_points([5], [10]).fit() is None
+
+
+def test_cached_fit():
+    """Testa o cache de ajustes por chave de filtros."""
+    clear_fit_cache()
+    calls = []
+    compute = lambda: calls.append(1) or SufficientStats.from_points([0, 1], [0, 2]).fit()
+    first = cached_fit('k', compute)
+    assert cached_fit('k', compute) == first
+    assert len(calls) == 1
+
+
+def test_trend_does_not_mutate_input():
+    """Testa que tendência e previsão não alteram o DataFrame recebido."""
+    dff = pd.DataFrame({
+        'data': ['2022-01-01', '2022-01-02', '2022-01-05'],
+        'receita': [10.0, 20.0, 50.0],
+    })
+    original = dff.copy()
+    daily_sales, trend_line = get_trend_analysis(dff)
+    _, _, future_days, future_sales = get_sales_forecast(dff)
+    pd.testing.assert_frame_equal(dff, original)
+    assert daily_sales['dias_desde_inicio'].tolist() == [0, 1, 4]
+    assert future_days.shape == (30, 1)
+    assert np.allclose(trend_line, np.polyval(np.polyfit([0, 1, 4], [10, 20, 50], 1), [0, 1, 4]))
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.data_processor import process_data
+from utils.sample_data import generate_chunk, region_names, write_dataset
+
+
+def test_output_does_not_depend_on_worker_count(tmp_path):
+    single, pooled = tmp_path / 'um.csv', tmp_path / 'varios.csv'
+    write_dataset(str(single), 25_000, chunk_rows=4_000, workers=1)
+    write_dataset(str(pooled), 25_000, chunk_rows=4_000, workers=3)
+    assert single.read_bytes() == pooled.read_bytes()
+
+
+def test_csv_and_parquet_partitions_hold_the_same_rows(tmp_path):
+    write_dataset(str(tmp_path / 'vendas.csv'), 10_000, chunk_rows=3_000, workers=2)
+    write_dataset(str(tmp_path / 'vendas'), 10_000, chunk_rows=3_000, workers=2, output_format='parquet')
+
+    from_csv = pd.read_csv(tmp_path / 'vendas.csv', parse_dates=['data'])
+    partitions = sorted((tmp_path / 'vendas').glob('part-*.parquet'))
+    assert len(partitions) == 4
+    from_parquet = pd.concat([pd.read_parquet(p) for p in partitions], ignore_index=True)
+
+    assert len(from_csv) == len(from_parquet) == 10_000
+    assert (from_csv['data'] == from_parquet['data']).all()
+    np.testing.assert_allclose(from_csv['receita'], from_parquet['receita'])
+    assert list(from_csv['produto']) == list(from_parquet['produto'].astype(str))
+
+
+def test_rows_are_sorted_by_date_across_chunks():
+    chunks = [generate_chunk(i, 1_000, 5_000) for i in range(5)]
+    datas = pd.concat([c['data'] for c in chunks], ignore_index=True)
+    assert datas.is_monotonic_increasing
+    assert datas.min() >= pd.Timestamp('2022-01-01') and datas.max() < pd.Timestamp('2025-01-01')
+
+
+def test_seeds_and_chunks_give_independent_streams():
+    a, b = generate_chunk(0, 1_000, 2_000, seed=1), generate_chunk(1, 1_000, 2_000, seed=1)
+    assert not np.array_equal(a['valor'], b['valor'])
+    pd.testing.assert_frame_equal(a, generate_chunk(0, 1_000, 2_000, seed=1))
+    assert not generate_chunk(0, 1_000, 2_000, seed=2)['valor'].equals(a['valor'])
+
+
+def test_cardinalities_and_zipf_skew():
+    chunk = generate_chunk(0, 50_000, 50_000, n_products=500, n_regions=10, product_skew=1.2)
+    counts = chunk['produto'].value_counts()
+    assert len(chunk['produto'].cat.categories) == 500
+    assert counts.index[0] == 'Produto 1'
+    assert counts['Produto 1'] > 10 * counts.get('Produto 100', 0)
+    assert list(chunk['regiao'].cat.categories) == region_names(10)
+    assert region_names(10)[:7] == ['Norte', 'Sul', 'Leste', 'Oeste', 'Centro', 'Nordeste', 'Sudeste']
+
+    uniform = generate_chunk(0, 50_000, 50_000, n_products=10, product_skew=0)['produto'].value_counts()
+    assert uniform.max() / uniform.min() < 1.2
+
+
+@pytest.mark.parametrize('seasonality', [0.0, 0.6])
+def test_seasonality_shapes_the_timestamps(seasonality):
+    chunk = generate_chunk(0, 100_000, 100_000, seasonality=seasonality)
+    by_month = chunk['data'].dt.month.value_counts()
+    weekend = (chunk['data'].dt.dayofweek >= 5).mean()
+    if seasonality == 0:
+        assert by_month[12] / by_month[6] == pytest.approx(1, abs=0.1)
+        assert weekend == pytest.approx(2 / 7, abs=0.01)
+    else:
+        assert by_month[12] > 1.5 * by_month[6]
+        assert weekend > 2 / 7 + 0.05
+
+
+def test_generated_data_fits_the_dashboard_schema():
+    df = process_data(generate_chunk(0, 2_000, 2_000))
+    assert {'mes', 'ano', 'dia'} <= set(df.columns)
+    assert df['mes'].dtype == np.int32
+    assert list(df['categoria'].cat.categories[:2]) == ['Eletrônicos', 'Roupas']
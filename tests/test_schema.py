@@ -0,0 +1,58 @@
+
+import numpy as np
+import pandas as pd
+from components.filters import create_category_filter
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+from utils.schema import CATEGORIAS, apply_schema, memory_report, month_label
+
+
+def _raw():
+    return pd.DataFrame({
+        'data': pd.to_datetime(['2022-01-31 23:00', '2022-02-01 01:00', '2023-12-15 00:00']),
+        'valor': [10.5, 20.25, 30.0],
+        'quantidade': [1, 2, 3],
+        'categoria': ['Roupas', 'Livros', 'Roupas'],
+        'regiao': ['Sul', 'Sul', 'Norte'],
+        'produto': ['Produto 10', 'Produto 2', 'Produto 10'],
+        'receita': [10.5, 40.5, 90.0],
+    })
+
+
+def test_apply_schema_types():
+    """Testa os tipos compactos aplicados pelo schema."""
+    df = apply_schema(_raw())
+    assert list(df['categoria'].cat.categories) == CATEGORIAS
+    assert list(df['produto'].cat.categories) == ['Produto 2', 'Produto 10']
+    assert df['mes'].tolist() == [202201, 202202, 202312]
+    assert df['dia'].dtype == np.int32
+    assert df['ano'].dtype == np.int16
+    assert df['quantidade'].dtype == np.int8
+    # Centavos exatos: seguro em float32
+    assert df['valor'].dtype == np.float32
+
+
+def test_apply_schema_keeps_inexact_money():
+    """Testa que valores sem precisão de centavos continuam em float64."""
+    raw = _raw()
+    raw['receita'] = raw['receita'] / 7
+    assert apply_schema(raw)['receita'].dtype == np.float64
+
+
+def test_month_label():
+    """Testa a conversão do código de mês para rótulo."""
+    assert month_label([202201, 202312]).tolist() == ['2022-01', '2023-12']
+
+
+def test_memory_report():
+    """Testa o relatório de memória por coluna."""
+    raw = pd.concat([_raw()] * 200, ignore_index=True)
+    report = memory_report(raw, apply_schema(raw.copy()))
+    assert report.loc['categoria', 'depois'] < report.loc['categoria', 'antes']
+    assert 'total' in report.index
+
+
+def test_filters_use_schema_order():
+    """Testa que o filtro de categoria lista apenas valores presentes, na ordem do schema."""
+    dropdown = create_category_filter(MemorySource(process_data(_raw())).dimension_values('categoria'))
+    assert [opt['value'] for opt in dropdown.options] == ['Roupas', 'Livros']
@@ -0,0 +1,65 @@
+
+import threading
+import time
+
+import pytest
+from utils.single_flight import SingleFlight
+
+
+def _concurrently(n, target):
+    results = []
+    errors = []
+
+    def run():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_single_flight_shares_execution():
+    """Testa que chamadas simultâneas com a mesma chave executam a computação uma vez."""
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'resultado'
+
+    results, errors = _concurrently(5, lambda: flight.do('k', compute))
+    assert results == ['resultado'] * 5
+    assert not errors
+    assert len(calls) == 1
+    assert flight.stats == {'executions': 1, 'shared': 4}
+
+
+def test_single_flight_propagates_errors():
+    """Testa que a exceção do líder chega a todos e que a chave não fica presa."""
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError('falhou')
+
+    results, errors = _concurrently(3, lambda: flight.do('k', fail))
+    assert not results
+    assert len(errors) == 3 and all(isinstance(e, ValueError) for e in errors)
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_single_flight_distinct_keys():
+    """Testa que chaves diferentes não se bloqueiam nem compartilham resultados."""
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do('c', lambda: {}['x'])
+    assert flight.stats['executions'] == 3
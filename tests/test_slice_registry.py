@@ -0,0 +1,76 @@
+
+import numpy as np
+import pandas as pd
+from utils.slice_registry import SliceRegistry, compact_rows, take_rows
+
+
+def _filters(category='all'):
+    return {
+        'start_date': '2022-01-01',
+        'end_date': '2022-12-31',
+        'category': category,
+        'region': 'all',
+    }
+
+
+def test_compact_rows():
+    """Testa a compactação de linhas contíguas em slice."""
+    assert compact_rows(np.arange(3, 8)) == slice(3, 8)
+    rows = compact_rows(np.array([1, 4, 9]))
+    assert isinstance(rows, np.ndarray)
+    assert rows.dtype == np.int32
+
+
+def test_take_rows():
+    """Testa a resolução das linhas registradas para o DataFrame."""
+    df = pd.DataFrame({'receita': [1.0, 2.0, 3.0, 4.0]})
+    assert take_rows(df, slice(1, 3))['receita'].tolist() == [2.0, 3.0]
+    assert take_rows(df, np.array([0, 3]))['receita'].tolist() == [1.0, 4.0]
+
+
+def test_registry_handle_is_small():
+    """Testa que o handle carrega apenas a impressão digital, versão e filtros."""
+    registry = SliceRegistry()
+    handle = registry.make_handle(_filters())
+    assert set(handle) == {'key', 'version', 'filters'}
+    assert handle == registry.make_handle(_filters())
+
+
+def test_registry_eviction():
+    """Testa o descarte LRU por número de entradas e por bytes."""
+    registry = SliceRegistry(max_entries=2, max_bytes=1000)
+    handles = [registry.make_handle(_filters(cat)) for cat in ('a', 'b', 'c')]
+    for handle in handles:
+        registry.put(handle, np.arange(0, 20, 2, dtype=np.int32))
+    assert len(registry) == 2
+    assert registry.get(handles[0]) is None
+
+    registry.put(registry.make_handle(_filters('d')), np.arange(0, 600, 2, dtype=np.int32))
+    assert registry.nbytes <= 1000
+
+
+def test_registry_recomputes_after_version_bump():
+    """Testa que handles antigos são recalculados após mudança de versão."""
+    registry = SliceRegistry()
+    handle = registry.make_handle(_filters())
+    registry.put(handle, slice(0, 10))
+    registry.bump_version()
+    assert registry.get(handle) is None
+    rows = registry.get_rows(handle, lambda filters: slice(0, 5))
+    assert rows == slice(0, 5)
+    assert registry.get(registry.make_handle(_filters())) == slice(0, 5)
+
+
+def test_registry_advance_version_keeps_unaffected():
+    """Testa que uma nova versão invalida só as fatias afetadas."""
+    registry = SliceRegistry()
+    roupas, livros = registry.make_handle(_filters('Roupas')), registry.make_handle(_filters('Livros'))
+    registry.put(roupas, np.array([1, 5], dtype=np.int32))
+    registry.put(livros, np.array([2, 7], dtype=np.int32))
+
+    registry.advance_version(10, lambda filters: filters['category'] == 'Roupas')
+    assert registry.version == 10
+    assert registry.get(roupas) is None
+    assert registry.get(registry.make_handle(_filters('Roupas'))) is None
+    assert registry.get(registry.make_handle(_filters('Livros'))).tolist() == [2, 7]
+    assert registry.nbytes == 8
@@ -0,0 +1,45 @@
+
+import os
+import pandas as pd
+from utils.data_processor import load_data
+from utils.snapshot import read_snapshot_fingerprint, snapshot_path
+
+
+def _write_csv(path, n):
+    pd.DataFrame({
+        'data': pd.date_range('2022-01-01', periods=n, freq='h'),
+        'valor': [10.0] * n,
+        'quantidade': [2] * n,
+        'categoria': ['Livros', 'Roupas'] * (n // 2),
+        'regiao': ['Sul'] * n,
+        'produto': ['Produto 1'] * n,
+        'receita': [20.0] * n,
+    }).to_csv(path, index=False)
+
+
+def test_load_data_writes_snapshot(tmp_path):
+    """Testa a geração do snapshot na primeira carga e sua reutilização."""
+    csv = str(tmp_path / 'vendas.csv')
+    _write_csv(csv, 10)
+
+    df = load_data(csv, snapshot=True)
+    assert os.path.exists(snapshot_path(csv))
+    assert isinstance(df['categoria'].dtype, pd.CategoricalDtype)
+    assert 'mes' in df.columns
+
+    cached = load_data(csv, snapshot=True)
+    pd.testing.assert_frame_equal(cached, df)
+
+
+def test_snapshot_rebuilt_when_csv_changes(tmp_path):
+    """Testa que o snapshot é regenerado quando o CSV muda."""
+    csv = str(tmp_path / 'vendas.csv')
+    _write_csv(csv, 10)
+    load_data(csv, snapshot=True)
+    before = read_snapshot_fingerprint(snapshot_path(csv))
+
+    _write_csv(csv, 20)
+    os.utime(csv, ns=(before['mtime_ns'] + 10**9, before['mtime_ns'] + 10**9))
+    df = load_data(csv, snapshot=True)
+    assert len(df) == 20
+    assert read_snapshot_fingerprint(snapshot_path(csv)) != before
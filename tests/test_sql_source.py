@@ -0,0 +1,122 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils import analytics
+from utils.dashboard_query import compute_dashboard
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+from utils.sql_source import SqlSource, create_sql_engine, write_sales_table
+
+
+@pytest.fixture(scope='module')
+def sales(make_sales):
+    return process_data(make_sales(3000, seed=3, days=300, regioes=('Norte', 'Sul', 'Leste'), produtos=24))
+
+@pytest.fixture(scope='module')
+def source(sales, tmp_path_factory):
+    engine = create_sql_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'vendas.db'}")
+    write_sales_table(sales, engine)
+    return SqlSource(engine)
+
+
+FILTERS = [
+    {'start_date': '2022-01-01', 'end_date': '2022-12-31', 'category': 'all', 'region': 'all'},
+    {'start_date': '2022-02-10', 'end_date': '2022-07-31', 'category': ['Roupas'], 'region': 'all'},
+    {'start_date': '2022-03-01', 'end_date': '2022-09-30', 'category': ['Livros', 'Roupas'], 'region': ['Sul']},
+]
+
+
+def _slice(df, filters):
+    start = pd.Timestamp(filters['start_date'])
+    end = pd.Timestamp(filters['end_date']) + pd.Timedelta(days=1)
+    dff = df[(df['data'] >= start) & (df['data'] < end)]
+    for key, column in (('category', 'categoria'), ('region', 'regiao')):
+        if filters[key] != 'all':
+            dff = dff[dff[column].isin(filters[key])]
+    return dff
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_sql_panels_match_analytics(sales, source, filters):
+    """Testa que cada GROUP BY do banco reproduz a função de análise correspondente."""
+    sql_slice = source.select(filters)
+    dff = _slice(sales, filters)
+
+    assert np.allclose(sql_slice.calculate_kpis(), analytics.calculate_kpis(dff))
+    pd.testing.assert_frame_equal(sql_slice.get_sales_evolution(), analytics.get_sales_evolution(dff), check_dtype=False)
+    pd.testing.assert_frame_equal(
+        sql_slice.get_sales_by_category(), analytics.get_sales_by_category(dff), check_categorical=False, check_dtype=False
+    )
+    pd.testing.assert_frame_equal(
+        sql_slice.get_top_products(), analytics.get_top_products(dff), check_categorical=False, check_dtype=False
+    )
+    pd.testing.assert_frame_equal(
+        sql_slice.get_region_heatmap_data(), analytics.get_region_heatmap_data(dff),
+        check_categorical=False, check_names=False, check_index_type=False, check_column_type=False, check_dtype=False,
+    )
+    # Série diária por dia de calendário, como no cubo
+    daily_sales, trend_line = sql_slice.get_trend_analysis()
+    expected_daily, expected_trend = MemorySource(sales).select(filters).get_trend_analysis()
+    pd.testing.assert_frame_equal(daily_sales, expected_daily, check_dtype=False)
+    assert np.allclose(trend_line, expected_trend)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_sql_aggregates_match_memory(sales, source, filters):
+    """Testa que o dashboard calculado no banco é igual ao calculado em memória."""
+    sql = compute_dashboard(source.select(filters).aggregates())
+    memory = compute_dashboard(MemorySource(sales).select(filters).aggregates())
+
+    assert np.allclose(sql['kpis'], memory['kpis'])
+    for name in ('sales_evolution', 'category_sales', 'top_products'):
+        pd.testing.assert_frame_equal(sql[name], memory[name], check_categorical=False, check_dtype=False)
+    assert np.allclose(sql['region_heatmap'].to_numpy(), memory['region_heatmap'].to_numpy())
+    assert np.allclose(sql['sales_forecast'][3], memory['sales_forecast'][3])
+
+
+def test_sql_page_matches_memory(sales, source):
+    """Testa paginação, ordenação e filtro da tabela executados no banco."""
+    memory = MemorySource(sales)
+    filters = FILTERS[1]
+    sort_by = [{'column_id': 'receita', 'direction': 'desc'}]
+    filter_query = '{regiao} icontains "sul" && {quantidade} >= 3'
+
+    sql_records, sql_pages = source.page(source.make_handle(filters), 2, 7, sort_by, filter_query)
+    mem_records, mem_pages = memory.page(memory.make_handle(filters), 2, 7, sort_by, filter_query)
+
+    assert sql_pages == mem_pages
+    assert [r['receita'] for r in sql_records] == pytest.approx([r['receita'] for r in mem_records])
+    assert all(r['regiao'] == 'Sul' and r['quantidade'] >= 3 for r in sql_records)
+
+
+def test_sql_metadata_and_frame(sales, source):
+    """Testa limites de data, valores das dimensões e a exportação da seleção."""
+    assert source.date_bounds() == (sales['data'].min().date(), sales['data'].max().date())
+    assert source.dimension_values('categoria') == ['Eletrônicos', 'Roupas', 'Livros']
+    frame = source.frame(source.make_handle(FILTERS[2]))
+    assert len(frame) == len(_slice(sales, FILTERS[2]))
+    assert pd.api.types.is_datetime64_any_dtype(frame['data'])
+
+
+def test_iter_frames_streams_the_selection(source):
+    handle = source.make_handle(FILTERS[2])
+    chunks = list(source.iter_frames(handle, chunk_rows=100))
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == source.count(handle)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), source.frame(handle))
+
+
+def test_version_follows_the_table(sales, tmp_path):
+    """Testa que a versão vem da tabela, relida só depois de `version_ttl`."""
+    engine = create_sql_engine(f"sqlite:///{tmp_path / 'vendas.db'}")
+    write_sales_table(sales.iloc[:100], engine)
+    source = SqlSource(engine, forecast_harmonics=None, version_ttl=3600)
+    version = source.version
+    assert version.startswith('100-')
+
+    write_sales_table(sales.iloc[100:150], engine)
+    assert source.version == version
+    source.version_ttl = 0
+    handle = source.make_handle(FILTERS[0])
+    assert source.version.startswith('150-') and handle['version'] == handle['data_version'] == source.version
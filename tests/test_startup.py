@@ -0,0 +1,145 @@
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import fakeredis
+import pytest
+from flask import Flask
+from utils import cache as cache_module
+from utils.cache import RedisConnector, ResultCache
+from utils.data_processor import process_data
+from utils.data_source import MemorySource
+from utils.startup import (
+    DeferredSource,
+    SourceMetadata,
+    SourceNotReady,
+    file_fingerprint,
+    register_startup_endpoints,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def source(make_sales):
+    return MemorySource(process_data(make_sales(2000, days=200, hourly=False, cents=False)), forecast_harmonics=None)
+
+def test_metadata_roundtrip_and_staleness(source, tmp_path):
+    """Testa que os metadados gravados reproduzem o que o layout lê da fonte e que versões velhas são ignoradas."""
+    data_path = tmp_path / 'vendas.csv'
+    data_path.write_text('data\n')
+    path = str(tmp_path / 'vendas.meta.json')
+    fingerprint = file_fingerprint(data_path)
+
+    SourceMetadata.from_source(source, fingerprint).save(path)
+    metadata = SourceMetadata.load(path, fingerprint)
+
+    assert metadata.date_bounds() == source.date_bounds()
+    for column in ('categoria', 'regiao'):
+        assert metadata.dimension_values(column) == source.dimension_values(column)
+    assert metadata.version == source.version
+    assert list(metadata.columns) == list(source.columns)
+    assert (metadata.columns['data'], metadata.columns['receita'], metadata.columns['categoria']) == ('datetime', 'numeric', 'text')
+
+    data_path.write_text('data\n2022-01-01\n')
+    assert SourceMetadata.load(path, file_fingerprint(data_path)) is None
+    assert SourceMetadata.load(str(tmp_path / 'ausente.json'), fingerprint) is None
+    with open(path, 'w') as f:
+        f.write('{"format": 1')
+    assert SourceMetadata.load(path, fingerprint) is None
+
+
+def test_deferred_source_waits_for_the_load(source):
+    """Testa a espera pela carga, os metadados durante ela e o repasse dos atributos depois."""
+    release = threading.Event()
+    metadata = SourceMetadata.from_source(source)
+    deferred = DeferredSource(lambda: release.wait() and source, metadata=metadata, timeout=5)
+    loaded = []
+    deferred.when_ready(loaded.append)
+    deferred.start()
+
+    assert not deferred.ready
+    assert deferred.describe() is metadata
+    with pytest.raises(SourceNotReady):
+        deferred.wait(timeout=0.01)
+
+    release.set()
+    assert deferred.version == source.version
+    deferred._thread.join(timeout=5)
+    assert deferred.ready and deferred.describe() is source and loaded == [source]
+    deferred.when_ready(loaded.append)
+    assert loaded == [source, source]
+    deferred.start()
+    assert deferred.load_seconds is not None
+
+
+def test_deferred_source_without_metadata():
+    """Testa o layout de validação sem metadados e a falha da carga."""
+    def fail():
+        raise FileNotFoundError('vendas.csv')
+
+    deferred = DeferredSource(fail, timeout=5)
+    empty = deferred.describe(wait=False)
+    assert empty.date_bounds() == (None, None) and empty.dimension_values('categoria') == [] and empty.columns == {}
+
+    deferred.load()
+    assert isinstance(deferred.error, FileNotFoundError)
+    with pytest.raises(SourceNotReady, match='Falha'):
+        deferred.make_handle({})
+    with pytest.raises(AttributeError):
+        deferred._privado
+
+
+def test_startup_endpoints(source):
+    """Testa /health, /ready e a resposta 503 de quem esperou a carga além do limite."""
+    release = threading.Event()
+    deferred = DeferredSource(lambda: release.wait() and source, timeout=0.01)
+    server = Flask(__name__)
+    register_startup_endpoints(server, deferred)
+    server.add_url_rule('/versao', 'versao', lambda: {'versao': deferred.version})
+    client = server.test_client()
+    deferred.start()
+
+    assert client.get('/health').status_code == 200
+    assert client.get('/ready').status_code == 503
+    response = client.get('/versao')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+
+    release.set()
+    deferred.wait(timeout=5)
+    assert client.get('/ready').json['status'] == 'pronto'
+    assert client.get('/versao').json == {'versao': source.version}
+
+    failed = Flask(__name__)
+    broken = DeferredSource(lambda: 1 / 0)
+    broken.load()
+    register_startup_endpoints(failed, broken)
+    assert failed.test_client().get('/health').status_code == 503
+
+
+def test_redis_connector_attaches_client_in_background(monkeypatch):
+    """Testa que os caches funcionam sem Redis e recebem o cliente quando a conexão sai."""
+    client = fakeredis.FakeRedis()
+    attempts = iter([None, client])
+    monkeypatch.setattr(cache_module, 'create_redis_client', lambda url: next(attempts))
+    caches = (ResultCache(redis_client=None),)
+    connector = RedisConnector('redis://inacessivel:6379/0', caches, retry_interval=0.01)
+
+    connector.start()
+    connector._thread.join(timeout=5)
+
+    assert connector.client is client
+    assert all(target.redis_client is client for target in caches)
+    RedisConnector('', caches).start()
+
+
+def test_lazy_app_import_skips_heavy_modules(tmp_path):
+    """Testa que, na partida rápida, importar o app não carrega os dados, o pandas nem o plotly.express."""
+    env = dict(os.environ, LAZY_STARTUP='True', DATA_PATH=str(tmp_path / 'vendas.csv'), REDIS_URL='',
+               CACHE_WARMING='False', METRICS_ENABLED='False')
+    script = "import json, sys, app; print(json.dumps([m for m in ('pandas', 'plotly.express', 'pyarrow') if m in sys.modules]))"
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert json.loads(output.stdout.strip().splitlines()[-1]) == []
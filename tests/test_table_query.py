@@ -0,0 +1,66 @@
+
+import numpy as np
+import pandas as pd
+from utils.data_processor import process_data
+from utils.table_query import page_records, parse_filter_query, query_rows
+
+
+def _sales():
+    df = pd.DataFrame({
+        'data': pd.date_range('2022-01-30', periods=6, freq='D'),
+        'valor': [10.0, 50.0, 20.0, 40.0, 30.0, 60.0],
+        'quantidade': [1, 2, 3, 4, 5, 6],
+        'categoria': ['Roupas', 'Livros', 'Roupas', 'Móveis', 'Livros', 'Roupas'],
+        'regiao': ['Sul'] * 6,
+        'produto': ['Produto 1', 'Produto 2', 'Produto 10', 'Produto 3', 'Produto 2', 'Produto 1'],
+    })
+    df['receita'] = df['valor'] * df['quantidade']
+    return process_data(df)
+
+
+def test_parse_filter_query():
+    """Testa a leitura da linguagem de filtro do DataTable."""
+    conditions = parse_filter_query('{receita} >= 100 && {categoria} icontains "rou" && {x} ??? 1')
+    assert conditions == [('receita', 'ge', 100.0, True), ('categoria', 'contains', 'rou', False)]
+
+
+def test_query_rows_filter_and_sort():
+    """Testa filtro e ordenação vetorizados sobre uma fatia."""
+    df = _sales()
+    rows = query_rows(df, slice(1, 6), '{categoria} != Móveis && {valor} > 15',
+                      [{'column_id': 'receita', 'direction': 'desc'}])
+    assert df['receita'].iloc[rows].tolist() == [360.0, 150.0, 100.0, 60.0]
+
+
+def test_query_rows_dates_and_categories():
+    """Testa prefixo de data e ordenação alfabética de categóricas."""
+    df = _sales()
+    rows = query_rows(df, np.arange(6), '{data} datestartswith 2022-02', [{'column_id': 'categoria', 'direction': 'asc'}])
+    assert df['categoria'].iloc[rows].tolist() == ['Livros', 'Móveis', 'Roupas', 'Roupas']
+
+
+def test_query_rows_without_query_keeps_slice():
+    """Testa que sem filtro nem ordenação a fatia continua um slice."""
+    assert query_rows(_sales(), slice(0, 6), '', []) == slice(0, 6)
+
+
+def test_page_records():
+    """Testa que só a página pedida é materializada."""
+    df = _sales()
+    records, page_count = page_records(df, slice(1, 6), 1, 2, columns=['valor'])
+    assert records == [{'valor': 40.0}, {'valor': 30.0}]
+    assert page_count == 3
+    records, _ = page_records(df, np.array([5, 0]), 9, 1, columns=['valor'])
+    assert records == [{'valor': 10.0}]
+
+
+def test_month_shown_and_filtered_as_label():
+    """Testa que o mês (código AAAAMM no schema) aparece e é filtrado como 'AAAA-MM'."""
+    df = _sales()
+    records, _ = page_records(df, slice(0, 6), 0, 6, columns=['mes', 'valor'])
+    assert [record['mes'] for record in records] == ['2022-01', '2022-01', '2022-02', '2022-02', '2022-02', '2022-02']
+    assert df['mes'].dtype == np.int32
+
+    rows = query_rows(df, slice(0, 6), '{mes} = 2022-01', [{'column_id': 'mes', 'direction': 'desc'}])
+    assert df['valor'].iloc[rows].tolist() == [10.0, 50.0]
+    assert len(query_rows(df, slice(0, 6), '{mes} >= "2022-02"')) == 4
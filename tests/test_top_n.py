@@ -0,0 +1,97 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.cube import build_cube
+from utils.data_processor import process_data
+from utils.top_n import top_n_indices
+
+FILTERS = [
+    {'start_date': '2022-01-01', 'end_date': '2022-12-31', 'category': 'all', 'region': 'all'},
+    {'start_date': '2022-02-10', 'end_date': '2022-09-20', 'category': ['Roupas'], 'region': 'all'},
+    {'start_date': '2022-03-01', 'end_date': '2022-05-31', 'category': ['Livros', 'Roupas'], 'region': ['Sul']},
+    {'start_date': '2022-04-03', 'end_date': '2022-04-17', 'category': 'all', 'region': ['Norte']},
+]
+
+
+@pytest.fixture(scope='module')
+def sales(make_sales):
+    rng = np.random.default_rng(7)
+    # Popularidade de Zipf: poucos produtos concentram a receita, muitos vendem pouco
+    raw = lambda n, start, days: make_sales(n, start=start, days=days, produtos=2000, zipf=True, rng=rng)
+    base = raw(20000, '2022-01-01', 240)
+    # Lotes ao vivo: todos os produtos já existem na base, para o cubo anexar sem reconstruir
+    batches = [raw(1500, '2022-08-29', 20), raw(4000, '2022-09-18', 30)]
+    batches = [b[b['produto'].isin(base['produto'])] for b in batches]
+    return base, batches
+
+def test_top_n_indices():
+    """Testa a seleção por argpartition contra a ordenação completa."""
+    rng = np.random.default_rng(0)
+    values = rng.random(1000)
+    mask = rng.random(1000) > 0.3
+    expected = np.flatnonzero(mask)[np.argsort(-values[mask])][:10]
+    np.testing.assert_array_equal(top_n_indices(values, 10, mask), expected)
+    assert len(top_n_indices(values[:5], 10)) == 5
+    assert len(top_n_indices(values, 0)) == 0
+
+
+def _scan_totals(df, produtos, filters):
+    """Receita e linhas por produto da seleção, agrupando as linhas brutas."""
+    end = pd.Timestamp(filters['end_date']) + pd.Timedelta(days=1)
+    mask = (df['data'] >= filters['start_date']) & (df['data'] < end)
+    for key, column in (('category', 'categoria'), ('region', 'regiao')):
+        if filters[key] != 'all':
+            mask &= df[column].isin(filters[key])
+    totals = df[mask].groupby('produto', observed=True)['receita'].agg(['sum', 'size'])
+    totals = totals.reindex(produtos, fill_value=0)
+    return totals['sum'].to_numpy(), totals['size'].to_numpy()
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_exact_totals_match_scan(sales, filters):
+    """Testa o índice célula → dia contra as linhas agrupadas, antes e depois de anexar (cauda e nova cópia)."""
+    base, batches = sales
+    cube = build_cube(process_data(base))
+    rows = [base]
+    for batch in [None] + batches:
+        if batch is not None:
+            cube = cube.appended(process_data(batch))
+            assert cube is not None
+            rows.append(batch)
+        receita, linhas, erro = cube.select(filters)._product_totals()
+        expected_receita, expected_linhas = _scan_totals(pd.concat(rows, ignore_index=True), cube.produtos, filters)
+        np.testing.assert_allclose(receita, expected_receita)
+        np.testing.assert_array_equal(linhas, expected_linhas)
+        assert erro == 0.0
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('sketch_size', [16, 64])
+def test_approximate_totals_within_bound(sales, filters, sketch_size):
+    """Testa que a receita estimada de todo produto fica dentro do erro informado, também em fluxo."""
+    base, batches = sales
+    cube = build_cube(process_data(base), sketch_size=sketch_size)
+    exact = build_cube(process_data(base))
+    for batch in [None] + batches:
+        if batch is not None:
+            cube, exact = cube.appended(process_data(batch)), exact.appended(process_data(batch))
+            assert cube is not None and exact is not None
+        receita, _, erro = cube.select(filters)._product_totals()
+        expected, _, _ = exact.select(filters)._product_totals()
+        assert np.all(np.abs(receita - expected) <= erro + 1e-6)
+
+
+def test_approximate_top_products(sales):
+    """Testa que o top N aproximado coincide com o exato nos produtos dominantes e informa o erro."""
+    base, _ = sales
+    df = process_data(base)
+    filters = FILTERS[0]
+    approximate = build_cube(df, sketch_size=64).select(filters).get_top_products(5)
+    exact = build_cube(df).select(filters).get_top_products(5)
+    assert list(approximate['produto']) == list(exact['produto'])
+    assert (approximate['erro_max'] > 0).all()
+    assert np.all(np.abs(approximate['receita'] - exact['receita']) <= approximate['erro_max'])
+    assert 'erro_max' not in exact.columns
+    # Resumos maiores que o número de produtos de cada (mês, célula) são exatos
+    assert 'erro_max' not in build_cube(df, sketch_size=4096).select(filters).get_top_products(5).columns
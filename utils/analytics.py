@@ -1,8 +1,11 @@
 
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
 
+from config import settings
+from utils.metrics import timed
+from utils.regression import SufficientStats, cached_fit, trend_and_forecast
+
+@timed
 def calculate_kpis(dff):
     """Calcula os KPIs de vendas."""
     receita_total = dff['receita'].sum()
@@ -10,54 +13,56 @@ def calculate_kpis(dff):
     ticket_medio = receita_total / total_vendas if total_vendas > 0 else 0
     return receita_total, total_vendas, ticket_medio
 
+@timed
 def get_sales_evolution(dff):
     """Retorna a evolução das vendas ao longo do tempo."""
     return dff.groupby(dff['data'].dt.to_period('M').astype(str))['receita'].sum().reset_index()
 
+@timed
 def get_sales_by_category(dff):
     """Retorna as vendas por categoria."""
-    return dff.groupby('categoria')['receita'].sum().reset_index()
+    return dff.groupby('categoria', observed=True)['receita'].sum().reset_index()
 
-def get_top_products(dff):
-    """Retorna os 10 produtos mais vendidos."""
-    return dff.groupby('produto')['receita'].sum().nlargest(10).sort_values(ascending=True).reset_index()
+@timed
+def get_top_products(dff, n=None):
+    """Retorna os N (TOP_N) produtos mais vendidos."""
+    n = settings.TOP_N if n is None else n
+    return dff.groupby('produto', observed=True)['receita'].sum().nlargest(n).sort_values(ascending=True).reset_index()
 
+@timed
 def get_region_heatmap_data(dff):
     """Retorna os dados para o mapa de calor de vendas por região."""
-    return dff.pivot_table(index='regiao', columns='categoria', values='receita', aggfunc='sum').fillna(0)
+    return dff.pivot_table(index='regiao', columns='categoria', values='receita', aggfunc='sum', observed=True).fillna(0)
+
+@timed
+def get_daily_sales(dff):
+    """
+    Retorna a receita diária, com os dias contados desde a primeira venda.
+    Não altera nem copia o DataFrame recebido.
+    """
+    datas = pd.to_datetime(dff['data'])
+    dias = (datas - datas.min()).dt.days.to_numpy()
+    daily_sales = dff['receita'].groupby(dias).sum()
+    return pd.DataFrame({'dias_desde_inicio': daily_sales.index.to_numpy(), 'receita': daily_sales.to_numpy()})
 
-def get_trend_analysis(dff):
+def _fit_daily_sales(daily_sales, cache_key=None):
+    """Ajusta a reta da série diária (em forma fechada, com cache por chave de filtros)."""
+    return cached_fit(cache_key, lambda: SufficientStats.from_points(
+        daily_sales['dias_desde_inicio'], daily_sales['receita']
+    ).fit())
+
+@timed
+def get_trend_analysis(dff, cache_key=None):
     """Retorna a análise de tendência de vendas."""
-    dff['data'] = pd.to_datetime(dff['data'])
-    dff_trend = dff.copy()
-    dff_trend['dias_desde_inicio'] = (dff_trend['data'] - dff_trend['data'].min()).dt.days
-    daily_sales = dff_trend.groupby('dias_desde_inicio')['receita'].sum().reset_index()
-
-    if len(daily_sales) > 1:
-        X = daily_sales[['dias_desde_inicio']]
-        y = daily_sales['receita']
-        model = LinearRegression()
-        model.fit(X, y)
-        trend_line = model.predict(X)
-        return daily_sales, trend_line
-    return daily_sales, None
-
-def get_sales_forecast(dff):
+    daily_sales = get_daily_sales(dff)
+    trend_line, _, _ = trend_and_forecast(daily_sales['dias_desde_inicio'], _fit_daily_sales(daily_sales, cache_key))
+    return daily_sales, trend_line
+
+@timed
+def get_sales_forecast(dff, cache_key=None):
     """Retorna a previsão de vendas para os próximos 30 dias."""
-    dff['data'] = pd.to_datetime(dff['data'])
-    dff_trend = dff.copy()
-    dff_trend['dias_desde_inicio'] = (dff_trend['data'] - dff_trend['data'].min()).dt.days
-    daily_sales = dff_trend.groupby('dias_desde_inicio')['receita'].sum().reset_index()
-
-    if len(daily_sales) > 1:
-        X = daily_sales[['dias_desde_inicio']]
-        y = daily_sales['receita']
-        model = LinearRegression()
-        model.fit(X, y)
-
-        future_days = np.arange(daily_sales['dias_desde_inicio'].max() + 1, daily_sales['dias_desde_inicio'].max() + 31).reshape(-1, 1)
-        future_sales = model.predict(future_days)
-        trend_line = model.predict(X)
-
-        return daily_sales, trend_line, future_days, future_sales
-    return daily_sales, None, None, None
+    daily_sales = get_daily_sales(dff)
+    trend_line, future_days, future_sales = trend_and_forecast(
+        daily_sales['dias_desde_inicio'], _fit_daily_sales(daily_sales, cache_key)
+    )
+    return daily_sales, trend_line, future_days, future_sales
@@ -1,18 +1,20 @@
 
-import redis
-import pandas as pd
-import json
 import hashlib
+import json
+import logging
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import redis
+
 from config import settings
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
-# Inicializa a conexão com o Redis a partir da URL nas configurações
-try:
-    redis_client = redis.from_url(settings.REDIS_URL)
-    redis_client.ping()
-    print("Conexão com o Redis estabelecida com sucesso.")
-except redis.exceptions.ConnectionError as e:
-    print(f"Não foi possível conectar ao Redis: {e}")
-    redis_client = None
 
 def get_cache_key(filters):
     """Cria uma chave de cache única a partir dos filtros."""
@@ -21,33 +23,323 @@ def get_cache_key(filters):
     # Retorna o hash SHA256 como chave
     return hashlib.sha256(serialized_filters).hexdigest()
 
-def get_from_cache(key):
-    """Busca dados do cache Redis."""
-    if redis_client is None:
-        return None
-        
-    cached_data = redis_client.get(key)
-    if cached_data:
-        print(f"Cache HIT para a chave: {key}")
-        # Desserializa os dados de JSON para DataFrame
-        return pd.read_json(json.loads(cached_data), orient='split')
-    
-    print(f"Cache MISS para a chave: {key}")
-    return None
 
-def set_to_cache(key, df, expiration_time=3600):
+# Cabeçalho dos valores gravados no Redis: marcador, codec e tamanho original
+_VALUE_HEADER = struct.Struct('<3sBQ')
+_VALUE_MAGIC = b'RC1'
+_CODECS = (None, 'lz4', 'zstd')
+
+
+def pack_value(data, compression=None):
+    """
+    Converte o valor codificado (texto ou bytes) no binário gravado no Redis.
+
+    `compression` pode ser 'lz4', 'zstd' (codecs do Arrow) ou None; o
+    cabeçalho guarda o codec e o tamanho original, então a leitura não
+    precisa sabê-los.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    body = data
+    if compression is not None:
+        import pyarrow as pa
+
+        body = pa.Codec(compression).compress(data, asbytes=True)
+    return _VALUE_HEADER.pack(_VALUE_MAGIC, _CODECS.index(compression), len(data)) + body
+
+
+def unpack_value(blob):
+    """Bytes originais de um valor gravado por `pack_value`; ValueError se não for um."""
+    if len(blob) < _VALUE_HEADER.size:
+        raise ValueError("valor sem cabeçalho")
+    magic, codec, size = _VALUE_HEADER.unpack_from(blob)
+    if magic != _VALUE_MAGIC or codec >= len(_CODECS):
+        raise ValueError("valor em formato desconhecido")
+    body = memoryview(blob)[_VALUE_HEADER.size:]
+    if _CODECS[codec] is None:
+        return bytes(body)
+    import pyarrow as pa
+
+    return pa.Codec(_CODECS[codec]).decompress(body, decompressed_size=size, asbytes=True)
+
+
+def _new_tier_stats():
+    return {'hits': 0, 'misses': 0, 'sets': 0, 'bytes_read': 0, 'bytes_written': 0}
+
+
+class LocalCache:
     """
-    Armazena um DataFrame no cache Redis.
-    O DataFrame é primeiro convertido para JSON.
+    Cache em processo (L1) com descarte LRU, TTL e limite de bytes.
+
+    Guarda os valores já decodificados; quem lê não deve alterá-los.
     """
-    if redis_client is None:
-        return
 
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna (valor, tamanho) ou None se ausente ou expirado."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value, size
+
+    def set(self, key, value, size, ttl=None):
+        """Armazena o valor, descartando os menos usados além dos limites."""
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (value, size, expires_at)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResultCache:
+    """
+    Cache de resultados prontos (ex.: a saída do callback do dashboard), com
+    computação única por chave.
+
+    Ordem de busca: L1 em processo, Redis, e só então `compute()`. Chamadas
+    simultâneas com a mesma chave no processo compartilham uma execução
+    (`SingleFlight`); entre workers, um lock no Redis (`SET NX PX`) garante
+    que só um deles calcula enquanto os demais aguardam o valor aparecer no
+    Redis. Se o dono do lock morrer, o lock expira e outro assume; se a
+    espera passar de `wait_timeout`, o worker calcula por conta própria.
+
+    Os valores são codificados (`encode`/`decode`, JSON por padrão) e vão
+    para o Redis em binário comprimido com `compression` ('lz4', 'zstd' ou
+    None, ver `pack_value`). `stats` conta hits, misses, gravações e bytes
+    por nível ('l1', 'redis'); o L1 conta o tamanho comprimido de cada valor.
+    """
+
+    def __init__(self, redis_client=None, local=None, timeout=3600, lock_timeout=30.0,
+                 wait_timeout=30.0, poll_interval=0.02, prefix='result:', compression='lz4'):
+        self.redis_client = redis_client
+        self.local = local if local is not None else LocalCache()
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self.compression = compression
+        self.flight = SingleFlight()
+        self.stats = {'l1': _new_tier_stats(), 'redis': _new_tier_stats(), 'compute': {'computed': 0, 'waited': 0}}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, tier, **counts):
+        with self._stats_lock:
+            for name, value in counts.items():
+                self.stats[tier][name] += value
+
+    def get_or_compute(self, key, compute, encode=json.dumps, decode=json.loads):
+        """Retorna o valor da chave, calculando-o uma única vez se não estiver em nenhum nível."""
+        entry = self.local.get(key)
+        if entry is not None:
+            self._count('l1', hits=1, bytes_read=entry[1])
+            return entry[0]
+        self._count('l1', misses=1)
+        return self.flight.do(key, lambda: self._load_or_compute(key, compute, encode, decode))
+
+    def _store_local(self, key, value, data):
+        self.local.set(key, value, len(data), ttl=self.timeout)
+        self._count('l1', sets=1, bytes_written=len(data))
+
+    def _computed(self, key, compute, encode):
+        """Calcula o valor e o guarda no L1; retorna (valor, binário para o Redis)."""
+        value = compute()
+        self._count('compute', computed=1)
+        data = pack_value(encode(value), self.compression)
+        self._store_local(key, value, data)
+        return value, data
+
+    def _load_or_compute(self, key, compute, encode, decode):
+        # Outra thread pode ter acabado de preencher o L1
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry[0]
+        if self.redis_client is not None:
+            try:
+                return self._shared(key, compute, encode, decode)
+            except redis.exceptions.RedisError as e:
+                logger.warning("Redis indisponível para o cache de resultados: %s", e)
+        return self._computed(key, compute, encode)[0]
+
+    def _from_redis(self, key, decode, count_miss=True):
+        data = self.redis_client.get(self.prefix + key)
+        if data is not None:
+            try:
+                value = decode(unpack_value(data))
+            except ValueError:
+                # Gravado em outro formato (ex.: versão anterior): tratado como ausente
+                logger.warning("Resultado '%s' ilegível no Redis; recalculando.", key)
+                data = None
+        if data is None:
+            if count_miss:
+                self._count('redis', misses=1)
+            return None
+        self._count('redis', hits=1, bytes_read=len(data))
+        self._store_local(key, value, data)
+        return value
+
+    def _shared(self, key, compute, encode, decode):
+        lock_key = f'{self.prefix}lock:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            # Só a primeira leitura conta como miss; as demais são a espera pelo dono do lock
+            value = self._from_redis(key, decode, count_miss=not waited)
+            if value is not None:
+                return value
+            token = uuid.uuid4().hex.encode()
+            if self.redis_client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)):
+                try:
+                    # O valor pode ter sido gravado entre a leitura e o lock
+                    value = self._from_redis(key, decode, count_miss=False)
+                    if value is not None:
+                        return value
+                    value, data = self._computed(key, compute, encode)
+                    try:
+                        self.redis_client.setex(self.prefix + key, self.timeout, data)
+                        self._count('redis', sets=1, bytes_written=len(data))
+                    except redis.exceptions.RedisError as e:
+                        logger.warning("Erro ao armazenar o resultado '%s' no Redis: %s", key, e)
+                    return value
+                finally:
+                    self._release(lock_key, token)
+            if not waited:
+                waited = True
+                self._count('compute', waited=1)
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        logger.warning("Tempo esgotado esperando o resultado de '%s'; calculando localmente.", key)
+        return self._computed(key, compute, encode)[0]
+
+    def _release(self, lock_key, token):
+        """Libera o lock só se ainda for nosso (ele pode ter expirado e sido tomado por outro worker)."""
+        try:
+            with self.redis_client.pipeline() as pipe:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) == token:
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+        except redis.exceptions.RedisError as e:
+            logger.warning("Erro ao liberar o lock '%s': %s", lock_key, e)
+
+
+def create_redis_client(url):
+    """Cria um cliente Redis com pool de conexões e timeouts; None se indisponível."""
+    if not url:
+        logger.info("REDIS_URL não configurada; usando apenas o cache em processo.")
+        return None
+    pool = redis.ConnectionPool.from_url(
+        url,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+    client = redis.Redis(connection_pool=pool)
     try:
-        # Converte o DataFrame para JSON e depois para uma string para armazenar
-        data_to_cache = df.to_json(date_format='iso', orient='split')
-        redis_client.setex(key, expiration_time, json.dumps(data_to_cache))
-        print(f"Dados armazenados no cache com a chave: {key}")
-    except Exception as e:
-        print(f"Erro ao armazenar dados no cache: {e}")
+        client.ping()
+        logger.info("Conexão com o Redis estabelecida com sucesso.")
+    except redis.exceptions.RedisError as e:
+        logger.warning("Não foi possível conectar ao Redis: %s", e)
+        return None
+    return client
+
+
+class RedisConnector:
+    """
+    Conecta ao Redis em uma thread de fundo e entrega o cliente aos caches.
+
+    A partida não espera pelo Redis (um host inacessível pode travar a
+    resolução de nomes ou a conexão): até o cliente ficar pronto, os caches
+    funcionam só com o L1 em processo. Cada tentativa usa os timeouts de
+    `create_redis_client`; as falhas se repetem a cada `retry_interval`
+    segundos.
+    """
+
+    def __init__(self, url, caches, retry_interval=5.0):
+        self.url = url
+        self.caches = caches
+        self.retry_interval = retry_interval
+        self.client = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            client = create_redis_client(self.url)
+            if client is not None:
+                self.client = client
+                for target in self.caches:
+                    target.redis_client = client
+                return
+            self._stop.wait(self.retry_interval)
+
+    def start(self):
+        """Inicia a conexão (uma vez por processo: threads não sobrevivem ao fork)."""
+        if not self.url or self.client is not None or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='redis-connect', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+# Inicializa a conexão com o Redis a partir da URL nas configurações; na partida
+# rápida (LAZY_STARTUP), a conexão fica para `redis_connector.start()`, em cada worker
+redis_client = None if settings.LAZY_STARTUP else create_redis_client(settings.REDIS_URL)
+result_cache = ResultCache(
+    redis_client=redis_client,
+    local=LocalCache(
+        max_entries=settings.RESULT_CACHE_L1_MAX_ENTRIES,
+        max_bytes=settings.RESULT_CACHE_L1_MAX_BYTES,
+        ttl=settings.CACHE_TIMEOUT,
+    ),
+    timeout=settings.CACHE_TIMEOUT,
+    lock_timeout=settings.SINGLE_FLIGHT_LOCK_TIMEOUT,
+    wait_timeout=settings.SINGLE_FLIGHT_WAIT_TIMEOUT,
+    compression=settings.CACHE_COMPRESSION,
+)
+redis_connector = RedisConnector(settings.REDIS_URL, (result_cache,)) if settings.LAZY_STARTUP else None
 
@@ -0,0 +1,118 @@
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def warm_filters(source):
+    """
+    Filtros pré-calculados: a visão padrão (período completo, todas as
+    categorias e regiões) e cada combinação de uma categoria com uma região,
+    no período completo. Os filtros saem de `make_filters`, exatamente como o
+    callback os monta a partir dos valores iniciais do layout.
+    """
+    from utils.filter_engine import make_filters
+
+    start_date, end_date = (str(date) for date in source.date_bounds())
+    filters = [make_filters(start_date, end_date, [], [])]
+    for categoria in source.dimension_values('categoria'):
+        for regiao in source.dimension_values('regiao'):
+            filters.append(make_filters(start_date, end_date, [categoria], [regiao]))
+    return filters
+
+
+class CacheWarmer:
+    """
+    Thread que pré-calcula os resultados mais pedidos: na partida e depois
+    que a versão dos dados muda (ex.: vendas ingeridas) e fica `debounce`
+    segundos sem mudar. Com ingestão contínua, o aquecimento espera uma pausa
+    em vez de disputar o processo com as requisições a cada lote.
+
+    Cada rodada só aquece as seleções cuja versão (`source.data_version`)
+    mudou desde o último aquecimento: lotes que não as tocam não custam nada.
+
+    `warm(filters)` calcula e guarda o resultado de uma seleção; como ele
+    passa pelo cache com computação única, workers que aquecem ao mesmo tempo
+    dividem o trabalho em vez de repeti-lo, e um usuário que pede a mesma
+    seleção durante o aquecimento espera o cálculo em andamento.
+    """
+
+    def __init__(self, source, warm, interval=5.0, filters=warm_filters, debounce=30.0):
+        self.source = source
+        self.warm = warm
+        self.interval = interval
+        self.filters = filters
+        self.debounce = debounce
+        self.version = None
+        self.stats = {'runs': 0, 'warmed': 0, 'skipped': 0, 'errors': 0, 'last_run_seconds': 0.0}
+        # chave dos filtros -> versão dos dados aquecida
+        self._warmed = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Aquece as seleções que mudaram desde o último aquecimento; retorna quantas foram aquecidas."""
+        from utils.cache import get_cache_key
+
+        version = self.source.version
+        started = time.perf_counter()
+        warmed = skipped = 0
+        for filters in self.filters(self.source):
+            if self._stop.is_set() or self.source.version != version:
+                # Parada, ou dados novos no meio do aquecimento: a próxima rodada recomeça na versão atual
+                return warmed
+            key = get_cache_key(filters)
+            data_version = self.source.data_version(filters)
+            if self._warmed.get(key) == data_version:
+                skipped += 1
+                continue
+            try:
+                self.warm(filters)
+                self._warmed[key] = data_version
+                warmed += 1
+            except Exception:
+                self.stats['errors'] += 1
+                logger.exception("Erro ao aquecer o cache para %s", filters)
+        self.version = version
+        self.stats['runs'] += 1
+        self.stats['warmed'] += warmed
+        self.stats['skipped'] += skipped
+        self.stats['last_run_seconds'] = time.perf_counter() - started
+        logger.info("Cache aquecido: %d seleções em %.1f s, %d inalteradas (versão %s)",
+                    warmed, self.stats['last_run_seconds'], skipped, version)
+        return warmed
+
+    def due(self, version, stable_seconds):
+        """Se a versão deve ser aquecida agora: a primeira logo, as seguintes após `debounce` segundos estáveis."""
+        if version == self.version:
+            return False
+        return self.version is None or stable_seconds >= self.debounce
+
+    def _run(self):
+        seen, seen_at = None, time.monotonic()
+        while not self._stop.is_set():
+            version = self.source.version
+            if version != seen:
+                seen, seen_at = version, time.monotonic()
+            if self.due(version, time.monotonic() - seen_at):
+                try:
+                    self.run_once()
+                except Exception:
+                    self.stats['errors'] += 1
+                    logger.exception("Erro ao aquecer o cache")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia a thread (no processo atual; após um fork, chame de novo no filho)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,93 @@
+
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.io
+
+from utils.schema import month_label
+
+_INT32 = np.iinfo(np.int32)
+
+
+def encode_array(values):
+    """
+    Codifica um array numérico para um typed array do navegador.
+
+    Inteiros que cabem em 32 bits vão como Int32Array, o resto como
+    Float64Array; os bytes (little-endian) vão em base64 junto da forma.
+    """
+    values = np.asarray(values)
+    fits_int32 = np.issubdtype(values.dtype, np.integer) and (
+        not values.size or (values.min() >= _INT32.min and values.max() <= _INT32.max)
+    )
+    dtype = 'int32' if fits_int32 else 'float64'
+    data = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': dtype, 'shape': list(values.shape), 'data': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def decode_array(encoded):
+    """Inverso de `encode_array`."""
+    data = base64.b64decode(encoded['data'])
+    return np.frombuffer(data, dtype=np.dtype(encoded['dtype']).newbyteorder('<')).reshape(encoded['shape'])
+
+
+def monthly_cells(aggregates):
+    """
+    Meses ('AAAA-MM') e somas mês × categoria × região de receita, quantidade
+    e linhas. Os quatro painéis do navegador não precisam do eixo diário.
+    """
+    dias = pd.DatetimeIndex(aggregates.dias)
+    codes = np.asarray(dias.year * 100 + dias.month)
+    n_cells = aggregates.receita.shape[1:]
+    if not len(codes):
+        empty = np.zeros((0,) + n_cells)
+        return [], empty, empty.astype(np.int64), empty.astype(np.int64)
+    # O eixo de dias é ordenado: cada mês é um bloco contíguo
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return (
+        list(month_label(codes[starts])),
+        np.add.reduceat(aggregates.receita, starts, axis=0),
+        np.add.reduceat(aggregates.quantidade, starts, axis=0),
+        np.add.reduceat(aggregates.linhas, starts, axis=0),
+    )
+
+
+def _figure_json(figure):
+    return json.loads(plotly.io.json.to_json_plotly(figure))
+
+
+def build_client_payload(aggregates, figures, max_bytes=None):
+    """
+    Payload colunar da janela de datas para o modo de agregação no navegador.
+
+    `aggregates` são as somas parciais da janela inteira (todas as categorias
+    e regiões) e `figures` as figuras dos painéis do navegador (evolução,
+    categorias e mapa de calor) montadas no servidor para essa janela: elas
+    servem de molde, e o navegador só troca os dados dos traços. O template
+    do plotly vai uma vez só. Retorna None se o JSON passar de `max_bytes`.
+    """
+    meses, receita, quantidade, linhas = monthly_cells(aggregates)
+    payload = {
+        'meses': meses,
+        'categorias': [str(value) for value in aggregates.categorias],
+        'regioes': [str(value) for value in aggregates.regioes],
+        'receita': encode_array(receita),
+        'quantidade': encode_array(quantidade),
+        'linhas': encode_array(linhas),
+        'figures': {},
+        'template': None,
+    }
+    for panel, figure in figures.items():
+        figure = _figure_json(figure)
+        payload['template'] = figure.get('layout', {}).pop('template', payload['template'])
+        payload['figures'][panel] = figure
+    if max_bytes is not None and payload_bytes(payload) > max_bytes:
+        return None
+    return payload
+
+
+def payload_bytes(payload):
+    """Tamanho do payload serializado, como vai na resposta do callback."""
+    return len(json.dumps(payload, separators=(',', ':')))
@@ -0,0 +1,111 @@
+
+import numpy as np
+import pandas as pd
+
+from utils.schema import money_is_safe_as_float32
+
+
+def _fits(dtype, values):
+    """Indica se `values` cabe no dtype da coluna sem perda."""
+    values = np.asarray(values)
+    if np.issubdtype(dtype, np.integer):
+        if not np.issubdtype(values.dtype, np.integer):
+            return False
+        info = np.iinfo(dtype)
+        return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+    if dtype == np.float32 and values.dtype != np.float32:
+        return money_is_safe_as_float32(values.astype(np.float64))
+    return np.can_cast(values.dtype, dtype, casting='same_kind')
+
+
+class ColumnStore:
+    """
+    Colunas em buffers com capacidade reservada, para anexar linhas sem
+    recopiar o que já existe.
+
+    A capacidade cresce geometricamente, então anexar custa O(linhas novas)
+    amortizado. `frame()` expõe as linhas válidas como um DataFrame de
+    views (sem cópia); categóricas são guardadas pelos códigos. Uma coluna
+    só é recopiada quando um lote não cabe no seu dtype (ex.: um valor de
+    `quantidade` maior que o int8 atual).
+    """
+
+    def __init__(self, df, capacity=None, growth=1.5):
+        self.growth = growth
+        self.n_rows = len(df)
+        capacity = max(capacity or 0, self.n_rows, 1)
+        self._dtypes = {}
+        self._buffers = {}
+        for column in df.columns:
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self._dtypes[column] = series.dtype
+                values = series.cat.codes.to_numpy()
+            else:
+                values = series.to_numpy()
+                self._dtypes[column] = values.dtype
+            buffer = np.empty(capacity, dtype=values.dtype)
+            buffer[:self.n_rows] = values
+            self._buffers[column] = buffer
+
+    @property
+    def columns(self):
+        return list(self._buffers)
+
+    @property
+    def capacity(self):
+        return len(next(iter(self._buffers.values()))) if self._buffers else 0
+
+    def dtype(self, column):
+        return self._dtypes[column]
+
+    def column(self, column):
+        """View dos valores válidos da coluna (códigos, no caso das categóricas)."""
+        return self._buffers[column][:self.n_rows]
+
+    def _reserve(self, n_rows):
+        if n_rows <= self.capacity:
+            return
+        capacity = max(n_rows, int(self.capacity * self.growth) + 1)
+        for column, buffer in self._buffers.items():
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[:self.n_rows] = buffer[:self.n_rows]
+            self._buffers[column] = grown
+
+    def _encode(self, column, series):
+        """Converte os valores do lote para a representação guardada na coluna."""
+        dtype = self._dtypes[column]
+        if isinstance(dtype, pd.CategoricalDtype):
+            codes = dtype.categories.get_indexer(pd.Index(series, dtype=object))
+            if (codes < 0).any():
+                raise KeyError(f"Valor desconhecido na coluna categórica '{column}'")
+            return codes.astype(self._buffers[column].dtype)
+        values = series.to_numpy()
+        if not _fits(dtype, values):
+            # Amplia o dtype da coluna (recopia apenas esta coluna)
+            dtype = np.result_type(dtype, values.dtype)
+            if np.issubdtype(dtype, np.floating):
+                dtype = np.dtype(np.float64)
+            self._dtypes[column] = dtype
+            self._buffers[column] = self._buffers[column].astype(dtype)
+        return values.astype(self._dtypes[column], copy=False)
+
+    def append(self, df):
+        """Anexa as linhas de `df` (mesmas colunas). Levanta KeyError para categorias desconhecidas."""
+        encoded = {column: self._encode(column, df[column]) for column in self._buffers}
+        stop = self.n_rows + len(df)
+        self._reserve(stop)
+        for column, values in encoded.items():
+            self._buffers[column][self.n_rows:stop] = values
+        self.n_rows = stop
+
+    def frame(self):
+        """DataFrame com views das linhas válidas, sem copiar os buffers."""
+        data = {}
+        for column, buffer in self._buffers.items():
+            dtype = self._dtypes[column]
+            if isinstance(dtype, pd.CategoricalDtype):
+                data[column] = pd.Categorical.from_codes(buffer[:self.n_rows], dtype=dtype, validate=False)
+            else:
+                data[column] = buffer[:self.n_rows]
+        return pd.DataFrame(data, copy=False)
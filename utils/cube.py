@@ -0,0 +1,442 @@
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from config import settings
+from utils.column_store import ColumnStore
+from utils.data_processor import parse_date_range
+from utils.filter_engine import normalize_selection
+from utils.forecast import seasonal_forecast
+from utils.partitions import SalesPartitions, local_days
+from utils.regression import PrefixStats, SufficientStats, cached_fit, trend_and_forecast
+from utils.schema import day_code, month_label
+from utils.top_n import ProductIndex, top_n_indices
+
+
+class SalesAggregates:
+    """
+    Somas parciais dia × categoria × região de uma seleção, mais os totais
+    por produto.
+
+    É a partir delas que todos os painéis do dashboard são derivados (KPIs,
+    evolução mensal, categorias, top produtos, mapa de calor e série diária),
+    sem voltar às linhas brutas. O eixo de dias pode ter lacunas; dias sem
+    vendas têm `linhas == 0`.
+
+    `trend_stats` (estatísticas suficientes já prontas da série diária),
+    `fit_key` (chave do cache de ajustes) e `forecast` (somas de prefixo do
+    modelo sazonal, `utils.forecast.ForecastModel`, ajustado nos dias da
+    seleção) são opcionais; sem modelo, ou com poucos dias na seleção, a
+    previsão é a reta da tendência. `produto_erro` é o erro máximo da
+    receita por produto quando os totais vêm dos resumos aproximados.
+    """
+
+    def __init__(self, dias, categorias, regioes, produtos, receita, quantidade, linhas,
+                 produto_receita, produto_linhas, trend_stats=None, fit_key=None, forecast=None,
+                 produto_erro=0.0):
+        self.dias = dias
+        self.categorias = categorias
+        self.regioes = regioes
+        self.produtos = produtos
+        self.receita = receita
+        self.quantidade = quantidade
+        self.linhas = linhas
+        self.produto_receita = produto_receita
+        self.produto_linhas = produto_linhas
+        self.produto_erro = produto_erro
+        self.trend_stats = trend_stats
+        self.fit_key = fit_key
+        self.forecast = forecast
+        self._trend = None
+
+    def _daily(self):
+        """Receita diária e máscara dos dias com vendas na seleção."""
+        receita = self.receita.sum(axis=(1, 2))
+        presente = self.linhas.sum(axis=(1, 2)) > 0
+        return receita, presente
+
+    def calculate_kpis(self):
+        """Calcula os KPIs de vendas."""
+        receita_total = float(self.receita.sum())
+        total_vendas = int(self.quantidade.sum())
+        ticket_medio = receita_total / total_vendas if total_vendas > 0 else 0
+        return receita_total, total_vendas, ticket_medio
+
+    def get_sales_evolution(self):
+        """Retorna a evolução das vendas ao longo do tempo."""
+        receita, presente = self._daily()
+        dias = pd.DatetimeIndex(self.dias[presente])
+        meses, inverso = np.unique(dias.year * 100 + dias.month, return_inverse=True)
+        evolution = np.bincount(inverso, weights=receita[presente], minlength=len(meses))
+        return pd.DataFrame({'data': month_label(meses).astype(object), 'receita': evolution})
+
+    def get_sales_by_category(self):
+        """Retorna as vendas por categoria."""
+        receita = self.receita.sum(axis=(0, 2))
+        presente = self.linhas.sum(axis=(0, 2)) > 0
+        return pd.DataFrame({
+            'categoria': self.categorias[presente],
+            'receita': receita[presente],
+        })
+
+    def get_top_products(self, n=None):
+        """Retorna os N (TOP_N) produtos mais vendidos, em ordem crescente de receita."""
+        n = settings.TOP_N if n is None else n
+        top = top_n_indices(self.produto_receita, n, self.produto_linhas > 0)[::-1]
+        top_products = pd.DataFrame({
+            'produto': self.produtos[top],
+            'receita': self.produto_receita[top],
+        })
+        if self.produto_erro:
+            top_products['erro_max'] = self.produto_erro
+        return top_products
+
+    def get_region_heatmap_data(self):
+        """Retorna os dados para o mapa de calor de vendas por região."""
+        receita = self.receita.sum(axis=0).T
+        linhas = self.linhas.sum(axis=0).T
+        regioes = linhas.sum(axis=1) > 0
+        categorias = linhas.sum(axis=0) > 0
+        return pd.DataFrame(
+            receita[regioes][:, categorias],
+            index=pd.Index(self.regioes[regioes], name='regiao'),
+            columns=pd.Index(self.categorias[categorias], name='categoria'),
+        )
+
+    def get_daily_sales(self):
+        """
+        Série diária de receita, com os dias contados em dias de calendário a
+        partir do primeiro dia com vendas na seleção.
+        """
+        receita, presente = self._daily()
+        dias = self.dias[presente]
+        if len(dias):
+            dias = (dias - dias[0]).astype(np.int64)
+        else:
+            dias = np.array([], dtype=np.int64)
+        return pd.DataFrame({'dias_desde_inicio': dias, 'receita': receita[presente]})
+
+    def _trend_fit(self):
+        """Série diária e reta ajustada, calculadas uma só vez para tendência e previsão."""
+        if self._trend is None:
+            daily_sales = self.get_daily_sales()
+
+            def fit():
+                stats = self.trend_stats
+                if stats is None:
+                    stats = SufficientStats.from_points(daily_sales['dias_desde_inicio'], daily_sales['receita'])
+                return stats.fit()
+
+            self._trend = daily_sales, cached_fit(self.fit_key, fit)
+        return self._trend
+
+    def get_trend_analysis(self):
+        """Retorna a análise de tendência de vendas."""
+        daily_sales, fit = self._trend_fit()
+        trend_line, _, _ = trend_and_forecast(daily_sales['dias_desde_inicio'], fit)
+        return daily_sales, trend_line
+
+    def get_sales_forecast(self):
+        """Retorna a previsão de vendas para os próximos 30 dias."""
+        if self.forecast is not None and len(self.dias):
+            # Modelo sazonal ajustado só nos dias da seleção (diferença de prefixos, sem varrer a janela)
+            dias = self.dias.astype(np.int64)
+            fit = self.forecast.select(self.categorias, self.regioes, dias[0], dias[-1] + 1)
+            if fit is not None:
+                _, presente = self._daily()
+                return (self.get_daily_sales(), *seasonal_forecast(dias[presente], fit))
+        daily_sales, fit = self._trend_fit()
+        trend_line, future_days, future_sales = trend_and_forecast(daily_sales['dias_desde_inicio'], fit)
+        return daily_sales, trend_line, future_days, future_sales
+
+
+class SalesCube:
+    """
+    Cubo pré-agregado de vendas: dia × categoria × região.
+
+    Guarda receita, quantidade e número de linhas somados por célula, além de
+    uma tabela lateral esparsa com a receita por (dia, categoria, região,
+    produto). Todas as consultas do dashboard são respondidas a partir destes
+    arrays, sem tocar nas linhas brutas.
+
+    Vendas novas (a partir do último dia do cubo, com dimensões conhecidas)
+    entram por `appended`, que devolve um cubo novo sem alterar o atual: quem
+    está lendo um cubo nunca vê uma inclusão pela metade. Os arrays densos
+    (dias × categorias × regiões, pequenos perto das linhas) são copiados com
+    só as células dos dias afetados somadas; a tabela lateral cresce no final
+    de buffers com folga, compartilhados entre as versões do cubo.
+
+    O top N de produtos sai de `product_index` (`utils.top_n.ProductIndex`),
+    exato ou, com `sketch_size`, aproximado por resumos de tamanho fixo.
+    """
+
+    def __init__(self, dias, categorias, regioes, produtos, receita, quantidade, linhas, tabela_produtos,
+                 sketch_size=0):
+        self.dias = dias
+        self.categorias = categorias
+        self.regioes = regioes
+        self.produtos = produtos
+        self.receita = receita
+        self.quantidade = quantidade
+        self.linhas = linhas
+        # Tabela lateral ordenada por dia: códigos de dia, categoria, região e produto + receita e linhas
+        self.tabela_produtos = tabela_produtos
+        # Receita diária total (todas as células) e suas estatísticas acumuladas
+        self._diario = receita.sum(axis=(1, 2))
+        self.daily_stats = PrefixStats(dias.astype(np.int64), self._diario)
+        self.product_index = ProductIndex(
+            tabela_produtos, dias, len(categorias), len(regioes), len(produtos), sketch_size=sketch_size,
+        )
+        # Buffers da tabela lateral: criados na primeira inclusão e passados ao cubo seguinte
+        self._produtos_store = None
+
+    def appended(self, df):
+        """
+        Cubo com as linhas novas somadas, em O(linhas novas + células do cubo denso).
+
+        O cubo atual continua válido e inalterado. Retorna None se houver
+        vendas anteriores ao último dia ou valores de dimensão que o cubo não
+        conhece; nesses casos o cubo deve ser reconstruído.
+        """
+        if not len(df):
+            return self
+        codigos = df['dia'].to_numpy() if 'dia' in df.columns else day_code(df['data'])
+        codigos = codigos.astype(np.int64)
+        n_dias = len(self.dias)
+        ultimo = int(self.dias[-1].astype(np.int64)) if n_dias else int(codigos.min())
+        cat_idx = self.categorias.get_indexer(np.asarray(df['categoria'], dtype=object))
+        reg_idx = self.regioes.get_indexer(np.asarray(df['regiao'], dtype=object))
+        prod_idx = self.produtos.get_indexer(np.asarray(df['produto'], dtype=object))
+        if codigos.min() < ultimo or (cat_idx < 0).any() or (reg_idx < 0).any() or (prod_idx < 0).any():
+            return None
+
+        # Dias afetados: o último dia atual (se recebeu vendas) e os dias novos
+        primeiro = n_dias - 1 if n_dias and codigos.min() == ultimo else n_dias
+        novos = np.unique(codigos[codigos > ultimo]) if n_dias else np.unique(codigos)
+        total = n_dias + len(novos)
+        dias = np.concatenate([self.dias, novos.astype('datetime64[D]')])
+
+        def grown(values):
+            # Cópia com os dias novos zerados: o cubo atual nunca é escrito
+            result = np.zeros((total,) + values.shape[1:], dtype=values.dtype)
+            result[:n_dias] = values
+            return result
+
+        dia_idx = np.searchsorted(dias[primeiro:].astype(np.int64), codigos)
+        shape = (total - primeiro, len(self.categorias), len(self.regioes))
+        celula = (dia_idx * shape[1] + cat_idx) * shape[2] + reg_idx
+        size = int(np.prod(shape))
+        receita = df['receita'].to_numpy(dtype=np.float64)
+        quantidade = df['quantidade'].to_numpy(dtype=np.float64)
+        cube = copy.copy(self)
+        cube.dias = dias
+        cube.receita = grown(self.receita)
+        cube.receita[primeiro:] += np.bincount(celula, weights=receita, minlength=size).reshape(shape)
+        cube.quantidade = grown(self.quantidade)
+        cube.quantidade[primeiro:] += (
+            np.bincount(celula, weights=quantidade, minlength=size).astype(np.int64).reshape(shape)
+        )
+        cube.linhas = grown(self.linhas)
+        cube.linhas[primeiro:] += np.bincount(celula, minlength=size).reshape(shape)
+        cube._diario = grown(self._diario)
+        cube._diario[primeiro:] += np.bincount(dia_idx, weights=receita, minlength=shape[0])
+
+        # Entradas novas da tabela lateral (podem repetir chaves do último dia; as consultas somam).
+        # Os buffers só crescem depois das linhas que o cubo atual enxerga e passam ao cubo novo.
+        store = self._produtos_store if self._produtos_store is not None else ColumnStore(self.tabela_produtos)
+        self._produtos_store = None
+        chave = celula * len(self.produtos) + prod_idx
+        chaves, inverso = np.unique(chave, return_inverse=True)
+        celulas, produto = np.divmod(chaves, len(self.produtos))
+        dia, resto = np.divmod(celulas, shape[1] * shape[2])
+        categoria, regiao = np.divmod(resto, shape[2])
+        store.append(pd.DataFrame({
+            'dia': dia + primeiro,
+            'categoria': categoria,
+            'regiao': regiao,
+            'produto': produto,
+            'receita': np.bincount(inverso, weights=receita),
+            'linhas': np.bincount(inverso),
+        }))
+
+        cube._produtos_store = store
+        cube.tabela_produtos = store.frame()
+        cube.product_index = self.product_index.appended(cube.tabela_produtos, dias)
+        cube.daily_stats = PrefixStats(dias.astype(np.int64), cube._diario)
+        return cube
+
+    @property
+    def shape(self):
+        return self.receita.shape
+
+    def select(self, filters, fit_key=None, forecast=None):
+        """
+        Seleciona a parte do cubo que atende aos filtros do dashboard.
+        `fit_key` identifica a seleção no cache de ajustes de tendência;
+        `forecast` é o modelo sazonal usado na previsão.
+        """
+        start, end = parse_date_range(filters['start_date'], filters['end_date'])
+        lo = int(np.searchsorted(self.dias, start.to_datetime64(), side='left'))
+        hi = int(np.searchsorted(self.dias, end.to_datetime64(), side='left'))
+        cat_idx = _dimension_index(self.categorias, filters.get('category', 'all'))
+        reg_idx = _dimension_index(self.regioes, filters.get('region', 'all'))
+        return CubeSlice(self, lo, hi, cat_idx, reg_idx, fit_key, forecast)
+
+
+class CubeSlice:
+    """Fatia do cubo com as mesmas consultas de `utils.analytics`."""
+
+    def __init__(self, cube, lo, hi, cat_idx, reg_idx, fit_key=None, forecast=None):
+        self.cube = cube
+        self.lo = lo
+        self.hi = hi
+        self.cat_idx = cat_idx
+        self.reg_idx = reg_idx
+        self.fit_key = fit_key
+        self.forecast = forecast
+        self._aggregates = None
+
+    def _trend_stats(self):
+        """Sem filtro de dimensão, o ajuste sai das estatísticas acumuladas do cubo."""
+        cube = self.cube
+        if self.hi <= self.lo or len(self.cat_idx) < len(cube.categorias) or len(self.reg_idx) < len(cube.regioes):
+            return None
+        dias = cube.dias[self.lo:self.hi].astype(np.int64)
+        return cube.daily_stats.range(dias[0], dias[-1] + 1)
+
+    def _cells(self, values):
+        return values[self.lo:self.hi][:, self.cat_idx][:, :, self.reg_idx]
+
+    def _product_totals(self):
+        """Receita e linhas por produto (e o erro máximo da receita), somando só as entradas selecionadas."""
+        return self.cube.product_index.totals(self.lo, self.hi, self.cat_idx, self.reg_idx)
+
+    def aggregates(self):
+        """Materializa uma única vez as somas parciais da seleção."""
+        if self._aggregates is None:
+            produto_receita, produto_linhas, produto_erro = self._product_totals()
+            self._aggregates = SalesAggregates(
+                dias=self.cube.dias[self.lo:self.hi],
+                categorias=self.cube.categorias[self.cat_idx],
+                regioes=self.cube.regioes[self.reg_idx],
+                produtos=self.cube.produtos,
+                receita=self._cells(self.cube.receita),
+                quantidade=self._cells(self.cube.quantidade),
+                linhas=self._cells(self.cube.linhas),
+                produto_receita=produto_receita,
+                produto_linhas=produto_linhas,
+                trend_stats=self._trend_stats(),
+                fit_key=self.fit_key,
+                forecast=self.forecast,
+                produto_erro=produto_erro,
+            )
+        return self._aggregates
+
+    def calculate_kpis(self):
+        """Calcula os KPIs de vendas."""
+        return self.aggregates().calculate_kpis()
+
+    def get_sales_evolution(self):
+        """Retorna a evolução das vendas ao longo do tempo."""
+        return self.aggregates().get_sales_evolution()
+
+    def get_sales_by_category(self):
+        """Retorna as vendas por categoria."""
+        return self.aggregates().get_sales_by_category()
+
+    def get_top_products(self, n=None):
+        """Retorna os N (TOP_N) produtos mais vendidos."""
+        return self.aggregates().get_top_products(n)
+
+    def get_region_heatmap_data(self):
+        """Retorna os dados para o mapa de calor de vendas por região."""
+        return self.aggregates().get_region_heatmap_data()
+
+    def get_trend_analysis(self):
+        """Retorna a análise de tendência de vendas."""
+        return self.aggregates().get_trend_analysis()
+
+    def get_sales_forecast(self):
+        """Retorna a previsão de vendas para os próximos 30 dias."""
+        return self.aggregates().get_sales_forecast()
+
+
+def _dimension_index(values, selected):
+    """Converte o valor de um filtro (único ou múltiplo) em índices da dimensão do cubo."""
+    selected = normalize_selection(selected)
+    if selected is None:
+        return np.arange(len(values))
+    return np.flatnonzero(np.isin(np.asarray(values, dtype=object), selected))
+
+
+def _cube_partial(block, n_categorias, n_regioes, n_produtos):
+    """Pedaço do cubo (dias da partição) e as entradas da tabela lateral de produtos de uma partição."""
+    dias, dia_idx = local_days(block['dia'])
+    shape = (len(dias), n_categorias, n_regioes)
+    celula = (dia_idx.astype(np.int64) * n_categorias + block['categoria']) * n_regioes + block['regiao']
+    size = int(np.prod(shape))
+
+    receita = np.bincount(celula, weights=block['receita'], minlength=size)
+    quantidade = np.bincount(celula, weights=block['quantidade'], minlength=size)
+    linhas = np.bincount(celula, minlength=size)
+
+    # Tabela lateral de produtos: uma entrada por (dia, categoria, região, produto) com vendas
+    chaves, inverso = np.unique(celula * n_produtos + block['produto'], return_inverse=True)
+    return (
+        dias,
+        receita.reshape(shape),
+        quantidade.astype(np.int64).reshape(shape),
+        linhas.reshape(shape),
+        chaves,
+        np.bincount(inverso, weights=block['receita']),
+        np.bincount(inverso),
+    )
+
+
+def build_cube(df, sketch_size=0, workers=1):
+    """
+    Constrói o cubo dia × categoria × região a partir do DataFrame processado.
+    `sketch_size > 0` liga o top N aproximado de produtos.
+
+    Cada partição mensal é agregada à parte (em `workers` threads); como os
+    dias de partições diferentes não se sobrepõem, o cubo e a tabela lateral
+    são a concatenação dos pedaços, na ordem das partições.
+    """
+    partitions = SalesPartitions(df)
+    n_cat, n_reg, n_prod = len(partitions.categorias), len(partitions.regioes), len(partitions.produtos)
+    partials = partitions.map(lambda block: _cube_partial(block, n_cat, n_reg, n_prod), workers=workers)
+    if not partials:
+        empty = np.zeros((0, n_cat, n_reg), dtype=np.int64)
+        partials = [(np.zeros(0, dtype=np.int32), empty.astype(np.float64), empty, empty,
+                     np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int64))]
+    dias, receita, quantidade, linhas, chaves, produto_receita, produto_linhas = (
+        np.concatenate(parts) for parts in zip(*partials)
+    )
+
+    # Índice do dia de cada entrada: local à partição, deslocado pelos dias das partições anteriores
+    offsets = np.repeat(np.cumsum([0] + [len(p[0]) for p in partials[:-1]]), [len(p[4]) for p in partials])
+    celulas, produto = np.divmod(chaves, n_prod)
+    dia, resto = np.divmod(celulas, n_cat * n_reg)
+    categoria, regiao = np.divmod(resto, n_reg)
+    tabela_produtos = pd.DataFrame({
+        'dia': (dia + offsets).astype(np.int32),
+        'categoria': categoria.astype(np.int16),
+        'regiao': regiao.astype(np.int16),
+        'produto': produto.astype(np.int32),
+        'receita': produto_receita,
+        'linhas': produto_linhas.astype(np.int32),
+    })
+
+    return SalesCube(
+        dias=dias.astype('datetime64[D]'),
+        categorias=partitions.categorias,
+        regioes=partitions.regioes,
+        produtos=partitions.produtos,
+        receita=receita,
+        quantidade=quantidade,
+        linhas=linhas,
+        tabela_produtos=tabela_produtos,
+        sketch_size=sketch_size,
+    )
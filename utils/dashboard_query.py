@@ -0,0 +1,13 @@
+
+from utils.metrics import ANALYTICS_SECONDS
+from utils.panels import DASHBOARD_PANELS
+
+
+def compute_dashboard(aggregates, panels=None):
+    """Deriva os resultados dos painéis (padrão: todos) a partir das mesmas somas parciais."""
+    results = {}
+    for panel in panels or DASHBOARD_PANELS:
+        method = DASHBOARD_PANELS[panel]
+        with ANALYTICS_SECONDS.time(method):
+            results[panel] = getattr(aggregates, method)()
+    return results
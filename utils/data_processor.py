@@ -1,12 +1,50 @@
 
 import pandas as pd
 
-def load_data(file_path):
-    """Carrega os dados de um arquivo CSV."""
-    return pd.read_csv(file_path, parse_dates=['data'])
+from config import settings
+from utils.schema import apply_schema
+from utils.snapshot import load_snapshot, snapshot_path, source_fingerprint, write_snapshot
+
+
+def load_data(file_path, snapshot=None):
+    """
+    Carrega os dados de um arquivo CSV.
+
+    Com o snapshot habilitado, os dados já processados são lidos de um
+    arquivo Arrow IPC mapeado em memória ao lado do CSV; o snapshot é
+    (re)gerado automaticamente quando o CSV muda.
+    """
+    if snapshot is None:
+        snapshot = settings.DATA_SNAPSHOT
+    if not snapshot:
+        return pd.read_csv(file_path, parse_dates=['data'])
+
+    df = load_snapshot(file_path, verify_hash=settings.DATA_SNAPSHOT_VERIFY_HASH)
+    if df is not None:
+        return df
+
+    fingerprint = source_fingerprint(file_path, verify_hash=settings.DATA_SNAPSHOT_VERIFY_HASH)
+    df = pd.read_csv(file_path, parse_dates=['data'])
+    df = process_data(df)
+    write_snapshot(df, snapshot_path(file_path), fingerprint)
+    return df
 
 def process_data(df):
-    """Processa os dados de vendas."""
-    df['mes'] = df['data'].dt.to_period('M').astype(str)
-    df['ano'] = df['data'].dt.year
+    """
+    Processa os dados de vendas, convertendo-os para o schema compacto e
+    ordenando por data (pré-requisito do motor de filtros).
+    """
+    df = apply_schema(df)
+    if not df['data'].is_monotonic_increasing:
+        df = df.sort_values('data', kind='stable', ignore_index=True)
     return df
+
+def parse_date_range(start_date, end_date):
+    """
+    Converte as datas do filtro de período em limites [início, fim).
+
+    O dia final é incluído por inteiro, inclusive as vendas após a meia-noite.
+    """
+    start = pd.to_datetime(start_date).normalize()
+    end = pd.to_datetime(end_date).normalize() + pd.Timedelta(days=1)
+    return start, end
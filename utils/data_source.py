@@ -0,0 +1,339 @@
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from config import settings
+from utils.cache import get_cache_key
+from utils.column_store import ColumnStore
+from utils.cube import build_cube
+from utils.data_processor import load_data, process_data
+from utils.filter_engine import FILTER_DIMENSIONS, FilterEngine, filters_overlap
+from utils.forecast import fit_forecast_model
+from utils.single_flight import SingleFlight
+from utils.slice_registry import SliceRegistry, compact_rows, take_rows
+from utils.table_query import page_records, query_rows
+
+logger = logging.getLogger(__name__)
+
+# Inclusões no lugar lembradas para calcular a versão de cada seleção; as mais antigas viram o piso
+CHANGE_LOG_SIZE = 64
+# Seleções com a versão já calculada (cada consulta só confere as inclusões novas)
+DATA_VERSION_MEMO_SIZE = 1024
+
+
+class MemorySource:
+    """
+    Fonte de dados em memória: o DataFrame processado (CSV ou snapshot), o
+    cubo pré-agregado e os índices de filtro.
+
+    Mesma interface de `utils.sql_source.SqlSource`: o dashboard pede
+    handles, seleções agregadas, páginas da tabela e frames para exportação
+    sem saber onde os dados estão.
+
+    Vendas novas entram por `append` sem recarregar os dados; a versão dos
+    dados (`version`) passa a ser o número de linhas e só as fatias afetadas
+    pelas linhas novas são invalidadas.
+
+    As chaves dos caches de resultados usam `data_version(filtros)`: a
+    identidade do dataset carregado (`dataset_id`), a última inclusão que
+    tocou a seleção e o ajuste do modelo de previsão. Um novo arquivo de dados
+    muda todas as chaves; lotes que não tocam uma seleção mantêm a dela.
+
+    Nada é alterado no lugar: cada inclusão monta um DataFrame, um motor de
+    filtros (`FilterEngine.appended`) e um cubo (`SalesCube.appended`) novos
+    e os publica juntos, com uma única troca de referência; as requisições
+    continuam lendo o que pegaram. Quem lê posições e linhas pega as
+    posições antes do DataFrame: como os dados só crescem no fim, posições
+    de um motor mais antigo valem em um DataFrame mais novo.
+
+    O modelo sazonal de previsão (`forecast`, somas de prefixo de todas as
+    séries categoria × região; cada seleção é ajustada só nos seus dias) é
+    montado a cada carga. Vendas anexadas o reajustam no máximo a
+    cada `forecast_refit_interval` segundos (`refresh_forecast`, chamado na
+    thread de ingestão), nunca durante uma requisição. `forecast_harmonics=None`
+    desliga o modelo e a previsão volta a ser a reta da tendência.
+
+    `top_n_sketch_size > 0` liga o top N aproximado de produtos (resumos de
+    tamanho fixo por mês e célula, ver `utils.top_n.ProductIndex`).
+    Na carga, o cubo é construído por partições mensais em
+    `aggregation_workers` threads; reconstruções provocadas pela ingestão
+    rodam em uma thread só, para não tomar os núcleos das requisições.
+    """
+
+    def __init__(self, df, max_entries=32, max_bytes=64 * 1024 * 1024, forecast_harmonics=3, top_n_sketch_size=0,
+                 aggregation_workers=1, forecast_refit_interval=60.0):
+        # Fatias filtradas ficam no servidor; o navegador recebe apenas um handle
+        self.slices = SliceRegistry(max_entries=max_entries, max_bytes=max_bytes)
+        # Ordenações/filtros da tabela já aplicados a cada fatia, para paginar em O(página)
+        self.tables = SliceRegistry(max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        # Pedidos simultâneos da mesma fatia (vários usuários, aquecimento) calculam as linhas uma vez
+        self._flight = SingleFlight()
+        self.forecast_harmonics = forecast_harmonics
+        self.forecast = None
+        self.forecast_refit_interval = forecast_refit_interval
+        self._forecast_pending = False
+        self._forecast_fitted_at = None
+        self._forecast_generation = 0
+        self._data_versions = OrderedDict()
+        self._versions_lock = threading.Lock()
+        self.top_n_sketch_size = top_n_sketch_size
+        self.aggregation_workers = aggregation_workers
+        self._index(df, workers=aggregation_workers)
+
+    def _index(self, df, workers=1):
+        """(Re)constrói o cubo (em `workers` threads) e os índices sobre os dados."""
+        # Colunas em buffers com folga, criadas apenas no primeiro `append`
+        self._store = None
+        # Cubo pré-agregado: as consultas do dashboard não varrem as linhas brutas
+        cube = build_cube(df, sketch_size=self.top_n_sketch_size, workers=workers)
+        # Índices de filtro: período por busca binária, dimensões por bitmaps
+        self._data = (df, FilterEngine(df), cube)
+        # Colunas exibidas na tabela (códigos internos ficam de fora)
+        self.columns = {column: dtype for column, dtype in df.dtypes.items() if column != 'dia'}
+        # Identidade dos dados: outro arquivo (ou uma reconstrução) não reaproveita resultados em cache
+        self.dataset_id = get_cache_key({
+            'linhas': len(df),
+            'fim': str(df['data'].iloc[-1]) if len(df) else None,
+            'receita': round(float(df['receita'].sum()), 2),
+        })[:16]
+        # (piso, inclusões): versões abaixo do piso não são distinguidas por seleção
+        self._changes = (self.version, ())
+        self._fit_forecast()
+
+    def _fit_forecast(self):
+        """Reajusta o modelo sazonal de todas as séries sobre o cubo atual."""
+        self._forecast_pending = False
+        self._forecast_fitted_at = time.monotonic()
+        self._forecast_generation += 1
+        if self.forecast_harmonics is None:
+            return
+        model = fit_forecast_model(self.cube, self.forecast_harmonics)
+        if model is not None:
+            logger.info("Modelo de previsão ajustado: %d séries em %.1f ms", model.n_series, model.fit_seconds * 1000)
+        self.forecast = model
+
+    def refresh_forecast(self, force=False):
+        """
+        Reajusta o modelo sazonal se houver vendas anexadas fora dele e o
+        último ajuste tiver mais de `forecast_refit_interval` segundos (`force`
+        ignora o intervalo). Retorna True se reajustou.
+        """
+        with self._lock:
+            if not self._forecast_pending:
+                return False
+            if not force and time.monotonic() - self._forecast_fitted_at < self.forecast_refit_interval:
+                return False
+            self._fit_forecast()
+            return True
+
+    @property
+    def version(self):
+        return self.slices.version
+
+    @property
+    def df(self):
+        return self._data[0]
+
+    @property
+    def filter_engine(self):
+        return self._data[1]
+
+    @property
+    def cube(self):
+        return self._data[2]
+
+    @classmethod
+    def from_csv(cls, file_path, **kwargs):
+        return cls(process_data(load_data(file_path)), **kwargs)
+
+    def date_bounds(self):
+        """Primeira e última data dos dados."""
+        return self.df['data'].min().date(), self.df['data'].max().date()
+
+    def dimension_values(self, column):
+        """Valores presentes na dimensão, na ordem estável das categorias quando houver."""
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            observed = set(series.cat.codes.unique())
+            return [cat for code, cat in enumerate(series.cat.categories) if code in observed]
+        return list(series.unique())
+
+    def filter_rows(self, filters):
+        """Calcula as posições das linhas que atendem aos filtros."""
+        rows = self.filter_engine.filter(filters)
+        return rows if isinstance(rows, slice) else compact_rows(rows)
+
+    def data_version(self, filters):
+        """
+        Versão dos dados vista pela seleção: `dataset_id`, a versão da última
+        inclusão com linhas na seleção e a geração do modelo de previsão (um
+        reajuste traz dias que o modelo anterior ainda não tinha).
+        """
+        key = get_cache_key(filters)
+        dataset_id, (floor, changes) = self.dataset_id, self._changes
+        with self._versions_lock:
+            memo = self._data_versions.get(key)
+        checked, changed = floor, floor
+        if memo is not None and memo[0] == dataset_id:
+            checked, changed = max(memo[1], floor), max(memo[2], floor)
+        for version, rows in reversed(changes):
+            if version <= checked:
+                break
+            if filters_overlap(filters, rows):
+                changed = version
+                break
+        if changes:
+            checked = max(checked, changes[-1][0])
+        with self._versions_lock:
+            self._data_versions[key] = (dataset_id, checked, changed)
+            self._data_versions.move_to_end(key)
+            if len(self._data_versions) > DATA_VERSION_MEMO_SIZE:
+                self._data_versions.popitem(last=False)
+        return f"{dataset_id}-{changed}-{self._forecast_generation}"
+
+    def make_handle(self, filters):
+        """Registra a fatia dos filtros (se ainda não estiver registrada) e retorna seu handle."""
+        handle = self.slices.make_handle(filters)
+        handle['data_version'] = self.data_version(filters)
+        if self.slices.get(handle) is None:
+            self._flight.do(
+                (handle['key'], handle['version']),
+                lambda: self.slices.put(handle, self.filter_rows(filters)),
+            )
+        return handle
+
+    def select(self, filters, fit_key=None):
+        return self.cube.select(filters, fit_key=fit_key, forecast=self.forecast)
+
+    def _table_rows(self, query):
+        """Linhas da fatia com o filtro e a ordenação da tabela aplicados."""
+        rows = self.slices.get_rows(self.slices.make_handle(query['slice']), self.filter_rows)
+        return query_rows(self.df, rows, query['filter_query'], query['sort_by'])
+
+    def page(self, handle, page_current, page_size, sort_by=None, filter_query=None):
+        """Página da tabela e total de páginas."""
+        query = {
+            'slice': handle['filters'],
+            'filter_query': filter_query or '',
+            'sort_by': sort_by or [],
+        }
+        rows = self.tables.get_rows(self.tables.make_handle(query), self._table_rows)
+        return page_records(self.df, rows, page_current, page_size, columns=list(self.columns))
+
+    def frame(self, handle):
+        """Resolve o handle da fatia para o DataFrame filtrado."""
+        rows = self.slices.get_rows(handle, self.filter_rows)
+        return take_rows(self.df, rows)
+
+    def count(self, handle):
+        """Número de linhas da fatia."""
+        rows = self.slices.get_rows(handle, self.filter_rows)
+        return rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+
+    def iter_frames(self, handle, chunk_rows=50_000):
+        """
+        Linhas da fatia em blocos de até `chunk_rows` (usado na exportação).
+
+        Os dados e as posições são fixados no início: vendas ingeridas durante
+        a iteração não entram, e no máximo um bloco é materializado por vez.
+        """
+        rows = self.slices.get_rows(handle, self.filter_rows)
+        df = self.df
+        columns = list(self.columns)
+        total = rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+        for offset in range(0, total, chunk_rows):
+            if isinstance(rows, slice):
+                chunk = slice(rows.start + offset, min(rows.start + offset + chunk_rows, rows.stop))
+            else:
+                chunk = rows[offset:offset + chunk_rows]
+            yield take_rows(df, chunk)[columns]
+
+    def _prepare(self, rows):
+        """Converte as linhas recebidas para o schema dos dados atuais, ordenadas por data."""
+        rows = pd.DataFrame(rows).copy()
+        rows['data'] = pd.to_datetime(rows['data'])
+        if 'receita' not in rows.columns:
+            rows['receita'] = rows['valor'] * rows['quantidade']
+        rows = process_data(rows)
+        missing = set(self.df.columns) - set(rows.columns)
+        if missing:
+            raise ValueError(f"Colunas ausentes nas linhas novas: {sorted(missing)}")
+        return rows[list(self.df.columns)]
+
+    def _append_in_place(self, rows):
+        """Anexa em O(linhas novas); False se for preciso reconstruir (datas fora de ordem, dimensões novas)."""
+        # `rows` já vem ordenado: basta a primeira linha não ser anterior à última atual
+        if len(self.df) and rows['data'].iloc[0] < self.df['data'].iloc[-1]:
+            return False
+        cube = self.cube.appended(rows)
+        if cube is None:
+            return False
+        if self._store is None:
+            # Cópia única para buffers com folga (o DataFrame carregado pode ser um mmap somente leitura)
+            self._store = ColumnStore(self.df, capacity=int(len(self.df) * 1.25) + len(rows))
+        self._store.append(rows)
+        df = self._store.frame()
+        engine = self.filter_engine.appended(df['data'].to_numpy(), rows)
+        # DataFrame, índices e cubo novos entram juntos
+        self._data = (df, engine, cube)
+        self._forecast_pending = True
+        return True
+
+    def append(self, rows):
+        """
+        Inclui vendas novas nos dados, no cubo e nos índices.
+
+        O caso comum (vendas a partir da última data, com categorias,
+        regiões e produtos já conhecidos) custa O(linhas novas), mais a
+        cópia do cubo denso; os demais reconstroem tudo. O modelo de previsão
+        só é reajustado se o intervalo de reajuste já tiver vencido. Retorna a
+        nova versão dos dados.
+        """
+        rows = self._prepare(rows)
+        if not len(rows):
+            return self.version
+        with self._lock:
+            in_place = self._append_in_place(rows)
+            if in_place:
+                affected = lambda filters: filters_overlap(filters, rows)
+            else:
+                self._index(process_data(pd.concat([self.df, rows], ignore_index=True)))
+                affected = lambda filters: True
+            version = len(self.df)
+            self.slices.advance_version(version, affected)
+            self.tables.advance_version(version, lambda query: affected(query['slice']))
+            if in_place:
+                # Registrada depois dos dados: uma chave nova nunca aponta para o resultado antigo
+                floor, changes = self._changes
+                changes += ((version, rows[['data', *FILTER_DIMENSIONS.values()]]),)
+                if len(changes) > CHANGE_LOG_SIZE:
+                    floor, changes = changes[0][0], changes[1:]
+                self._changes = (floor, changes)
+        self.refresh_forecast()
+        return version
+
+
+def create_data_source(file_path='data/sales_data.csv'):
+    """Cria a fonte de dados configurada em DATA_SOURCE ('memory' ou 'sql')."""
+    forecast_harmonics = settings.FORECAST_ANNUAL_HARMONICS if settings.FORECAST_SEASONAL else None
+    if settings.DATA_SOURCE == 'sql':
+        from utils.sql_source import SqlSource, create_sql_engine
+
+        return SqlSource(
+            create_sql_engine(settings.DATABASE_URL), settings.SALES_TABLE, forecast_harmonics,
+            version_ttl=settings.SQL_VERSION_TTL,
+        )
+    return MemorySource.from_csv(
+        file_path,
+        max_entries=settings.SLICE_REGISTRY_MAX_ENTRIES,
+        max_bytes=settings.SLICE_REGISTRY_MAX_BYTES,
+        forecast_harmonics=forecast_harmonics,
+        top_n_sketch_size=settings.TOP_N_SKETCH_SIZE if settings.TOP_N_MODE == 'approximate' else 0,
+        aggregation_workers=settings.AGGREGATION_WORKERS,
+        forecast_refit_interval=settings.FORECAST_REFIT_INTERVAL,
+    )
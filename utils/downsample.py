@@ -0,0 +1,74 @@
+
+import numpy as np
+
+
+def _buckets(x, y, starts, counts):
+    """
+    Pontos dos baldes como linhas de uma matriz com a largura do maior (os
+    baldes têm no máximo um ponto de diferença); retorna x, y e a máscara
+    das posições válidas.
+    """
+    offsets = np.arange(counts.max())
+    valid = offsets < counts[:, None]
+    index = np.where(valid, starts[:, None] + offsets, starts[:, None])
+    return x[index], y[index], valid
+
+
+def _largest_triangles(xs, ys, valid, a_x, a_y, c_x, c_y):
+    """Posição, em cada linha, do ponto que forma o maior triângulo com A e C (todos os baldes de uma vez)."""
+    # Área (dobrada) = |(Ax - Cx)(y - Ay) - (Ax - x)(Cy - Ay)|, linear em x e y dentro do balde
+    area = (a_x - c_x)[:, None] * ys
+    area += (c_y - a_y)[:, None] * xs
+    area += (-(a_x - c_x) * a_y - a_x * (c_y - a_y))[:, None]
+    np.abs(area, out=area)
+    area[~valid] = -1.0
+    return np.argmax(area, axis=1)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Índices dos pontos escolhidos pelo Largest-Triangle-Three-Buckets.
+
+    Divide a série em `n_out - 2` baldes e, em cada um, mantém o ponto que
+    forma o maior triângulo com o ponto escolhido no balde anterior e a média
+    do balde seguinte. Preserva picos, vales e o formato da curva; o primeiro
+    e o último ponto são sempre mantidos. `x` deve ser crescente.
+
+    Para calcular todos os baldes de uma vez, sem laço em Python, o ponto do
+    balde anterior vem de uma primeira passada que usa a média dele; a
+    segunda passada repete a escolha com esses pontos.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Limites dos baldes internos (o primeiro e o último ponto ficam de fora)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts, stops = edges[:-1], edges[1:]
+    counts = stops - starts
+    mean_x = np.add.reduceat(x[:n - 1], starts) / counts
+    mean_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # O "balde seguinte" do último balde interno é o último ponto; o "anterior" do primeiro, o primeiro ponto
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+    prev_x = np.insert(mean_x[:-1], 0, x[0])
+    prev_y = np.insert(mean_y[:-1], 0, y[0])
+
+    xs, ys, valid = _buckets(x, y, starts, counts)
+    chosen = starts + _largest_triangles(xs, ys, valid, prev_x, prev_y, next_x, next_y)
+    previous = np.insert(chosen[:-1], 0, 0)
+    chosen = starts + _largest_triangles(xs, ys, valid, x[previous], y[previous], next_x, next_y)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    selected[1:-1] = chosen
+    return selected
+
+
+def lttb(x, y, n_out):
+    """Série reduzida a `n_out` pontos por LTTB; retorna (x, y)."""
+    indices = lttb_indices(x, y, n_out)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
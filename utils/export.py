@@ -0,0 +1,198 @@
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID = re.compile(r'[0-9a-f]{32}')
+# Linhas de dados que cabem em uma planilha do Excel (1.048.576, menos o cabeçalho)
+XLSX_MAX_ROWS = 1_048_575
+
+
+def _write_csv(path, frames, columns):
+    import pandas as pd
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(pd.DataFrame(columns=columns).to_csv(index=False, lineterminator='\n'))
+        for frame in frames:
+            frame.to_csv(f, header=False, index=False, lineterminator='\n')
+
+
+def _write_parquet(path, frames, columns):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            # Cada bloco vira um row group: o arquivo nunca é montado inteiro em memória
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pd.DataFrame(columns=columns).to_parquet(path, index=False)
+
+
+def _xlsx_limit_error(rows):
+    return ValueError(
+        f"A seleção tem {rows:,} linhas e o Excel aceita no máximo {XLSX_MAX_ROWS:,} por planilha. "
+        "Exporte em CSV ou Parquet, ou filtre um período menor."
+    )
+
+
+def _write_xlsx(path, frames, columns):
+    from openpyxl import Workbook
+
+    # Modo somente escrita: as linhas vão direto para o XML da planilha, sem manter células em memória
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Vendas')
+    sheet.append(columns)
+    rows = 0
+    try:
+        for frame in frames:
+            rows += len(frame)
+            # A contagem do job já barra seleções grandes; isto cobre dados que cresceram durante a leitura
+            if rows > XLSX_MAX_ROWS:
+                raise _xlsx_limit_error(rows)
+            for row in frame.itertuples(index=False, name=None):
+                sheet.append(row)
+    except Exception:
+        # Fecha o XML temporário da planilha abandonada
+        sheet.close()
+        raise
+    workbook.save(path)
+
+
+# formato -> (rótulo, extensão, escritor)
+EXPORT_FORMATS = {
+    'xlsx': ('Excel (.xlsx)', '.xlsx', _write_xlsx),
+    'csv': ('CSV (.csv)', '.csv', _write_csv),
+    'parquet': ('Parquet (.parquet)', '.parquet', _write_parquet),
+}
+
+
+class ExportJobs:
+    """
+    Exportações da fatia filtrada executadas em segundo plano.
+
+    Cada job lê a fatia em blocos (`source.iter_frames`) e os grava em um
+    arquivo temporário próprio, então a memória usada não depende do tamanho
+    da fatia. O estado de cada job (progresso, arquivo, erro) fica em um JSON
+    no diretório de exportação, visível para todos os workers: o job pode
+    rodar em um worker e ser acompanhado por outro.
+    """
+
+    def __init__(self, source, directory, max_workers=2, chunk_rows=50_000, ttl=3600):
+        self.source = source
+        self.directory = directory
+        self.max_workers = max_workers
+        self.chunk_rows = chunk_rows
+        self.ttl = ttl
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Threads não sobrevivem ao fork: cada worker cria o seu pool sob demanda
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='export')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _status_path(self, job_id):
+        return os.path.join(self.directory, f'{job_id}.json')
+
+    def _save(self, job):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{job['id']}-", suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, self._status_path(job['id']))
+
+    def status(self, job_id):
+        """Estado do job (`queued`, `running`, `done` ou `error`); None se não existir."""
+        if not isinstance(job_id, str) or not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._status_path(job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def submit(self, handle, export_format):
+        """Agenda a exportação da fatia do handle e retorna o id do job."""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação desconhecido: {export_format!r}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.purge()
+        job = {
+            'id': uuid.uuid4().hex,
+            'format': export_format,
+            'status': 'queued',
+            'rows': 0,
+            'total': None,
+            'path': None,
+            'filename': f'dados_exportados{EXPORT_FORMATS[export_format][1]}',
+            'error': None,
+            'created': time.time(),
+        }
+        self._save(job)
+        self._pool().submit(self._run, job, handle)
+        return job['id']
+
+    def _run(self, job, handle):
+        _, suffix, write = EXPORT_FORMATS[job['format']]
+        fd, part = tempfile.mkstemp(dir=self.directory, prefix=f"{job['id']}-", suffix=suffix + '.part')
+        os.close(fd)
+        try:
+            job.update(status='running', total=int(self.source.count(handle)))
+            if job['format'] == 'xlsx' and job['total'] > XLSX_MAX_ROWS:
+                # Falha antes de escrever: o Excel não abriria a planilha
+                raise _xlsx_limit_error(job['total'])
+            self._save(job)
+
+            def frames():
+                for frame in self.source.iter_frames(handle, self.chunk_rows):
+                    yield frame
+                    job['rows'] += len(frame)
+                    self._save(job)
+
+            write(part, frames(), list(self.source.columns))
+            path = os.path.join(self.directory, job['id'] + suffix)
+            # O arquivo final só aparece completo
+            os.replace(part, path)
+            job.update(status='done', path=path)
+        except Exception as e:
+            logger.exception("Falha na exportação %s", job['id'])
+            job.update(status='error', error=str(e) or type(e).__name__)
+            if os.path.exists(part):
+                os.remove(part)
+        self._save(job)
+
+    def purge(self, now=None):
+        """Remove arquivos de jobs mais antigos que `ttl` segundos."""
+        now = time.time() if now is None else now
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,205 @@
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import parse_date_range
+
+FILTER_DIMENSIONS = {'category': 'categoria', 'region': 'regiao'}
+
+
+def normalize_selection(value):
+    """
+    Normaliza o valor de um filtro de dimensão.
+
+    Retorna None para "todas" ('all', None, lista vazia ou contendo 'all') e
+    uma tupla de valores caso contrário, aceitando seleção única ou múltipla.
+    """
+    if value is None or value == 'all':
+        return None
+    if isinstance(value, str):
+        return (value,)
+    values = tuple(value)
+    if not values or 'all' in values:
+        return None
+    return values
+
+
+def make_filters(start_date, end_date, category, region):
+    """
+    Monta o dicionário canônico de filtros do dashboard.
+
+    Seleções equivalentes ("todas", ordem diferente dos valores) geram o mesmo
+    dicionário e, portanto, a mesma chave de cache.
+    """
+    def canonical(value):
+        values = normalize_selection(value)
+        return 'all' if values is None else sorted(set(values))
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'category': canonical(category),
+        'region': canonical(region),
+    }
+
+
+def filters_overlap(filters, rows):
+    """
+    Indica se alguma das linhas atende aos filtros, ou seja, se a fatia
+    desses filtros muda quando as linhas são incluídas nos dados.
+    """
+    start, end = parse_date_range(filters['start_date'], filters['end_date'])
+    datas = rows['data'].to_numpy()
+    mask = (datas >= start.to_datetime64()) & (datas < end.to_datetime64())
+    for key, column in FILTER_DIMENSIONS.items():
+        values = normalize_selection(filters.get(key))
+        if values is not None:
+            mask &= rows[column].isin(values).to_numpy()
+    return bool(mask.any())
+
+
+def _write_bits(bitmap, start, mask):
+    """
+    Grava `mask` no bitmap compactado a partir da linha `start`, preservando
+    os bits anteriores do primeiro byte. O byte compartilhado é montado antes
+    e gravado de uma vez, então quem lê as linhas anteriores nunca o vê pela
+    metade.
+    """
+    offset = start % 8
+    packed = np.packbits(np.concatenate([np.zeros(offset, dtype=bool), mask]))
+    b0 = start // 8
+    if offset:
+        packed[0] |= bitmap[b0] & ((0xFF << (8 - offset)) & 0xFF)
+    bitmap[b0:b0 + len(packed)] = packed
+
+
+class FilterEngine:
+    """
+    Motor de filtros baseado em índices.
+
+    Exige o DataFrame ordenado por `data`: o período vira um intervalo
+    contíguo encontrado por busca binária, e cada valor de `categoria` e
+    `regiao` tem um bitmap (compactado com `np.packbits`) das linhas em que
+    aparece. Um filtro combinado é então um slice mais a interseção dos
+    bitmaps apenas dentro desse slice, com custo proporcional às linhas
+    selecionadas e não ao total.
+
+    Linhas anexadas ao final (com datas não anteriores às existentes) geram
+    um motor novo por `appended`, em O(linhas novas): os bitmaps têm
+    capacidade reservada e recebem apenas os bits novos, depois da última
+    linha do motor atual, que continua válido e inalterado.
+    """
+
+    def __init__(self, df, dimensions=FILTER_DIMENSIONS):
+        datas = df['data'].to_numpy()
+        if len(datas) and not (datas[1:] >= datas[:-1]).all():
+            raise ValueError("O DataFrame precisa estar ordenado por 'data'.")
+        self.datas = datas
+        self.n_rows = len(df)
+        self.dimensions = dict(dimensions)
+        self.bitmaps = {
+            column: self._build_bitmaps(df[column])
+            for column in self.dimensions.values()
+        }
+        self._capacity = (self.n_rows + 7) // 8
+
+    def _build_bitmaps(self, series):
+        """Cria um bitmap compactado por valor da dimensão."""
+        codes, uniques = series.factorize()
+        return {
+            value: np.packbits(codes == code)
+            for code, value in enumerate(uniques)
+        }
+
+    def _reserve(self, nbytes):
+        """Amplia a capacidade dos bitmaps (crescimento geométrico), em cópias."""
+        if nbytes <= self._capacity:
+            return
+        capacity = max(nbytes, int(self._capacity * 1.5) + 1)
+        for bitmaps in self.bitmaps.values():
+            for value, bitmap in bitmaps.items():
+                grown = np.zeros(capacity, dtype=np.uint8)
+                grown[:len(bitmap)] = bitmap
+                bitmaps[value] = grown
+        self._capacity = capacity
+
+    def appended(self, datas, rows):
+        """
+        Motor com as linhas anexadas ao final do DataFrame.
+
+        `datas` é a coluna `data` completa, já com as linhas novas, e `rows` o
+        DataFrame só com as linhas novas. O motor atual não muda: o novo
+        compartilha os bitmaps e grava só os bytes a partir da última linha
+        atual, que o atual nunca lê. Retorna None se as linhas quebrarem a
+        ordenação por data; nesse caso os índices devem ser reconstruídos.
+        """
+        novas = datas[self.n_rows:]
+        if len(novas) != len(rows):
+            raise ValueError("As linhas novas não correspondem ao final de 'datas'.")
+        if not len(novas):
+            return self
+        if (self.n_rows and novas[0] < self.datas[-1]) or not (novas[1:] >= novas[:-1]).all():
+            return None
+
+        engine = copy.copy(self)
+        engine.bitmaps = {column: dict(bitmaps) for column, bitmaps in self.bitmaps.items()}
+        engine._reserve((len(datas) + 7) // 8)
+        vazio = np.zeros(len(rows), dtype=bool)
+        for column, bitmaps in engine.bitmaps.items():
+            codes, uniques = pd.factorize(rows[column])
+            masks = {value: codes == code for code, value in enumerate(uniques)}
+            for value in masks:
+                if value not in bitmaps:
+                    bitmaps[value] = np.zeros(engine._capacity, dtype=np.uint8)
+            # Todos os valores recebem os bytes novos inteiros (zeros onde não aparecem)
+            for value, bitmap in bitmaps.items():
+                _write_bits(bitmap, self.n_rows, masks.get(value, vazio))
+        engine.datas = datas
+        engine.n_rows = len(datas)
+        return engine
+
+    def date_bounds(self, start_date, end_date):
+        """Retorna o intervalo [lo, hi) de linhas do período via busca binária."""
+        start, end = parse_date_range(start_date, end_date)
+        lo = int(np.searchsorted(self.datas, start.to_datetime64(), side='left'))
+        hi = int(np.searchsorted(self.datas, end.to_datetime64(), side='left'))
+        return lo, hi
+
+    def _selection_bits(self, column, values, b0, b1):
+        """União (OR) dos bitmaps dos valores selecionados, restrita aos bytes [b0, b1)."""
+        bitmaps = self.bitmaps[column]
+        bits = None
+        for value in values:
+            if value not in bitmaps:
+                part = np.zeros(b1 - b0, dtype=np.uint8)
+            else:
+                part = bitmaps[value][b0:b1]
+            bits = part.copy() if bits is None else np.bitwise_or(bits, part, out=bits)
+        return bits
+
+    def filter(self, filters):
+        """
+        Retorna as linhas que atendem aos filtros: um `slice` quando só o
+        período está filtrado, ou um array de posições caso contrário.
+        """
+        lo, hi = self.date_bounds(filters['start_date'], filters['end_date'])
+        selections = {
+            column: normalize_selection(filters.get(key))
+            for key, column in self.dimensions.items()
+        }
+        selections = {column: values for column, values in selections.items() if values is not None}
+        if not selections or hi <= lo:
+            return slice(lo, max(lo, hi))
+
+        b0, b1 = lo // 8, (hi + 7) // 8
+        bits = None
+        for column, values in selections.items():
+            part = self._selection_bits(column, values, b0, b1)
+            bits = part if bits is None else np.bitwise_and(bits, part, out=bits)
+
+        mask = np.unpackbits(bits)[lo - b0 * 8:hi - b0 * 8]
+        rows = np.flatnonzero(mask)
+        rows += lo
+        return rows.astype(np.int32) if self.n_rows < np.iinfo(np.int32).max else rows
@@ -0,0 +1,214 @@
+
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Dia 0 (1970-01-01) foi uma quinta-feira: (dia + 3) % 7 dá 0 = segunda ... 6 = domingo
+_WEEKDAY_OFFSET = 3
+_YEAR_DAYS = 365.25
+
+
+def seasonal_design(days, origin, scale, harmonics=3):
+    """
+    Matriz de regressores do modelo sazonal para os dias (códigos desde 1970-01-01).
+
+    Colunas: intercepto, tendência linear (`(dia - origin) / scale`), seis
+    indicadores de dia da semana (segunda é a referência) e `harmonics` pares
+    seno/cosseno da sazonalidade anual (o perfil mês a mês, suavizado).
+    """
+    days = np.asarray(days, dtype=np.int64)
+    weekday = (days + _WEEKDAY_OFFSET) % 7
+    angle = 2 * np.pi * days / _YEAR_DAYS
+    k = np.arange(1, harmonics + 1)
+    return np.column_stack([
+        np.ones(len(days)),
+        (days - origin) / scale,
+        weekday[:, None] == np.arange(1, 7),
+        np.sin(angle[:, None] * k),
+        np.cos(angle[:, None] * k),
+    ])
+
+
+def fit_seasonal(days, values, harmonics=3):
+    """
+    Ajusta o modelo sazonal a várias séries de uma vez.
+
+    `values` tem uma coluna por série, todas nos mesmos `days`: a matriz de
+    regressores é a mesma, então basta um produto `Xᵀ Y` (regressores ×
+    séries) e um sistema pequeno (regressores × regressores) para todas as
+    colunas. Com a tendência em [0, 1] o sistema é bem condicionado.
+    Retorna `(coef, origin, scale)`, com `coef` de forma (regressores, séries).
+    """
+    days = np.asarray(days, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64).reshape(len(days), -1)
+    origin = int(days[0])
+    scale = float(max(days[-1] - days[0], 1))
+    design = seasonal_design(days, origin, scale, harmonics)
+    # lstsq no sistema pequeno tolera regressores sem variação (ex.: dia da semana ausente)
+    coef, *_ = np.linalg.lstsq(design.T @ design, design.T @ values, rcond=None)
+    return coef, origin, scale
+
+
+class SeasonalFit(NamedTuple):
+    """Modelo ajustado de uma série: tendência + dia da semana + sazonalidade anual."""
+    coef: np.ndarray
+    origin: int
+    scale: float
+    harmonics: int
+
+    def predict(self, days):
+        return seasonal_design(days, self.origin, self.scale, self.harmonics) @ self.coef
+
+
+class ForecastModel:
+    """
+    Equações normais do modelo sazonal de cada série categoria × região, em
+    somas de prefixo dia a dia.
+
+    Todas as séries compartilham a matriz de regressores, com origem e
+    escala da tendência fixas na carga; então `Xᵀ X` e `Xᵀ Y` de qualquer
+    janela de dias são a diferença de dois prefixos. `select` ajusta só nos
+    dias da seleção, em tempo que não depende do tamanho da janela: a
+    previsão de um período passado nunca enxerga os dias depois dele. Os
+    mínimos quadrados são lineares em y, então somar o `Xᵀ Y` das células dá
+    o ajuste da soma das séries (total, categorias, regiões ou qualquer
+    seleção do dashboard).
+    """
+
+    def __init__(self, categorias, regioes, days, xtx, xty, origin, scale, harmonics, min_days, fit_seconds=0.0):
+        self.categorias = pd.Index(categorias)
+        self.regioes = pd.Index(regioes)
+        # Dias do ajuste (códigos desde 1970-01-01)
+        self.days = days
+        # Prefixos: (dias + 1, regressores, regressores) e (dias + 1, categorias, regiões, regressores)
+        self.xtx = xtx
+        self.xty = xty
+        self.origin = origin
+        self.scale = scale
+        self.harmonics = harmonics
+        self.min_days = min_days
+        self.fit_seconds = fit_seconds
+
+    @property
+    def n_series(self):
+        return self.xty.shape[1] * self.xty.shape[2]
+
+    def select(self, categorias, regioes, start=None, end=None):
+        """
+        Modelo da soma das séries das categorias e regiões informadas (valores
+        fora do modelo são ignorados), ajustado nos dias em [start, end)
+        (códigos; padrão: todos). Retorna None se a janela tiver menos de
+        `min_days` dias.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.days, start, side='left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, end, side='left'))
+        if hi - lo < self.min_days:
+            return None
+        cat_idx = self.categorias.get_indexer(categorias)
+        reg_idx = self.regioes.get_indexer(regioes)
+        cat_idx, reg_idx = cat_idx[cat_idx >= 0], reg_idx[reg_idx >= 0]
+        xty = (self.xty[hi][cat_idx][:, reg_idx] - self.xty[lo][cat_idx][:, reg_idx]).sum(axis=(0, 1))
+        # lstsq no sistema pequeno tolera regressores sem variação na janela
+        coef, *_ = np.linalg.lstsq(self.xtx[hi] - self.xtx[lo], xty, rcond=None)
+        return SeasonalFit(coef, self.origin, self.scale, self.harmonics)
+
+
+def _daily_cells(sales):
+    """Dias (códigos) com vendas e a receita dia × (categoria·região) de um cubo ou agregado."""
+    days = np.asarray(sales.dias).astype('datetime64[D]').astype(np.int64)
+    receita = np.asarray(sales.receita, dtype=np.float64)
+    return days, receita.reshape(len(days), -1)
+
+
+def _prefix(values):
+    """Somas acumuladas ao longo do primeiro eixo, com uma linha de zeros no início."""
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix
+
+
+def fit_forecast_model(sales, harmonics=3, min_days=None):
+    """
+    Monta, em uma passada, as somas de prefixo do modelo sazonal de todas as
+    séries categoria × região de `sales` (um `SalesCube` ou `SalesAggregates`).
+
+    Retorna None com poucos dias para estimar os regressores com folga
+    (padrão: 4 × o número de regressores); o mesmo mínimo vale para a janela
+    de cada seleção.
+    """
+    started = time.perf_counter()
+    days, values = _daily_cells(sales)
+    min_days = min_days or 4 * (8 + 2 * harmonics)
+    if len(days) < min_days:
+        return None
+    origin = int(days[0])
+    scale = float(max(days[-1] - days[0], 1))
+    design = seasonal_design(days, origin, scale, harmonics)
+    xtx = _prefix(design[:, :, None] * design[:, None, :])
+    xty = _prefix(np.einsum('dp,dc->dcp', design, values))
+    return ForecastModel(
+        sales.categorias, sales.regioes, days, xtx,
+        xty.reshape(len(days) + 1, len(sales.categorias), len(sales.regioes), -1),
+        origin, scale, harmonics, min_days,
+        fit_seconds=time.perf_counter() - started,
+    )
+
+
+def _wape(actual, predicted):
+    """Erro absoluto ponderado (Σ|erro| / Σ|real|) de cada coluna."""
+    denominator = np.abs(actual).sum(axis=0)
+    return np.abs(actual - predicted).sum(axis=0) / np.where(denominator > 0, denominator, np.nan)
+
+
+def backtest(sales, horizon=30, harmonics=3):
+    """
+    Avalia a previsão fora da amostra: ajusta sem os últimos `horizon` dias e
+    compara as previsões para eles com os valores reais, no modelo sazonal e
+    na reta usada antes (`utils.regression`).
+
+    Retorna o WAPE de cada nível (células categoria × região, totais por
+    categoria, por região e total geral) para os dois modelos.
+    """
+    days, values = _daily_cells(sales)
+    train, test = slice(None, -horizon), slice(-horizon, None)
+    n_cat, n_reg = len(sales.categorias), len(sales.regioes)
+
+    coef, origin, scale = fit_seasonal(days[train], values[train], harmonics)
+    seasonal = seasonal_design(days[test], origin, scale, harmonics) @ coef
+    linear_design = np.column_stack([np.ones(len(days)), days - days[0]]).astype(np.float64)
+    linear_coef, *_ = np.linalg.lstsq(linear_design[train], values[train], rcond=None)
+    linear = linear_design[test] @ linear_coef
+
+    def levels(matrix):
+        cube = matrix.reshape(len(matrix), n_cat, n_reg)
+        return {
+            'celulas': matrix,
+            'categorias': cube.sum(axis=2),
+            'regioes': cube.sum(axis=1),
+            'total': cube.sum(axis=(1, 2))[:, None],
+        }
+
+    actual, seasonal, linear = levels(values[test]), levels(seasonal), levels(linear)
+    return {
+        level: {
+            'sazonal': float(np.nanmean(_wape(actual[level], seasonal[level]))),
+            'linear': float(np.nanmean(_wape(actual[level], linear[level]))),
+        }
+        for level in actual
+    }
+
+
+def seasonal_forecast(daily_days, fit, horizon=30):
+    """
+    Valores ajustados nos dias observados e previsão para os `horizon` dias
+    seguintes, no formato de `utils.regression.trend_and_forecast` (dias
+    contados a partir do primeiro dia observado).
+    """
+    if fit is None or not len(daily_days):
+        return None, None, None
+    daily_days = np.asarray(daily_days, dtype=np.int64)
+    first, last = int(daily_days[0]), int(daily_days[-1])
+    future = np.arange(last + 1, last + horizon + 1)
+    return fit.predict(daily_days), (future - first).reshape(-1, 1), fit.predict(future)
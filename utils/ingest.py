@@ -0,0 +1,204 @@
+
+import csv
+import fcntl
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import jsonify, request
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['data', 'valor', 'quantidade', 'categoria', 'regiao', 'produto']
+
+
+def _is_jsonl(path):
+    return os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson')
+
+
+class FileTailer:
+    """
+    Lê as linhas completas anexadas a um arquivo CSV ou JSONL desde a última
+    leitura (só os bytes novos, nunca o arquivo inteiro).
+
+    Uma linha sem '\\n' final ainda está sendo escrita e fica para a próxima
+    leitura. Se o arquivo for truncado ou substituído (rotação), a leitura
+    recomeça do início do novo arquivo.
+    """
+
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self.jsonl = _is_jsonl(path)
+        self.offset = 0
+        self.header = None
+        self._inode = None
+        if not from_start and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self._read_header(f)
+                self.offset = os.fstat(f.fileno()).st_size
+                self._inode = os.fstat(f.fileno()).st_ino
+
+    def _read_header(self, f):
+        if not self.jsonl:
+            line = f.readline()
+            if line.endswith(b'\n'):
+                self.header = next(csv.reader([line.decode('utf-8')]))
+                self.offset = max(self.offset, f.tell())
+
+    def poll(self):
+        """Retorna um DataFrame com as linhas novas, ou None se não houver."""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return None
+        with f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self.offset:
+                self._inode = stat.st_ino
+                self.offset = 0
+                self.header = None
+            if self.header is None and not self.jsonl:
+                self._read_header(f)
+                if self.header is None:
+                    return None
+            if stat.st_size <= self.offset:
+                return None
+            f.seek(self.offset)
+            chunk = f.read(stat.st_size - self.offset)
+
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return None
+        self.offset += end
+        return self._parse(chunk[:end])
+
+    def _parse(self, chunk):
+        # pandas só é importado na primeira leitura, fora da importação do app
+        import pandas as pd
+
+        if self.jsonl:
+            records = [json.loads(line) for line in chunk.splitlines() if line.strip()]
+            return pd.DataFrame.from_records(records)
+        return pd.read_csv(io.BytesIO(chunk), names=self.header, header=None)
+
+
+class Ingestor:
+    """
+    Thread que acompanha o arquivo de ingestão e anexa as vendas novas à
+    fonte de dados. Cada worker roda a sua, lendo o mesmo arquivo, então
+    todos chegam aos mesmos dados (e à mesma versão).
+    """
+
+    def __init__(self, source, tailer, interval=0.5):
+        self.source = source
+        self.tailer = tailer
+        self.interval = interval
+        self.stats = {'batches': 0, 'rows': 0, 'errors': 0, 'last_batch_seconds': 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """Lê e anexa um lote; retorna o número de linhas anexadas."""
+        rows = self.tailer.poll()
+        if rows is None or not len(rows):
+            return 0
+        started = time.perf_counter()
+        self.source.append(rows)
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(rows)
+        self.stats['last_batch_seconds'] = time.perf_counter() - started
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+                # Lotes que chegaram antes de vencer o intervalo de reajuste entram no modelo depois
+                if hasattr(self.source, 'refresh_forecast'):
+                    self.source.refresh_forecast()
+            except Exception:
+                self.stats['errors'] += 1
+                logger.exception("Erro ao ingerir vendas de '%s'", self.tailer.path)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia a thread (no processo atual; após um fork, chame de novo no filho)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sales-ingestor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def create_ingestor(source, path, interval=0.5, from_start=True):
+    """Cria o ingestor do arquivo `path`; None se não houver arquivo configurado ou a fonte não aceitar inclusões."""
+    if not path:
+        return None
+    if not hasattr(source, 'append'):
+        logger.warning("A fonte de dados %s não aceita ingestão incremental.", type(source).__name__)
+        return None
+    return Ingestor(source, FileTailer(path, from_start=from_start), interval=interval)
+
+
+def append_records(path, records):
+    """
+    Anexa registros de venda ao arquivo de ingestão (JSONL ou CSV), com trava
+    exclusiva para que escritas concorrentes não se misturem.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records)
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {missing}")
+    frame['data'] = pd.to_datetime(frame['data']).dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    with open(path, 'a+', encoding='utf-8', newline='') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if _is_jsonl(path):
+                payload = frame.to_json(orient='records', lines=True, force_ascii=False)
+                f.write(payload if payload.endswith('\n') else payload + '\n')
+            else:
+                f.seek(0)
+                first_line = f.readline()
+                if first_line:
+                    header = next(csv.reader([first_line]))
+                    frame = frame.reindex(columns=header)
+                f.seek(0, os.SEEK_END)
+                f.write(frame.to_csv(index=False, header=not first_line, lineterminator='\n'))
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    return len(frame)
+
+
+def register_ingest_endpoint(server, path, route='/api/ingest'):
+    """
+    Expõe `POST /api/ingest` no servidor Flask.
+
+    Aceita uma lista JSON de vendas (ou `{"rows": [...]}`) e as grava no
+    arquivo de ingestão; as threads de ingestão de todos os workers as
+    incorporam na próxima leitura.
+    """
+    def ingest():
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('rows')
+        if not isinstance(payload, list):
+            return jsonify({'erro': 'Envie uma lista JSON de vendas.'}), 400
+        try:
+            accepted = append_records(path, payload)
+        except (ValueError, TypeError) as e:
+            return jsonify({'erro': str(e)}), 400
+        return jsonify({'aceitas': accepted}), 202
+
+    server.add_url_rule(route, 'ingest', ingest, methods=['POST'])
@@ -0,0 +1,501 @@
+
+import bisect
+import collections
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+from flask import Response
+
+from utils.process_memory import process_memory
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Counter:
+    """Contador monotônico, com uma série por combinação de rótulos."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] += amount
+
+    def series(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Histogram:
+    """
+    Histograma de baldes fixos (no formato do Prometheus: contagens
+    cumulativas por limite superior, soma e total de observações).
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def series(self):
+        with self._lock:
+            return [[list(labels), {'counts': list(counts), 'sum': total}] for labels, (counts, total) in self._values.items()]
+
+
+class Registry:
+    """
+    Conjunto de métricas do processo, exportado no formato texto do Prometheus.
+
+    Além das métricas atualizadas no caminho das requisições, coletores
+    (funções chamadas na leitura) fornecem valores já mantidos em outro
+    lugar, como os contadores dos caches e a memória do processo.
+
+    Com vários workers, cada um grava periodicamente um snapshot em
+    `directory` e `/metrics` soma os snapshots de todos: qualquer worker
+    que atender a leitura retorna os totais do servidor.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self.directory = None
+        self.flush_interval = 5.0
+        self._last_flush = 0.0
+
+    def _add(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector):
+        """
+        `collector()` retorna uma lista de (nome, tipo, descrição, rótulos,
+        [(valores dos rótulos, valor)]), com tipo 'counter' ou 'gauge'.
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self):
+        """Estado atual de todas as métricas, serializável em JSON."""
+        families = {}
+        for metric in self._metrics.values():
+            families[metric.name] = {
+                'type': metric.kind,
+                'help': metric.documentation,
+                'labels': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'series': metric.series(),
+            }
+        for collector in self._collectors:
+            try:
+                collected = collector()
+            except Exception:
+                logger.exception("Falha no coletor de métricas %r", collector)
+                continue
+            for name, kind, documentation, labelnames, samples in collected:
+                families[name] = {
+                    'type': kind,
+                    'help': documentation,
+                    'labels': list(labelnames),
+                    'buckets': [],
+                    'series': [[list(labels), value] for labels, value in samples],
+                }
+        return families
+
+    def configure(self, directory=None, flush_interval=5.0):
+        """Habilita os snapshots por processo em `directory` (vazio = só este processo)."""
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def flush(self):
+        """Grava o snapshot deste processo (sem efeito sem `directory`)."""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'pid': os.getpid(), 'families': self.snapshot()}, f)
+        os.replace(tmp, path)
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Falha ao gravar o snapshot de métricas")
+
+    def collect(self):
+        """Snapshot a exportar: o deste processo ou a soma dos snapshots de todos os workers."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        return render_text(self.collect())
+
+    def clear_directory(self):
+        """Remove os snapshots de uma execução anterior (chamado na partida do servidor)."""
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                os.remove(path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """
+    Soma contadores e histogramas dos snapshots de vários processos.
+
+    Contadores de workers encerrados continuam somados (os totais não
+    regridem); gauges só valem para processos vivos.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        alive = _alive(snapshot['pid'])
+        for name, family in snapshot['families'].items():
+            if family['type'] == 'gauge' and not alive:
+                continue
+            target = merged.setdefault(name, {**family, 'series': {}})
+            for labels, value in family['series']:
+                key = tuple(labels)
+                current = target['series'].get(key)
+                if current is None:
+                    target['series'][key] = value
+                elif family['type'] == 'histogram':
+                    current['counts'] = [a + b for a, b in zip(current['counts'], value['counts'])]
+                    current['sum'] += value['sum']
+                elif family['type'] == 'counter':
+                    target['series'][key] = current + value
+                else:
+                    target['series'][key] = value
+    for family in merged.values():
+        family['series'] = [[list(labels), value] for labels, value in family['series'].items()]
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_text(families):
+    """Formata as métricas no formato de exposição texto do Prometheus (0.0.4)."""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in family['series']:
+            if family['type'] == 'histogram':
+                cumulative = 0
+                for bound, count in zip(list(family['buckets']) + [float('inf')], value['counts']):
+                    cumulative += count
+                    le = 'le="{}"'.format(_number(bound if bound == float('inf') else float(bound)))
+                    lines.append(f"{name}_bucket{_labels(family['labels'], labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(family['labels'], labels)} {value['sum']!r}")
+                lines.append(f"{name}_count{_labels(family['labels'], labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(family['labels'], labels)} {_number(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+CALLBACK_SECONDS = registry.histogram(
+    'dashboard_callback_seconds', 'Duração dos callbacks do Dash, incluindo a serialização da resposta.', ['callback'])
+CALLBACK_PHASE_SECONDS = registry.histogram(
+    'dashboard_callback_phase_seconds',
+    'Duração de cada fase dos callbacks (deserialize, compute, figure, serialize).', ['callback', 'phase'])
+CALLBACK_RESPONSE_BYTES = registry.histogram(
+    'dashboard_callback_response_bytes', 'Tamanho do JSON de resposta dos callbacks.', ['callback'], SIZE_BUCKETS)
+CALLBACKS_TOTAL = registry.counter(
+    'dashboard_callbacks_total', 'Callbacks executados por resultado (ok, no_update, error).', ['callback', 'outcome'])
+ANALYTICS_SECONDS = registry.histogram(
+    'dashboard_analytics_seconds', 'Duração das funções de análise.', ['function'])
+SLOW_CALLBACKS_TOTAL = registry.counter(
+    'dashboard_slow_callbacks_total', 'Callbacks acima do limite de perfilamento.', ['callback'])
+
+_local = threading.local()
+
+
+@contextmanager
+def phase(name):
+    """Atribui o tempo do bloco a uma fase do callback em execução (sem efeito fora de um callback)."""
+    phases = getattr(_local, 'phases', None)
+    if phases is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def timed(func):
+    """Registra a duração de cada chamada em `dashboard_analytics_seconds`."""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            ANALYTICS_SECONDS.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+class SlowCallbackProfiler:
+    """
+    Perfil por amostragem dos callbacks lentos.
+
+    Enquanto há callbacks em execução, uma thread lê as pilhas das threads
+    que os executam a cada `interval` segundos. Ao final, se o callback
+    passou de `threshold` segundos, as pilhas amostradas são gravadas no
+    formato "folded" (uma pilha por linha com a contagem, pronto para
+    flamegraph.pl/speedscope) em `directory`; senão, são descartadas.
+    """
+
+    def __init__(self, threshold, interval=0.005, directory=None):
+        self.threshold = threshold
+        self.interval = interval
+        self.directory = directory
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Threads não sobrevivem ao fork: cada worker cria a sua
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='slow-callback-profiler', daemon=True)
+            self._thread.start()
+
+    def begin(self):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._ensure_thread()
+            self._active[thread_id] = collections.Counter()
+        self._wakeup.set()
+        return thread_id
+
+    def end(self, thread_id, callback, elapsed):
+        with self._lock:
+            samples = self._active.pop(thread_id, None)
+        if samples is None or elapsed < self.threshold:
+            return None
+        SLOW_CALLBACKS_TOTAL.inc(callback)
+        path = None
+        if self.directory and samples:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{callback}-{os.getpid()}.folded')
+            with open(path, 'w') as f:
+                for stack, count in samples.most_common():
+                    f.write(f'{stack} {count}\n')
+        top = samples.most_common(1)
+        logger.warning(
+            "Callback lento: %s levou %.0f ms (%d amostras%s)%s", callback, elapsed * 1000, sum(samples.values()),
+            f"; pilha mais frequente termina em {top[0][0].rsplit(';', 1)[-1]}" if top else "",
+            f"; perfil em {path}" if path else "",
+        )
+        return path
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id in active:
+                    samples = self._active.get(thread_id)
+                    frame = frames.get(thread_id)
+                    if samples is not None and frame is not None:
+                        samples[_folded(frame)] += 1
+            time.sleep(self.interval)
+
+
+def _folded(frame, limit=64):
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+def _instrument(callback, name, profiler):
+    @wraps(callback)
+    def wrapper(*args, **kwargs):
+        phases = _local.phases = {}
+        token = profiler.begin() if profiler is not None else None
+        outcome, response = 'error', None
+        started = time.perf_counter()
+        try:
+            response = callback(*args, **kwargs)
+            outcome = 'ok'
+            return response
+        except PreventUpdate:
+            outcome = 'no_update'
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _local.phases = None
+            CALLBACK_SECONDS.observe(elapsed, name)
+            CALLBACKS_TOTAL.inc(name, outcome)
+            for phase_name, seconds in phases.items():
+                CALLBACK_PHASE_SECONDS.observe(seconds, name, phase_name)
+            if outcome == 'ok':
+                # O que sobra fora das fases marcadas: validação e serialização da resposta pelo Dash
+                CALLBACK_PHASE_SECONDS.observe(max(elapsed - sum(phases.values()), 0.0), name, 'serialize')
+                if isinstance(response, (str, bytes)):
+                    CALLBACK_RESPONSE_BYTES.observe(len(response), name)
+            if token is not None:
+                profiler.end(token, name, elapsed)
+            registry.maybe_flush()
+
+    return wrapper
+
+
+def instrument_callbacks(dash_app, profiler=None):
+    """
+    Envolve todos os callbacks registrados no app (chamar depois de declará-los).
+
+    O Dash guarda em `callback_map` a função que executa o callback e já
+    devolve o JSON da resposta, então o tempo medido inclui a serialização
+    e o tamanho do payload sai do próprio retorno.
+    """
+    for entry in dash_app.callback_map.values():
+        # Callbacks clientside rodam no navegador e não têm função no servidor
+        callback = entry.get('callback')
+        if callback is None or getattr(callback, '_instrumented', False):
+            continue
+        wrapper = _instrument(callback, callback.__name__, profiler)
+        wrapper._instrumented = True
+        entry['callback'] = wrapper
+
+
+def process_memory_collector():
+    """Coletor da memória do processo (RSS, PSS e USS), com o pid como rótulo."""
+    memory = process_memory()
+    if memory is None:
+        return []
+    pid = str(os.getpid())
+    samples = [((pid, kind), memory[kind]) for kind in ('rss', 'pss', 'uss') if kind in memory]
+    return [('dashboard_process_memory_bytes', 'gauge', 'Memória do processo.', ('pid', 'kind'), samples)]
+
+
+def cache_collector(get_stats):
+    """
+    Coletor dos contadores de cache: `get_stats()` retorna
+    {nível: {'hits': ..., 'misses': ..., 'bytes_read': ..., ...}}.
+    """
+    def collect():
+        stats = get_stats()
+        requests, transferred = [], []
+        for tier, counts in stats.items():
+            for result in ('hits', 'misses'):
+                if result in counts:
+                    requests.append(((tier, result[:-1] if result == 'hits' else 'miss'), counts[result]))
+            for direction in ('bytes_read', 'bytes_written'):
+                if direction in counts:
+                    transferred.append(((tier, direction[len('bytes_'):]), counts[direction]))
+        return [
+            ('dashboard_cache_requests_total', 'counter', 'Consultas aos caches por nível e resultado.', ('tier', 'result'), requests),
+            ('dashboard_cache_bytes_total', 'counter', 'Bytes lidos e gravados por nível de cache.', ('tier', 'direction'), transferred),
+        ]
+
+    return collect
+
+
+def register_metrics_endpoint(server, route='/metrics'):
+    """Expõe as métricas no formato texto do Prometheus no servidor Flask."""
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    server.add_url_rule(route, 'metrics', metrics)
@@ -0,0 +1,18 @@
+
+# Nomes dos painéis do dashboard, sem dependências: o app monta as saídas dos
+# callbacks na importação sem carregar pandas, NumPy e o resto das consultas.
+
+# painel -> método dos agregados que o calcula
+DASHBOARD_PANELS = {
+    'kpis': 'calculate_kpis',
+    'sales_evolution': 'get_sales_evolution',
+    'category_sales': 'get_sales_by_category',
+    'top_products': 'get_top_products',
+    'region_heatmap': 'get_region_heatmap_data',
+    'trend_analysis': 'get_trend_analysis',
+    'sales_forecast': 'get_sales_forecast',
+}
+
+# Painéis recalculados no navegador a partir do payload (os demais dependem
+# dos produtos ou da série diária e continuam no servidor)
+CLIENT_PANELS = ('kpis', 'sales_evolution', 'category_sales', 'region_heatmap')
@@ -0,0 +1,86 @@
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.schema import day_code
+
+
+def local_days(dia):
+    """
+    Dias distintos (em ordem) de uma partição e o índice de cada linha neles.
+
+    Equivale a `np.unique(dia, return_inverse=True)`, mas em O(linhas): os
+    dias de uma partição mensal cabem em um intervalo de até 31 códigos.
+    """
+    if not len(dia):
+        return dia[:0], np.zeros(0, dtype=np.int64)
+    first = dia.min()
+    offset = dia - first
+    present = np.bincount(offset) > 0
+    position = np.cumsum(present) - 1
+    return (first + np.flatnonzero(present)).astype(dia.dtype), position[offset]
+
+
+class SalesPartitions:
+    """
+    Vendas divididas em partições mensais, cada uma um bloco de colunas
+    (códigos de dia, categoria, região e produto, receita e quantidade).
+
+    As dimensões são codificadas uma vez, com dicionários globais, para que
+    os agregados parciais de cada partição tenham os mesmos eixos e possam
+    ser somados ou concatenados sem reindexar. Com os dados em ordem de
+    data (o caso do dashboard), os blocos são fatias das colunas, sem cópia.
+
+    `map` roda uma função por partição em um pool de threads: os kernels do
+    NumPy usados nas agregações (`bincount`, `unique`, aritmética) liberam o
+    GIL, então as partições avançam em paralelo. É assim que o cubo é
+    construído (`utils.cube.build_cube`).
+    """
+
+    def __init__(self, df):
+        dia = df['dia'].to_numpy() if 'dia' in df.columns else day_code(df['data'])
+        categoria, self.categorias = pd.factorize(df['categoria'], sort=True)
+        regiao, self.regioes = pd.factorize(df['regiao'], sort=True)
+        produto, self.produtos = pd.factorize(df['produto'], sort=True)
+        columns = {
+            'dia': dia,
+            'categoria': categoria,
+            'regiao': regiao,
+            'produto': produto,
+            'receita': df['receita'].to_numpy(dtype=np.float64),
+            'quantidade': df['quantidade'].to_numpy(dtype=np.float64),
+        }
+
+        # Mês de cada linha (a coluna AAAAMM de `process_data`, se existir, evita a conversão de datas)
+        if 'mes' in df.columns:
+            mes = df['mes'].to_numpy()
+            month = ((mes // 100 - 1970) * 12 + mes % 100 - 1).astype('datetime64[M]')
+        else:
+            month = dia.astype('datetime64[D]').astype('datetime64[M]')
+        if len(month) and not (month[1:] >= month[:-1]).all():
+            order = np.argsort(month, kind='stable')
+            month = month[order]
+            columns = {name: values[order] for name, values in columns.items()}
+        starts = np.flatnonzero(np.r_[True, month[1:] != month[:-1]]) if len(month) else np.zeros(0, dtype=np.int64)
+        bounds = np.r_[starts, len(month)]
+        self.months = month[starts]
+        self.blocks = [
+            {name: values[a:b] for name, values in columns.items()}
+            for a, b in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @property
+    def n_rows(self):
+        return sum(len(block['dia']) for block in self.blocks)
+
+    def map(self, func, workers=1):
+        """Resultados de `func(bloco)` para todas as partições, na ordem das partições."""
+        if workers <= 1 or len(self.blocks) <= 1:
+            return [func(block) for block in self.blocks]
+        with ThreadPoolExecutor(max_workers=min(workers, len(self.blocks))) as executor:
+            return list(executor.map(func, self.blocks))
@@ -0,0 +1,55 @@
+
+import os
+
+_ROLLUP_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Shared_Clean': 'shared_clean',
+    'Shared_Dirty': 'shared_dirty',
+    'Private_Clean': 'private_clean',
+    'Private_Dirty': 'private_dirty',
+    'Anonymous': 'anonymous',
+}
+
+
+def process_memory(pid=None):
+    """
+    Uso de memória de um processo em bytes, lido de `/proc/<pid>/smaps_rollup`.
+
+    Além do RSS, retorna o PSS (páginas compartilhadas divididas entre os
+    processos que as mapeiam) e o USS (páginas exclusivas), que mostram o
+    custo real de cada worker quando os dados são compartilhados.
+    Retorna None fora do Linux ou se o processo não existir.
+    """
+    path = f"/proc/{pid or os.getpid()}/smaps_rollup"
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    memory = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        if name in _ROLLUP_FIELDS:
+            memory[_ROLLUP_FIELDS[name]] = int(value.split()[0]) * 1024
+    memory['uss'] = memory.get('private_clean', 0) + memory.get('private_dirty', 0)
+    return memory
+
+
+def child_pids(parent_pid):
+    """PIDs dos processos filhos diretos (ex.: workers de um master do gunicorn)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # O nome do processo pode conter espaços; os campos seguem o último ')'
+        fields = stat.rsplit(')', 1)[1].split()
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
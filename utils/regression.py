@@ -0,0 +1,147 @@
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+
+class LinearFit(NamedTuple):
+    """Reta ajustada por mínimos quadrados: y = intercept + slope * x."""
+    slope: float
+    intercept: float
+
+    def predict(self, x):
+        return self.intercept + self.slope * np.asarray(x, dtype=np.float64)
+
+
+class SufficientStats:
+    """
+    Estatísticas suficientes da regressão linear simples: n, Σx, Σy, Σxy, Σx².
+
+    São somáveis (`a + b` equivale a ajustar a união dos pontos) e podem ter
+    a origem de x deslocada, então o ajuste de qualquer intervalo sai de
+    estatísticas pré-calculadas sem revisitar os pontos.
+    """
+
+    __slots__ = ('n', 'sx', 'sy', 'sxy', 'sxx')
+
+    def __init__(self, n=0, sx=0.0, sy=0.0, sxy=0.0, sxx=0.0):
+        self.n = n
+        self.sx = sx
+        self.sy = sy
+        self.sxy = sxy
+        self.sxx = sxx
+
+    @classmethod
+    def from_points(cls, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        return cls(len(x), x.sum(), y.sum(), x @ y, x @ x)
+
+    def __add__(self, other):
+        return SufficientStats(
+            self.n + other.n,
+            self.sx + other.sx,
+            self.sy + other.sy,
+            self.sxy + other.sxy,
+            self.sxx + other.sxx,
+        )
+
+    def shift(self, origin):
+        """Estatísticas equivalentes com x medido a partir de `origin`."""
+        return SufficientStats(
+            self.n,
+            self.sx - self.n * origin,
+            self.sy,
+            self.sxy - origin * self.sy,
+            self.sxx - 2 * origin * self.sx + self.n * origin * origin,
+        )
+
+    def fit(self):
+        """Ajuste em forma fechada; None se houver menos de dois valores de x distintos."""
+        denominator = self.n * self.sxx - self.sx * self.sx
+        if self.n < 2 or denominator <= 0:
+            return None
+        slope = (self.n * self.sxy - self.sx * self.sy) / denominator
+        intercept = (self.sy - slope * self.sx) / self.n
+        return LinearFit(float(slope), float(intercept))
+
+
+class PrefixStats:
+    """
+    Somas acumuladas das estatísticas suficientes de uma série diária.
+
+    Com elas, as estatísticas de qualquer intervalo de dias saem em O(log n),
+    já reposicionadas para contar os dias a partir do primeiro dia presente.
+    """
+
+    def __init__(self, x, y):
+        self.x = np.asarray(x, dtype=np.int64)
+        x = self.x.astype(np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        zero = np.zeros(1)
+        self._n = np.arange(len(x) + 1)
+        self._sx = np.concatenate([zero, np.cumsum(x)])
+        self._sy = np.concatenate([zero, np.cumsum(y)])
+        self._sxy = np.concatenate([zero, np.cumsum(x * y)])
+        self._sxx = np.concatenate([zero, np.cumsum(x * x)])
+
+    def range(self, start, stop):
+        """Estatísticas dos pontos com start <= x < stop, com origem no primeiro deles."""
+        i = int(np.searchsorted(self.x, start, side='left'))
+        j = int(np.searchsorted(self.x, stop, side='left'))
+        if j <= i:
+            return SufficientStats()
+        stats = SufficientStats(
+            int(self._n[j] - self._n[i]),
+            self._sx[j] - self._sx[i],
+            self._sy[j] - self._sy[i],
+            self._sxy[j] - self._sxy[i],
+            self._sxx[j] - self._sxx[i],
+        )
+        return stats.shift(float(self.x[i]))
+
+
+# Ajustes por impressão digital dos filtros e versão dos dados (LRU)
+_FIT_CACHE_SIZE = 256
+_fit_cache = OrderedDict()
+_fit_lock = threading.Lock()
+fit_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def cached_fit(key, compute):
+    """
+    Retorna o ajuste guardado para `key`, calculando-o com `compute` se necessário.
+
+    O cache é do processo e não expira: `key` deve incluir a versão dos
+    dados da fonte, para que dados novos levem a um novo ajuste.
+    """
+    if key is None:
+        return compute()
+    with _fit_lock:
+        if key in _fit_cache:
+            _fit_cache.move_to_end(key)
+            fit_cache_stats['hits'] += 1
+            return _fit_cache[key]
+        fit_cache_stats['misses'] += 1
+    fit = compute()
+    with _fit_lock:
+        _fit_cache[key] = fit
+        while len(_fit_cache) > _FIT_CACHE_SIZE:
+            _fit_cache.popitem(last=False)
+    return fit
+
+
+def clear_fit_cache():
+    with _fit_lock:
+        _fit_cache.clear()
+
+
+def trend_and_forecast(dias, fit, horizon=30):
+    """Linha de tendência nos dias observados e previsão para os próximos `horizon` dias."""
+    if fit is None:
+        return None, None, None
+    dias = np.asarray(dias)
+    future_days = np.arange(dias.max() + 1, dias.max() + horizon + 1).reshape(-1, 1)
+    return fit.predict(dias), future_days, fit.predict(future_days.ravel())
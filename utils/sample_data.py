@@ -0,0 +1,154 @@
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.schema import CATEGORIAS, REGIOES
+
+DEFAULT_OPTIONS = {
+    'start': '2022-01-01',
+    'end': '2025-01-01',
+    'n_products': 100,
+    'n_regions': len(REGIOES),
+    # Expoente da lei de Zipf para a popularidade dos produtos (0 = uniforme)
+    'product_skew': 1.0,
+    # Amplitude da sazonalidade anual e semanal das vendas (0 = uniforme no período)
+    'seasonality': 0.3,
+}
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def region_names(n_regions):
+    """As regiões do schema primeiro; acima delas, 'Região 8', 'Região 9'..."""
+    return REGIOES[:n_regions] + [f'Região {i}' for i in range(len(REGIOES) + 1, n_regions + 1)]
+
+
+def product_names(n_products):
+    return [f'Produto {i}' for i in range(1, n_products + 1)]
+
+
+def _product_cdf(n_products, skew):
+    """Distribuição acumulada de Zipf: o produto de posição k tem peso 1/k**skew."""
+    weights = np.arange(1, n_products + 1, dtype=np.float64) ** -skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def _time_cdf(start, end, seasonality):
+    """
+    Distribuição acumulada das vendas ao longo do período, dia a dia.
+
+    A intensidade diária tem pico em dezembro (sazonalidade anual) e nos fins
+    de semana (sazonalidade semanal); com `seasonality=0` é constante.
+    """
+    days = pd.date_range(start, end, freq='D', inclusive='left')
+    yearly = np.cos(2 * np.pi * (days.dayofyear.to_numpy() - 350) / 365.25)
+    weekly = np.where(days.dayofweek.to_numpy() >= 5, 1.0, -0.4)
+    intensity = np.clip(1 + seasonality * (yearly + 0.5 * weekly), 0.05, None)
+    cdf = np.concatenate([[0.0], np.cumsum(intensity)])
+    return pd.Timestamp(start).value, cdf / cdf[-1]
+
+
+def generate_chunk(index, chunk_rows, total_rows, seed=42, **options):
+    """
+    Gera o bloco `index` (de `chunk_rows` linhas) de um dataset de `total_rows` linhas.
+
+    Cada bloco tem seu próprio gerador (`SeedSequence(seed, spawn_key=(index,))`),
+    então o conteúdo depende só de (seed, index, chunk_rows, opções), nunca de
+    quantos processos geram os blocos nem em que ordem. Os blocos cobrem
+    trechos consecutivos do período: concatenados, saem ordenados por data.
+    """
+    options = {**DEFAULT_OPTIONS, **options}
+    offset = index * chunk_rows
+    n = min(chunk_rows, total_rows - offset)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+    # Datas: quantis do trecho do bloco na distribuição sazonal, convertidos em instantes
+    origin, cdf = _time_cdf(options['start'], options['end'], options['seasonality'])
+    quantiles = np.sort(rng.uniform(offset / total_rows, (offset + n) / total_rows, n))
+    days = np.interp(quantiles, cdf, np.arange(len(cdf), dtype=np.float64))
+    timestamps = origin + (days * _NS_PER_DAY).astype(np.int64)
+    datas = pd.to_datetime(timestamps - timestamps % 10**9)
+
+    regioes = region_names(options['n_regions'])
+    produtos = product_names(options['n_products'])
+    product_codes = np.searchsorted(_product_cdf(len(produtos), options['product_skew']), rng.random(n), side='right')
+
+    valor = np.round(rng.exponential(100, n) + 50, 2)
+    quantidade = rng.poisson(5, n) + 1
+    return pd.DataFrame({
+        'data': datas,
+        'valor': valor,
+        'quantidade': quantidade,
+        'categoria': pd.Categorical.from_codes(rng.integers(0, len(CATEGORIAS), n), CATEGORIAS),
+        'regiao': pd.Categorical.from_codes(rng.integers(0, len(regioes), n), regioes),
+        'produto': pd.Categorical.from_codes(np.minimum(product_codes, len(produtos) - 1), produtos),
+        'receita': valor * quantidade,
+    })
+
+
+def _csv_chunk(index, chunk_rows, total_rows, seed, options):
+    # A formatação do CSV é a parte cara: fica nos processos do pool, o pai só grava os bytes
+    chunk = generate_chunk(index, chunk_rows, total_rows, seed, **options)
+    return chunk.to_csv(header=index == 0, index=False, lineterminator='\n').encode('utf-8')
+
+
+def _parquet_chunk(index, chunk_rows, total_rows, seed, options, directory):
+    chunk = generate_chunk(index, chunk_rows, total_rows, seed, **options)
+    path = os.path.join(directory, f'part-{index:05d}.parquet')
+    chunk.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    return len(chunk)
+
+
+def _ordered_results(func, n_chunks, workers, *args):
+    """
+    Resultados de `func(index, *args)` em ordem de índice, com no máximo
+    2 × `workers` blocos em andamento (a memória não cresce com o dataset).
+    """
+    if workers <= 1:
+        for index in range(n_chunks):
+            yield func(index, *args)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for index in range(n_chunks):
+            pending.append(pool.submit(func, index, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_dataset(path, n_rows, chunk_rows=1_000_000, workers=None, seed=42, output_format='csv', **options):
+    """
+    Gera `n_rows` vendas sintéticas em `path`, bloco a bloco.
+
+    - `csv`: um único arquivo (gravado em `path.tmp` e renomeado ao final);
+    - `parquet`: um diretório com uma partição `part-NNNNN.parquet` por bloco,
+      gravada pelo próprio processo que a gerou.
+
+    `workers` processos geram os blocos em paralelo (padrão: todos os núcleos);
+    o resultado é o mesmo para qualquer número de processos.
+    Retorna o número de linhas gravadas.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_chunks = -(-n_rows // chunk_rows)
+    options = {**DEFAULT_OPTIONS, **options}
+
+    if output_format == 'parquet':
+        os.makedirs(path, exist_ok=True)
+        return sum(_ordered_results(_parquet_chunk, n_chunks, workers, chunk_rows, n_rows, seed, options, path))
+    if output_format != 'csv':
+        raise ValueError(f"Formato desconhecido: {output_format!r}")
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        for data in _ordered_results(_csv_chunk, n_chunks, workers, chunk_rows, n_rows, seed, options):
+            f.write(data)
+    os.replace(tmp, path)
+    return n_rows
@@ -0,0 +1,108 @@
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Ordem estável e compartilhada das dimensões (mesma do gerador de dados)
+CATEGORIAS = ['Eletrônicos', 'Roupas', 'Alimentos', 'Livros', 'Móveis', 'Esportes', 'Brinquedos', 'Automotivo']
+REGIOES = ['Norte', 'Sul', 'Leste', 'Oeste', 'Centro', 'Nordeste', 'Sudeste']
+
+DIMENSION_ORDER = {
+    'categoria': CATEGORIAS,
+    'regiao': REGIOES,
+}
+DIMENSION_COLUMNS = ['categoria', 'regiao', 'produto']
+MONEY_COLUMNS = ['valor', 'receita']
+# Colunas guardadas como código AAAAMM e exibidas como 'AAAA-MM'
+MONTH_COLUMNS = ['mes']
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _natural_key(value):
+    """Ordena 'Produto 2' antes de 'Produto 10'."""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', str(value))]
+
+
+def dimension_categories(column, values):
+    """
+    Retorna a ordem de categorias de uma dimensão.
+
+    Valores conhecidos seguem a ordem fixa do schema; valores novos entram no
+    final, em ordem natural, para que nada vire NaN.
+    """
+    known = DIMENSION_ORDER.get(column, [])
+    observed = set(pd.unique(values)) - set(known)
+    extra = sorted((v for v in observed if pd.notna(v)), key=_natural_key)
+    return known + extra
+
+
+def month_code(dates):
+    """Codifica a data como inteiro AAAAMM (ex.: 202201)."""
+    return (dates.dt.year * 100 + dates.dt.month).astype(np.int32)
+
+
+def day_code(dates):
+    """Codifica a data como número de dias desde 1970-01-01."""
+    return (dates.to_numpy().astype('datetime64[D]') - _EPOCH).astype(np.int32)
+
+
+def _year_code(dates):
+    return dates.dt.year.astype(np.int16)
+
+
+def month_label(code):
+    """Converte o código AAAAMM de volta para o rótulo 'AAAA-MM'."""
+    code = np.asarray(code)
+    return np.char.add(np.char.add((code // 100).astype(str), '-'), np.char.zfill((code % 100).astype(str), 2))
+
+
+def money_is_safe_as_float32(values):
+    """Float32 só é seguro se todos os valores forem centavos exatos em até 2**24."""
+    cents = np.round(values * 100)
+    if not np.allclose(values * 100, cents, rtol=0, atol=1e-6):
+        return False
+    return np.abs(cents).max(initial=0) < 2 ** 24
+
+
+def apply_schema(df):
+    """
+    Converte o DataFrame para o schema compacto do dashboard.
+
+    - dimensões (`categoria`, `regiao`, `produto`) como categóricas com ordem estável;
+    - `mes` (AAAAMM) e `dia` (dias desde 1970) como códigos inteiros, `ano` como int16;
+    - `quantidade` com o menor inteiro que comporta os valores;
+    - colunas monetárias em float32 apenas quando não há perda de precisão.
+    """
+    for column in DIMENSION_COLUMNS:
+        if column in df.columns:
+            categories = dimension_categories(column, df[column])
+            if not (isinstance(df[column].dtype, pd.CategoricalDtype)
+                    and list(df[column].cat.categories) == categories):
+                df[column] = pd.Categorical(df[column], categories=categories)
+
+    codes = {'mes': (month_code, np.int32), 'dia': (day_code, np.int32), 'ano': (_year_code, np.int16)}
+    for column, (encode, dtype) in codes.items():
+        if column not in df.columns or df[column].dtype != dtype:
+            df[column] = encode(df['data'])
+
+    if 'quantidade' in df.columns:
+        df['quantidade'] = pd.to_numeric(df['quantidade'], downcast='integer')
+
+    for column in MONEY_COLUMNS:
+        if column in df.columns and df[column].dtype == np.float64:
+            if money_is_safe_as_float32(df[column].to_numpy()):
+                df[column] = df[column].astype(np.float32)
+    return df
+
+
+def memory_report(before, after):
+    """Compara o uso de memória por coluna antes e depois da conversão."""
+    report = pd.DataFrame({
+        'antes': before.memory_usage(index=False, deep=True),
+        'depois': after.memory_usage(index=False, deep=True),
+    }).fillna(0)
+    report.loc['total'] = report.sum()
+    report['reducao'] = 1 - report['depois'] / report['antes'].replace(0, np.nan)
+    return report
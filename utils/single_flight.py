@@ -0,0 +1,53 @@
+
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplica computações idênticas e simultâneas no processo.
+
+    A primeira chamada com uma chave executa `compute`; as que chegam com a
+    mesma chave enquanto ela roda esperam e recebem o mesmo resultado (ou a
+    mesma exceção). Nada fica guardado depois que a computação termina.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'executions': 0, 'shared': 0}
+
+    def do(self, key, compute):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executions'] += 1
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
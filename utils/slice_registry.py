@@ -0,0 +1,140 @@
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.cache import get_cache_key
+
+
+def compact_rows(rows):
+    """Converte um array de posições em um slice quando as linhas são contíguas."""
+    rows = np.asarray(rows)
+    if len(rows) == 0:
+        return slice(0, 0)
+    if rows[-1] - rows[0] + 1 == len(rows):
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+    if rows[-1] < np.iinfo(np.int32).max:
+        return rows.astype(np.int32, copy=False)
+    return rows
+
+
+def rows_nbytes(rows):
+    """Retorna quantos bytes a representação das linhas ocupa em memória."""
+    if isinstance(rows, slice):
+        return 0
+    return rows.nbytes
+
+
+def take_rows(df, rows):
+    """Aplica as linhas registradas ao DataFrame (slices viram views, sem cópia)."""
+    if isinstance(rows, slice):
+        return df.iloc[rows]
+    return df.take(rows)
+
+
+class SliceRegistry:
+    """
+    Registro das fatias filtradas mantidas no servidor.
+
+    Cada fatia é identificada por um handle pequeno (impressão digital dos
+    filtros + versão do dataset) que pode ser enviado ao navegador; as linhas
+    em si ficam aqui, como slice ou array de posições, com limite de entradas
+    e de bytes e descarte LRU.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = 0
+        self._slices = OrderedDict()
+        self._filters = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def make_handle(self, filters):
+        """Cria o handle que identifica a fatia para os filtros informados."""
+        return {
+            'key': get_cache_key(filters),
+            'version': self.version,
+            'filters': filters,
+        }
+
+    def bump_version(self):
+        """Invalida todas as fatias registradas (ex.: após recarregar os dados)."""
+        with self._lock:
+            self.version += 1
+            self._slices.clear()
+            self._filters.clear()
+            self._nbytes = 0
+        return self.version
+
+    def advance_version(self, version, is_affected):
+        """
+        Passa para uma nova versão dos dados invalidando apenas as fatias
+        afetadas (`is_affected(filtros)` verdadeiro); as demais continuam
+        válidas e são reapontadas para a nova versão.
+        """
+        with self._lock:
+            slices = OrderedDict()
+            filters = {}
+            for (key, _), rows in self._slices.items():
+                entry_filters = self._filters[(key, self.version)]
+                if is_affected(entry_filters):
+                    self._nbytes -= rows_nbytes(rows)
+                    continue
+                slices[(key, version)] = rows
+                filters[(key, version)] = entry_filters
+            self.version = version
+            self._slices = slices
+            self._filters = filters
+        return self.version
+
+    def put(self, handle, rows):
+        """Registra as linhas de uma fatia, descartando as menos usadas se necessário."""
+        key = (handle['key'], handle['version'])
+        size = rows_nbytes(rows)
+        with self._lock:
+            if handle['version'] != self.version or size > self.max_bytes:
+                return
+            previous = self._slices.pop(key, None)
+            if previous is not None:
+                self._nbytes -= rows_nbytes(previous)
+            self._slices[key] = rows
+            self._filters[key] = handle['filters']
+            self._nbytes += size
+            while len(self._slices) > self.max_entries or self._nbytes > self.max_bytes:
+                evicted_key, evicted = self._slices.popitem(last=False)
+                del self._filters[evicted_key]
+                self._nbytes -= rows_nbytes(evicted)
+
+    def get(self, handle):
+        """Retorna as linhas registradas para o handle, ou None se não existirem."""
+        key = (handle['key'], handle['version'])
+        with self._lock:
+            rows = self._slices.get(key)
+            if rows is not None:
+                self._slices.move_to_end(key)
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+            return rows
+
+    def get_rows(self, handle, compute_rows):
+        """
+        Retorna as linhas do handle, recalculando-as a partir dos filtros
+        quando a fatia foi descartada ou pertence a outra versão dos dados.
+        """
+        rows = self.get(handle)
+        if rows is None:
+            rows = compute_rows(handle['filters'])
+            self.put(self.make_handle(handle['filters']), rows)
+        return rows
+
+    def __len__(self):
+        return len(self._slices)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
@@ -0,0 +1,93 @@
+
+import hashlib
+import json
+import os
+import sys
+
+import pyarrow as pa
+
+SNAPSHOT_FORMAT_VERSION = 2
+_METADATA_KEY = b'sales_snapshot'
+
+
+def snapshot_path(csv_path):
+    """Retorna o caminho do snapshot colunar correspondente ao CSV."""
+    return os.path.splitext(csv_path)[0] + '.arrow'
+
+
+def source_fingerprint(csv_path, verify_hash=False):
+    """
+    Identifica a versão do CSV de origem pelo mtime e tamanho.
+
+    Com `verify_hash`, inclui também o SHA-256 do conteúdo (lê o arquivo inteiro).
+    """
+    stat = os.stat(csv_path)
+    fingerprint = {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+    }
+    if verify_hash:
+        sha = hashlib.sha256()
+        with open(csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        fingerprint['sha256'] = sha.hexdigest()
+    return fingerprint
+
+
+def write_snapshot(df, path, fingerprint):
+    """
+    Grava o DataFrame processado em Arrow IPC (não comprimido, para mmap).
+
+    A escrita vai para um arquivo temporário e é publicada com `os.replace`,
+    então workers concorrentes nunca leem um snapshot pela metade.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_METADATA_KEY] = json.dumps(fingerprint, sort_keys=True).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_fingerprint(path):
+    """Lê apenas a impressão digital gravada no schema do snapshot."""
+    with pa.memory_map(path, 'r') as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    raw = metadata.get(_METADATA_KEY)
+    return json.loads(raw) if raw else None
+
+
+def read_snapshot(path):
+    """Abre o snapshot via memory map e converte para DataFrame."""
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def load_snapshot(csv_path, verify_hash=False):
+    """Retorna o DataFrame do snapshot se ele corresponder ao CSV atual, ou None."""
+    path = snapshot_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        stored = read_snapshot_fingerprint(path)
+    except pa.ArrowInvalid:
+        return None
+    if stored != source_fingerprint(csv_path, verify_hash=verify_hash):
+        return None
+    return read_snapshot(path)
+
+
+if __name__ == '__main__':
+    # Pré-gera o snapshot antes de subir os workers (ex.: no CMD do Docker)
+    from utils.data_processor import load_data
+
+    csv = sys.argv[1] if len(sys.argv) > 1 else 'data/sales_data.csv'
+    df = load_data(csv)
+    print(f"Snapshot de {len(df)} registros disponível em '{snapshot_path(csv)}'")
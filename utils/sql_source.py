@@ -0,0 +1,473 @@
+
+import logging
+import sys
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table,
+    create_engine, extract, func, select,
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from utils.cache import get_cache_key
+from utils.cube import SalesAggregates
+from utils.data_processor import parse_date_range
+from utils.filter_engine import normalize_selection
+from utils.forecast import fit_forecast_model
+from utils.regression import SufficientStats, cached_fit, trend_and_forecast
+from utils.schema import dimension_categories, month_label
+from utils.table_query import date_prefix_range, parse_filter_query
+
+logger = logging.getLogger(__name__)
+
+# Engines criados no processo, para descartar os pools herdados após um fork
+_engines = weakref.WeakSet()
+
+
+def create_sql_engine(url):
+    """
+    Cria o engine SQLAlchemy com pool de conexões.
+
+    As conexões são testadas antes do uso (`pool_pre_ping`) e recicladas
+    periodicamente; o SQLite (usado nos testes) mantém o pool padrão do dialeto.
+    """
+    url = make_url(url)
+    options = {'pool_pre_ping': True}
+    if url.get_backend_name() != 'sqlite':
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    engine = create_engine(url, **options)
+    _engines.add(engine)
+    return engine
+
+
+def dispose_engines():
+    """
+    Descarta as conexões herdadas do processo pai (chamado após o fork dos
+    workers); cada worker abre as suas sob demanda.
+    """
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+def sales_table(metadata=None, name=None):
+    """Define a tabela de vendas (mesmas colunas do CSV)."""
+    metadata = metadata if metadata is not None else MetaData()
+    name = name or settings.SALES_TABLE
+    return Table(
+        name, metadata,
+        Column('data', DateTime, nullable=False),
+        Column('valor', Float),
+        Column('quantidade', Integer),
+        Column('categoria', String(64)),
+        Column('regiao', String(64)),
+        Column('produto', String(128)),
+        Column('receita', Float),
+        Index(f'ix_{name}_data', 'data'),
+        Index(f'ix_{name}_dimensoes', 'categoria', 'regiao', 'data'),
+    )
+
+
+def write_sales_table(df, engine, name=None, chunksize=50_000):
+    """Cria a tabela de vendas (se necessário) e insere as linhas do DataFrame."""
+    table = sales_table(name=name)
+    table.metadata.create_all(engine)
+    columns = [column.name for column in table.columns]
+    rows = df[columns].copy()
+    for column in ('categoria', 'regiao', 'produto'):
+        rows[column] = rows[column].astype(str)
+    rows.to_sql(table.name, engine, if_exists='append', index=False, chunksize=chunksize)
+    return table
+
+
+def _column_dtype(column):
+    if isinstance(column.type, DateTime):
+        return np.dtype('datetime64[ns]')
+    if isinstance(column.type, Integer):
+        return np.dtype(np.int64)
+    if isinstance(column.type, Float):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _ordered(column, values):
+    """Valores de uma dimensão na ordem estável do schema."""
+    order = dimension_categories(column, pd.Series(values, dtype=object))
+    present = set(values)
+    return np.array([value for value in order if value in present], dtype=object)
+
+
+class SqlSource:
+    """
+    Fonte de dados em um banco SQL (PostgreSQL em produção, SQLite nos testes).
+
+    Os filtros do dashboard viram cláusulas WHERE com parâmetros vinculados e
+    cada painel vira um GROUP BY executado no banco: só linhas agregadas
+    trafegam até o processo, nunca a tabela de vendas inteira.
+
+    O modelo sazonal de previsão é ajustado na criação da fonte, com um
+    único GROUP BY da tabela inteira; `fit_forecast` o reajusta depois de
+    cargas feitas por fora do dashboard.
+
+    A versão dos dados (`version`) vem da própria tabela: número de linhas e
+    última data, relidos no máximo a cada `version_ttl` segundos. Cargas
+    feitas por fora do dashboard mudam a versão e, com ela, as chaves dos
+    caches de resultados e de ajustes.
+    """
+
+    def __init__(self, engine, table_name=None, forecast_harmonics=3, version_ttl=30.0):
+        self.engine = engine
+        self.table = sales_table(name=table_name)
+        self.columns = {column.name: _column_dtype(column) for column in self.table.columns}
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_read_at = None
+        self._version_lock = threading.Lock()
+        self.forecast_harmonics = forecast_harmonics
+        self.forecast = None
+        self.fit_forecast()
+
+    def fit_forecast(self):
+        """(Re)ajusta o modelo sazonal de todas as séries categoria × região da tabela."""
+        if self.forecast_harmonics is None:
+            return
+        try:
+            self.forecast = fit_forecast_model(SqlSlice(self, None).aggregates(), self.forecast_harmonics)
+        except SQLAlchemyError as e:
+            logger.warning("Não foi possível ajustar o modelo de previsão: %s", e)
+
+    def _read(self, query):
+        with self.engine.connect() as connection:
+            return pd.read_sql(query, connection)
+
+    @property
+    def version(self):
+        """Versão dos dados da tabela ('linhas-última data'), relida no máximo a cada `version_ttl` segundos."""
+        with self._version_lock:
+            now = time.monotonic()
+            if self._version_read_at is None or now - self._version_read_at >= self.version_ttl:
+                self._version = self._read_version()
+                self._version_read_at = now
+            return self._version
+
+    def _read_version(self):
+        query = select(func.count().label('linhas'), func.max(self.table.c.data).label('fim'))
+        try:
+            row = self._read(query).iloc[0]
+        except SQLAlchemyError as e:
+            # Banco indisponível: mantém a última versão conhecida
+            logger.warning("Não foi possível ler a versão da tabela de vendas: %s", e)
+            return self._version if self._version is not None else '0-'
+        end = pd.to_datetime(row['fim'])
+        return f"{int(row['linhas'])}-{end:%Y%m%d%H%M%S}" if pd.notna(end) else f"{int(row['linhas'])}-"
+
+    def where(self, filters):
+        """Condições SQL equivalentes aos filtros do dashboard."""
+        start, end = parse_date_range(filters['start_date'], filters['end_date'])
+        c = self.table.c
+        conditions = [c.data >= start.to_pydatetime(), c.data < end.to_pydatetime()]
+        for key, column in (('category', c.categoria), ('region', c.regiao)):
+            values = normalize_selection(filters.get(key))
+            if values is not None:
+                conditions.append(column.in_(values))
+        return conditions
+
+    def date_bounds(self):
+        """Primeira e última data da tabela de vendas."""
+        query = select(func.min(self.table.c.data).label('inicio'), func.max(self.table.c.data).label('fim'))
+        bounds = self._read(query)
+        return pd.to_datetime(bounds['inicio'].iloc[0]).date(), pd.to_datetime(bounds['fim'].iloc[0]).date()
+
+    def dimension_values(self, column):
+        """Valores distintos de uma dimensão, na ordem do schema."""
+        values = self._read(select(self.table.c[column]).distinct())[column]
+        return list(_ordered(column, values.dropna().tolist()))
+
+    def data_version(self, filters):
+        """Versão dos dados vista pela seleção: a da tabela (o banco não informa o que mudou em cada carga)."""
+        return self.version
+
+    def make_handle(self, filters):
+        """Handle da seleção; não há linhas a guardar no servidor."""
+        version = self.version
+        return {'key': get_cache_key(filters), 'version': version, 'data_version': version, 'filters': filters}
+
+    def select(self, filters, fit_key=None):
+        return SqlSlice(self, filters, fit_key)
+
+    def _table_conditions(self, filter_query):
+        """Traduz o `filter_query` do DataTable em condições SQL (partes inválidas são ignoradas)."""
+        conditions = []
+        for name, operator, value, case_sensitive in parse_filter_query(filter_query):
+            if name not in self.table.c:
+                continue
+            column = self.table.c[name]
+            try:
+                conditions.append(self._table_condition(column, operator, value, case_sensitive))
+            except (ValueError, TypeError):
+                continue
+        return conditions
+
+    def _table_condition(self, column, operator, value, case_sensitive):
+        if isinstance(column.type, DateTime):
+            if operator in ('eq', 'datestartswith', 'ne'):
+                start, end = date_prefix_range(value)
+                condition = (column >= start.to_pydatetime()) & (column < end.to_pydatetime())
+                return ~condition if operator == 'ne' else condition
+            if operator == 'contains':
+                raise ValueError(operator)
+            value = pd.Timestamp(str(value)).to_pydatetime()
+        elif operator == 'contains':
+            column = column if isinstance(column.type, String) else column.cast(String)
+            if case_sensitive:
+                return column.contains(str(value), autoescape=True)
+            return func.lower(column).contains(str(value).lower(), autoescape=True)
+        elif isinstance(column.type, String):
+            value = str(value)
+            if not case_sensitive:
+                column, value = func.lower(column), value.lower()
+        elif not isinstance(value, float):
+            raise ValueError(value)
+
+        return {
+            'eq': column == value, 'ne': column != value,
+            'lt': column < value, 'le': column <= value,
+            'gt': column > value, 'ge': column >= value,
+        }[operator]
+
+    def page(self, handle, page_current, page_size, sort_by=None, filter_query=None):
+        """
+        Página da tabela com filtro, ordenação e paginação no banco
+        (`ORDER BY` + `LIMIT`/`OFFSET`); retorna (registros, total de páginas).
+        """
+        conditions = self.where(handle['filters']) + self._table_conditions(filter_query)
+        with self.engine.connect() as connection:
+            total = connection.execute(select(func.count()).select_from(self.table).where(*conditions)).scalar()
+        page_count = max(1, -(-total // page_size))
+        page_current = min(max(page_current or 0, 0), page_count - 1)
+
+        order = [
+            self.table.c[spec['column_id']].desc() if spec.get('direction') == 'desc' else self.table.c[spec['column_id']]
+            for spec in sort_by or []
+            if spec.get('column_id') in self.table.c
+        ]
+        query = (
+            select(self.table).where(*conditions)
+            .order_by(*order, self.table.c.data)
+            .limit(page_size).offset(page_current * page_size)
+        )
+        page = self._read(query)
+        page['data'] = pd.to_datetime(page['data'])
+        return page.to_dict('records'), page_count
+
+    def frame(self, handle):
+        """Todas as linhas da seleção (usado na exportação)."""
+        frame = self._read(select(self.table).where(*self.where(handle['filters'])).order_by(self.table.c.data))
+        frame['data'] = pd.to_datetime(frame['data'])
+        return frame
+
+    def count(self, handle):
+        """Número de linhas da seleção."""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(self.table).where(*self.where(handle['filters']))
+            ).scalar()
+
+    def iter_frames(self, handle, chunk_rows=50_000):
+        """
+        Linhas da seleção em blocos de até `chunk_rows`, lidas de um cursor no
+        servidor (`stream_results`): o resultado não é carregado de uma vez.
+        """
+        query = select(self.table).where(*self.where(handle['filters'])).order_by(self.table.c.data)
+        with self.engine.connect().execution_options(stream_results=True) as connection:
+            for frame in pd.read_sql(query, connection, chunksize=chunk_rows):
+                frame['data'] = pd.to_datetime(frame['data'])
+                yield frame
+
+
+class SqlSlice:
+    """Seleção do banco com as mesmas consultas de `utils.analytics`, cada uma um GROUP BY."""
+
+    def __init__(self, source, filters, fit_key=None):
+        self.source = source
+        self.table = source.table
+        # Sem filtros (None), a tabela inteira
+        self.conditions = source.where(filters) if filters is not None else []
+        self.fit_key = fit_key
+        self._aggregates = None
+        self._trend = None
+
+    def _query(self, *columns, group_by=()):
+        query = select(*columns).where(*self.conditions)
+        if group_by:
+            query = query.group_by(*group_by)
+        return self.source._read(query)
+
+    def _day(self):
+        return func.date(self.table.c.data)
+
+    def calculate_kpis(self):
+        """Calcula os KPIs de vendas."""
+        c = self.table.c
+        totals = self._query(func.sum(c.receita).label('receita'), func.sum(c.quantidade).label('quantidade'))
+        receita_total = float(totals['receita'].fillna(0).iloc[0])
+        total_vendas = int(totals['quantidade'].fillna(0).iloc[0])
+        ticket_medio = receita_total / total_vendas if total_vendas > 0 else 0
+        return receita_total, total_vendas, ticket_medio
+
+    def get_sales_evolution(self):
+        """Retorna a evolução das vendas ao longo do tempo."""
+        c = self.table.c
+        ano = extract('year', c.data).label('ano')
+        mes = extract('month', c.data).label('mes')
+        evolution = self._query(ano, mes, func.sum(c.receita).label('receita'), group_by=(ano, mes))
+        codes = (evolution['ano'].astype(np.int64) * 100 + evolution['mes'].astype(np.int64)).to_numpy()
+        order = np.argsort(codes)
+        return pd.DataFrame({
+            'data': month_label(codes[order]).astype(object),
+            'receita': evolution['receita'].to_numpy(dtype=np.float64)[order],
+        })
+
+    def get_sales_by_category(self):
+        """Retorna as vendas por categoria."""
+        c = self.table.c
+        receita = self._query(c.categoria, func.sum(c.receita).label('receita'), group_by=(c.categoria,))
+        receita = receita.set_index('categoria')['receita']
+        categorias = _ordered('categoria', receita.index.tolist())
+        return pd.DataFrame({'categoria': categorias, 'receita': receita.loc[categorias].to_numpy(dtype=np.float64)})
+
+    def get_top_products(self, n=None):
+        """Retorna os N (TOP_N) produtos mais vendidos."""
+        n = settings.TOP_N if n is None else n
+        c = self.table.c
+        receita = func.sum(c.receita).label('receita')
+        query = (
+            select(c.produto, receita).where(*self.conditions)
+            .group_by(c.produto).order_by(receita.desc()).limit(n)
+        )
+        top = self.source._read(query).sort_values('receita', ascending=True, kind='stable')
+        return top.reset_index(drop=True)
+
+    def get_region_heatmap_data(self):
+        """Retorna os dados para o mapa de calor de vendas por região."""
+        c = self.table.c
+        cells = self._query(
+            c.regiao, c.categoria, func.sum(c.receita).label('receita'), group_by=(c.regiao, c.categoria)
+        )
+        heatmap = cells.pivot(index='regiao', columns='categoria', values='receita').fillna(0)
+        return heatmap.reindex(
+            index=pd.Index(_ordered('regiao', heatmap.index.tolist()), name='regiao'),
+            columns=pd.Index(_ordered('categoria', heatmap.columns.tolist()), name='categoria'),
+        )
+
+    def get_daily_sales(self):
+        """Receita diária, com os dias contados desde a primeira venda da seleção."""
+        dia = self._day().label('dia')
+        daily = self._query(dia, func.sum(self.table.c.receita).label('receita'), group_by=(dia,))
+        dias = pd.to_datetime(daily['dia']).to_numpy().astype('datetime64[D]')
+        order = np.argsort(dias)
+        dias = dias[order]
+        offsets = (dias - dias[0]).astype(np.int64) if len(dias) else np.array([], dtype=np.int64)
+        return pd.DataFrame({
+            'dias_desde_inicio': offsets,
+            'receita': daily['receita'].to_numpy(dtype=np.float64)[order],
+        })
+
+    def _trend_fit(self):
+        if self._trend is None:
+            daily_sales = self.get_daily_sales()
+            fit = cached_fit(self.fit_key, lambda: SufficientStats.from_points(
+                daily_sales['dias_desde_inicio'], daily_sales['receita']
+            ).fit())
+            self._trend = daily_sales, fit
+        return self._trend
+
+    def get_trend_analysis(self):
+        """Retorna a análise de tendência de vendas."""
+        daily_sales, fit = self._trend_fit()
+        trend_line, _, _ = trend_and_forecast(daily_sales['dias_desde_inicio'], fit)
+        return daily_sales, trend_line
+
+    def get_sales_forecast(self):
+        """Retorna a previsão de vendas para os próximos 30 dias."""
+        if self.source.forecast is not None:
+            return self.aggregates().get_sales_forecast()
+        daily_sales, fit = self._trend_fit()
+        trend_line, future_days, future_sales = trend_and_forecast(daily_sales['dias_desde_inicio'], fit)
+        return daily_sales, trend_line, future_days, future_sales
+
+    def aggregates(self):
+        """
+        Somas parciais da seleção com duas consultas: um GROUP BY por
+        (dia, categoria, região) e outro por produto. Alimentam todos os
+        painéis do dashboard de uma vez.
+        """
+        if self._aggregates is not None:
+            return self._aggregates
+        c = self.table.c
+        dia = self._day().label('dia')
+        cells = self._query(
+            dia, c.categoria, c.regiao,
+            func.sum(c.receita).label('receita'),
+            func.sum(c.quantidade).label('quantidade'),
+            func.count().label('linhas'),
+            group_by=(dia, c.categoria, c.regiao),
+        )
+        # Só os TOP_N produtos de maior receita trafegam, não o catálogo inteiro
+        receita_produto = func.sum(c.receita).label('receita')
+        produtos = self.source._read(
+            select(c.produto, receita_produto, func.count().label('linhas')).where(*self.conditions)
+            .group_by(c.produto).order_by(receita_produto.desc()).limit(settings.TOP_N)
+        )
+
+        dias_celula = pd.to_datetime(cells['dia']).to_numpy().astype('datetime64[D]')
+        dias, dia_idx = np.unique(dias_celula, return_inverse=True)
+        categorias = _ordered('categoria', cells['categoria'].unique().tolist())
+        regioes = _ordered('regiao', cells['regiao'].unique().tolist())
+        cat_idx = pd.Index(categorias).get_indexer(cells['categoria'])
+        reg_idx = pd.Index(regioes).get_indexer(cells['regiao'])
+
+        shape = (len(dias), len(categorias), len(regioes))
+        receita = np.zeros(shape)
+        quantidade = np.zeros(shape, dtype=np.int64)
+        linhas = np.zeros(shape, dtype=np.int64)
+        receita[dia_idx, cat_idx, reg_idx] = cells['receita'].to_numpy(dtype=np.float64)
+        quantidade[dia_idx, cat_idx, reg_idx] = cells['quantidade'].to_numpy(dtype=np.int64)
+        linhas[dia_idx, cat_idx, reg_idx] = cells['linhas'].to_numpy(dtype=np.int64)
+
+        produtos = produtos.set_index('produto')
+        nomes = _ordered('produto', produtos.index.tolist())
+        self._aggregates = SalesAggregates(
+            dias=dias,
+            categorias=categorias,
+            regioes=regioes,
+            produtos=nomes,
+            receita=receita,
+            quantidade=quantidade,
+            linhas=linhas,
+            produto_receita=produtos['receita'].loc[nomes].to_numpy(dtype=np.float64),
+            produto_linhas=produtos['linhas'].loc[nomes].to_numpy(dtype=np.int64),
+            fit_key=self.fit_key,
+            forecast=self.source.forecast,
+        )
+        return self._aggregates
+
+
+if __name__ == '__main__':
+    # Carrega o CSV de vendas na tabela do banco em DATABASE_URL
+    from utils.data_processor import load_data
+
+    csv = sys.argv[1] if len(sys.argv) > 1 else 'data/sales_data.csv'
+    engine = create_sql_engine(settings.DATABASE_URL)
+    table = write_sales_table(load_data(csv), engine)
+    print(f"Tabela '{table.name}' carregada a partir de '{csv}'")
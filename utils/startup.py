@@ -0,0 +1,270 @@
+
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from flask import jsonify
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+METADATA_FORMAT_VERSION = 1
+# Dimensões com filtro no layout
+LAYOUT_DIMENSIONS = ('categoria', 'regiao')
+
+
+class SourceNotReady(RuntimeError):
+    """Os dados ainda estão carregando (ou a carga falhou); a requisição pode ser repetida."""
+
+
+def file_fingerprint(path):
+    """mtime e tamanho do arquivo de dados; None se ele não existir (ex.: fonte SQL)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+class SourceMetadata:
+    """
+    O que o layout precisa da fonte de dados, sem os dados: limites de
+    datas, valores das dimensões filtráveis, colunas da tabela (já como
+    tipos da DataTable) e versão.
+
+    Tem a mesma interface de leitura das fontes (`date_bounds`,
+    `dimension_values`, `columns`, `version`). É gravado em JSON a cada
+    carga e lido na partida seguinte; `fingerprint` identifica o arquivo de
+    dados de origem e um arquivo de metadados de outra versão dos dados é
+    ignorado.
+    """
+
+    def __init__(self, start_date, end_date, dimensions, columns, version=0, fingerprint=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.dimensions = dimensions
+        self.columns = columns
+        self.version = version
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_source(cls, source, fingerprint=None):
+        from components.tables import column_type
+
+        start_date, end_date = source.date_bounds()
+        return cls(
+            start_date,
+            end_date,
+            {column: list(source.dimension_values(column)) for column in LAYOUT_DIMENSIONS},
+            {name: column_type(dtype, name) for name, dtype in source.columns.items()},
+            source.version,
+            fingerprint,
+        )
+
+    def date_bounds(self):
+        return self.start_date, self.end_date
+
+    def dimension_values(self, column):
+        return self.dimensions[column]
+
+    def to_dict(self):
+        return {
+            'format': METADATA_FORMAT_VERSION,
+            'fingerprint': self.fingerprint,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'dimensions': self.dimensions,
+            'columns': self.columns,
+            'version': self.version,
+        }
+
+    def save(self, path):
+        """Grava o JSON em um temporário publicado com `os.replace` (workers nunca leem pela metade)."""
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """Metadados gravados em `path` para os dados de `fingerprint`; None se ausentes, inválidos ou de outra versão."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                raw = json.load(f)
+            if raw.get('format') != METADATA_FORMAT_VERSION or raw.get('fingerprint') != fingerprint:
+                return None
+            return cls(
+                datetime.date.fromisoformat(raw['start_date']),
+                datetime.date.fromisoformat(raw['end_date']),
+                raw['dimensions'],
+                raw['columns'],
+                raw['version'],
+                fingerprint,
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+def _fingerprint(data_path):
+    # A fonte SQL não tem arquivo: os metadados valem até a próxima carga
+    return file_fingerprint(data_path) if settings.DATA_SOURCE == 'memory' else None
+
+
+def read_metadata(data_path, metadata_path):
+    """Metadados da última carga de `data_path`, ou None."""
+    return SourceMetadata.load(metadata_path, _fingerprint(data_path))
+
+
+def load_source(data_path, metadata_path):
+    """Cria a fonte de dados configurada e grava os metadados para a próxima partida."""
+    from utils.data_source import create_data_source
+
+    source = create_data_source(data_path)
+    try:
+        SourceMetadata.from_source(source, _fingerprint(data_path)).save(metadata_path)
+    except OSError as e:
+        logger.warning("Não foi possível gravar os metadados em '%s': %s", metadata_path, e)
+    return source
+
+
+class DeferredSource:
+    """
+    Fonte de dados carregada em uma thread de fundo.
+
+    O processo sobe e responde (health checks, layout a partir de
+    `metadata`) enquanto `load` lê e indexa os dados. Os atributos da fonte
+    são repassados depois da carga: quem chega antes espera até `timeout`
+    segundos e recebe `SourceNotReady` se ela não terminar a tempo.
+
+    `append` é declarado aqui para a ingestão incremental reconhecer a fonte
+    sem esperar a carga; funções registradas em `when_ready` rodam na
+    thread de carga assim que os dados ficam prontos.
+    """
+
+    def __init__(self, load, metadata=None, timeout=20.0):
+        self._load = load
+        self.metadata = metadata
+        self.timeout = timeout
+        self.source = None
+        self.error = None
+        self.load_seconds = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.source is not None
+
+    def load(self):
+        """Carrega na thread atual (ex.: no master do gunicorn, antes do fork)."""
+        if self._done.is_set():
+            return
+        started = time.perf_counter()
+        try:
+            source = self._load()
+        except Exception as e:
+            logger.exception("Falha ao carregar os dados")
+            self.error = e
+            self._done.set()
+            return
+        self.load_seconds = time.perf_counter() - started
+        with self._lock:
+            self.source = source
+            callbacks, self._callbacks = self._callbacks, []
+        self._done.set()
+        logger.info("Dados carregados em %.2f s", self.load_seconds)
+        for callback in callbacks:
+            callback(source)
+
+    def start(self):
+        """Inicia a carga em segundo plano (uma vez por processo: threads não sobrevivem ao fork)."""
+        with self._lock:
+            if self._done.is_set() or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self.load, name='data-load', daemon=True)
+            self._thread.start()
+
+    def when_ready(self, callback):
+        """Chama `callback(fonte)` quando os dados estiverem carregados (já, se estiverem)."""
+        with self._lock:
+            if self.source is None:
+                self._callbacks.append(callback)
+                return
+        callback(self.source)
+
+    def wait(self, timeout=None):
+        """A fonte carregada; espera até `timeout` (padrão: o da instância) ou levanta `SourceNotReady`."""
+        if self.source is not None:
+            return self.source
+        self._done.wait(self.timeout if timeout is None else timeout)
+        if self.source is not None:
+            return self.source
+        if self.error is not None:
+            raise SourceNotReady(f"Falha ao carregar os dados: {self.error}")
+        raise SourceNotReady("Os dados ainda estão carregando.")
+
+    def describe(self, wait=True):
+        """
+        O que o layout lê: a fonte carregada ou, durante a carga, os metadados.
+
+        Sem metadados, espera a carga (`wait`) ou, com `wait=False`, devolve
+        metadados vazios (o layout só é montado para validação).
+        """
+        if self.source is not None:
+            return self.source
+        if self.metadata is not None:
+            return self.metadata
+        if wait:
+            return self.wait()
+        return SourceMetadata(None, None, {column: [] for column in LAYOUT_DIMENSIONS}, {})
+
+    def append(self, rows):
+        return self.wait().append(rows)
+
+    def __getattr__(self, name):
+        # Só chamado para o que a instância não tem: os atributos da fonte carregada
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.wait(), name)
+
+
+def register_startup_endpoints(server, source):
+    """
+    Expõe `GET /health` (o processo responde; 503 se a carga falhou) e
+    `GET /ready` (os dados estão carregados) no servidor Flask.
+
+    Requisições que esperaram a carga além do limite (`SourceNotReady`)
+    recebem 503 com `Retry-After`, em vez de um erro 500.
+    """
+    def health():
+        error = getattr(source, 'error', None)
+        if error is not None:
+            return jsonify({'status': 'erro', 'erro': str(error)}), 503
+        return jsonify({'status': 'ok'})
+
+    def ready():
+        if not getattr(source, 'ready', True):
+            return jsonify({'status': 'carregando'}), 503
+        return jsonify({'status': 'pronto', 'carga_segundos': getattr(source, 'load_seconds', None)})
+
+    def not_ready(error):
+        return jsonify({'erro': str(error)}), 503, {'Retry-After': '1'}
+
+    server.add_url_rule('/health', 'health', health)
+    server.add_url_rule('/ready', 'ready', ready)
+    server.register_error_handler(SourceNotReady, not_ready)
+
+
+if __name__ == '__main__':
+    # Pré-gera o snapshot e os metadados da partida rápida (ex.: no build da imagem)
+    data_path = sys.argv[1] if len(sys.argv) > 1 else settings.DATA_PATH
+    path = settings.STARTUP_METADATA_PATH if data_path == settings.DATA_PATH else os.path.splitext(data_path)[0] + '.meta.json'
+    load_source(data_path, path)
+    print(f"Metadados da partida rápida gravados em '{path}'")
@@ -0,0 +1,193 @@
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.schema import MONTH_COLUMNS, month_label
+
+# Operadores da linguagem de filtro do DataTable (com prefixo opcional s/i de caixa)
+_OPERATORS = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le',
+    '>': 'gt', 'gt': 'gt',
+    '>=': 'ge', 'ge': 'ge',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+}
+_CONDITION = re.compile(r'^\s*\{(?P<column>[^}]+)\}\s*(?P<operator>[^\s]+)\s*(?P<value>.*?)\s*$')
+_COMPARISONS = {
+    'eq': np.equal, 'ne': np.not_equal,
+    'lt': np.less, 'le': np.less_equal,
+    'gt': np.greater, 'ge': np.greater_equal,
+}
+
+
+def _parse_value(raw):
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in ("'", '"', '`'):
+        return raw[1:-1].replace('\\' + raw[0], raw[0])
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def parse_filter_query(query):
+    """
+    Converte o `filter_query` do DataTable em uma lista de condições
+    (coluna, operador, valor, diferencia_maiusculas). Partes inválidas são ignoradas.
+    """
+    conditions = []
+    for part in (query or '').split(' && '):
+        match = _CONDITION.match(part)
+        if not match:
+            continue
+        operator = match.group('operator')
+        case_sensitive = True
+        if operator not in _OPERATORS and operator[:1] in ('s', 'i') and operator[1:] in _OPERATORS:
+            case_sensitive = operator[0] == 's'
+            operator = operator[1:]
+        if operator not in _OPERATORS:
+            continue
+        conditions.append((match.group('column'), _OPERATORS[operator], _parse_value(match.group('value')), case_sensitive))
+    return conditions
+
+
+def date_prefix_range(prefix):
+    """Converte um prefixo de data ('2022', '2022-03', '2022-03-05') em [início, fim)."""
+    prefix = str(prefix).strip()
+    start = pd.Timestamp(prefix)
+    if len(prefix) <= 4:
+        return start, start + pd.DateOffset(years=1)
+    if len(prefix) <= 7:
+        return start, start + pd.DateOffset(months=1)
+    if len(prefix) <= 10:
+        return start, start + pd.Timedelta(days=1)
+    return start, start + pd.Timedelta(seconds=1)
+
+
+def _month_value(value):
+    """Converte o rótulo 'AAAA-MM' usado no filtro de uma coluna de mês para o código AAAAMM."""
+    match = re.fullmatch(r'(\d{4})-(\d{1,2})', str(value).strip())
+    return float(int(match.group(1)) * 100 + int(match.group(2))) if match else value
+
+
+def _text_condition(values, operator, value, case_sensitive):
+    """Avalia a condição sobre um array de textos."""
+    values = pd.Series(values, dtype=object).astype(str)
+    value = str(value)
+    if operator == 'contains':
+        return values.str.contains(value, case=case_sensitive, regex=False).to_numpy()
+    if not case_sensitive:
+        values, value = values.str.lower(), value.lower()
+    return _COMPARISONS[operator](values.to_numpy(), value)
+
+
+def _condition_mask(series, operator, value, case_sensitive):
+    """Máscara vetorizada de uma condição sobre uma coluna."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Avalia nas categorias (poucas) e expande pelos códigos
+        categories = series.cat.categories.to_numpy()
+        matches = np.append(_text_condition(categories, operator, value, case_sensitive), False)
+        return matches[series.cat.codes.to_numpy()]
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        datas = series.to_numpy()
+        if operator in ('eq', 'datestartswith', 'ne'):
+            start, end = date_prefix_range(value)
+            mask = (datas >= start.to_datetime64()) & (datas < end.to_datetime64())
+            return ~mask if operator == 'ne' else mask
+        if operator in _COMPARISONS:
+            return _COMPARISONS[operator](datas, pd.Timestamp(str(value)).to_datetime64())
+        return _text_condition(series.astype(str).to_numpy(), operator, value, case_sensitive)
+
+    if pd.api.types.is_numeric_dtype(series) and operator in _COMPARISONS and isinstance(value, float):
+        return _COMPARISONS[operator](series.to_numpy(), value)
+
+    return _text_condition(series.to_numpy(), operator, value, case_sensitive)
+
+
+def filter_positions(dff, filter_query):
+    """Posições (relativas a `dff`) das linhas que atendem ao filtro da tabela."""
+    mask = np.ones(len(dff), dtype=bool)
+    for column, operator, value, case_sensitive in parse_filter_query(filter_query):
+        if column not in dff.columns:
+            continue
+        if column in MONTH_COLUMNS:
+            value = _month_value(value)
+        try:
+            mask &= _condition_mask(dff[column], operator, value, case_sensitive)
+        except (ValueError, TypeError):
+            continue
+    return np.flatnonzero(mask)
+
+
+def _sort_key(series, descending):
+    """Chave numérica de ordenação de uma coluna (textos pela ordem alfabética)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        ranks = np.empty(len(series.cat.categories) + 1, dtype=np.int64)
+        ranks[:-1] = np.argsort(np.argsort(series.cat.categories.astype(str)))
+        ranks[-1] = len(series.cat.categories)
+        key = ranks[series.cat.codes.to_numpy()]
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        key = series.to_numpy().view(np.int64)
+    elif pd.api.types.is_numeric_dtype(series):
+        key = series.to_numpy(dtype=np.float64)
+    else:
+        key = pd.factorize(series, sort=True)[0]
+    return -key if descending else key
+
+
+def sort_positions(dff, sort_by):
+    """Permutação estável (relativa a `dff`) que ordena a tabela conforme `sort_by`."""
+    keys = [
+        _sort_key(dff[spec['column_id']], spec.get('direction') == 'desc')
+        for spec in sort_by or []
+        if spec.get('column_id') in dff.columns
+    ]
+    if not keys:
+        return None
+    return np.lexsort(keys[::-1])
+
+
+def query_rows(df, rows, filter_query=None, sort_by=None):
+    """
+    Aplica filtro e ordenação da tabela às linhas de uma fatia.
+
+    Retorna as posições finais em `df` (um slice quando não há filtro nem
+    ordenação), prontas para serem guardadas e paginadas em O(página).
+    """
+    if not parse_filter_query(filter_query) and not sort_by:
+        return rows
+    dff = df.iloc[rows] if isinstance(rows, slice) else df.take(rows)
+    absolute = np.arange(*rows.indices(len(df))) if isinstance(rows, slice) else np.asarray(rows)
+    positions = filter_positions(dff, filter_query)
+    order = sort_positions(dff.iloc[positions], sort_by)
+    if order is not None:
+        positions = positions[order]
+    return absolute[positions]
+
+
+def page_records(df, rows, page_current, page_size, columns=None):
+    """Materializa apenas os registros da página pedida e o total de páginas."""
+    total = (rows.stop - rows.start) if isinstance(rows, slice) else len(rows)
+    page_count = max(1, -(-total // page_size))
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+    start, stop = page_current * page_size, (page_current + 1) * page_size
+    if isinstance(rows, slice):
+        page = df.iloc[rows.start + start:min(rows.start + stop, rows.stop)]
+    else:
+        page = df.take(rows[start:stop])
+    if columns is not None:
+        page = page[columns]
+    # Mês como rótulo legível, não como o código inteiro do schema
+    labels = {
+        column: month_label(page[column].to_numpy())
+        for column in MONTH_COLUMNS
+        if column in page.columns and pd.api.types.is_integer_dtype(page[column])
+    }
+    if labels:
+        page = page.assign(**labels)
+    return page.to_dict('records'), page_count
@@ -0,0 +1,235 @@
+
+import copy
+
+import numpy as np
+
+
+def top_n_indices(values, n, candidates=None):
+    """
+    Índices dos `n` maiores valores, do maior para o menor.
+
+    Usa `argpartition` (O(len(values))) e só ordena os `n` escolhidos;
+    `candidates` restringe a escolha a uma máscara (ex.: produtos com vendas).
+    """
+    values = np.asarray(values)
+    index = np.arange(len(values)) if candidates is None else np.flatnonzero(candidates)
+    if n <= 0 or not len(index):
+        return index[:0]
+    if n < len(index):
+        index = index[np.argpartition(-values[index], n - 1)[:n]]
+    return index[np.lexsort((index, -values[index]))]
+
+
+def _top_k_per_group(groups, items, values, n_groups, k):
+    """
+    Os `k` maiores valores de cada grupo (pares grupo/item já somados).
+
+    Retorna `(items, counts, evicted)`: matrizes (grupos × k), com -1 nas
+    posições vazias, e o maior valor descartado de cada grupo.
+    """
+    order = np.lexsort((-values, groups))
+    groups, items, values = groups[order], items[order], values[order]
+    starts = np.searchsorted(groups, np.arange(n_groups))
+    rank = np.arange(len(groups)) - starts[groups]
+    kept = rank < k
+    top_items = np.full((n_groups, k), -1, dtype=np.int32)
+    top_counts = np.zeros((n_groups, k))
+    top_items[groups[kept], rank[kept]] = items[kept]
+    top_counts[groups[kept], rank[kept]] = values[kept]
+    evicted = np.zeros(n_groups)
+    first_evicted = rank == k
+    evicted[groups[first_evicted]] = values[first_evicted]
+    return top_items, top_counts, evicted
+
+
+def _sum_by_key(groups, items, values, n_items):
+    keys, inverse = np.unique(groups.astype(np.int64) * n_items + items, return_inverse=True)
+    groups, items = np.divmod(keys, n_items)
+    return groups, items, np.bincount(inverse, weights=values, minlength=len(keys))
+
+
+class ProductIndex:
+    """
+    Totais parciais de receita por produto em cada (dia, categoria, região),
+    organizados para responder o top N de qualquer seleção do cubo.
+
+    Modo exato: as entradas da tabela lateral do cubo são copiadas em ordem
+    célula (categoria × região) → dia; a seleção vira, para cada célula
+    selecionada, um intervalo contíguo achado por busca binária, e só essas
+    entradas são somadas (sem máscara sobre a tabela inteira). Entradas
+    anexadas depois da última cópia ficam numa cauda varrida com máscara; a
+    cópia é refeita quando a cauda passa de `reseal_fraction` das entradas.
+
+    Modo aproximado (`sketch_size > 0`): cada (mês, célula) guarda só os
+    `sketch_size` produtos de maior receita, no estilo SpaceSaving, mais um
+    piso — o limite superior da receita de qualquer produto fora da lista.
+    Vendas novas são incorporadas em fluxo (`appended`) sem guardar as demais.
+    Meses inteiros da seleção saem dos resumos; os dias das bordas, do
+    índice exato. A receita estimada de cada produto fica a no máximo a
+    soma dos pisos dos resumos usados (o `erro` devolvido) da receita real,
+    independentemente do número de produtos do catálogo.
+    """
+
+    def __init__(self, tabela, dias, n_categorias, n_regioes, n_produtos, sketch_size=0, reseal_fraction=0.1):
+        self.n_regioes = n_regioes
+        self.n_cells = n_categorias * n_regioes
+        self.n_produtos = n_produtos
+        self.sketch_size = sketch_size
+        self.reseal_fraction = reseal_fraction
+        self.tabela = tabela
+        self._seal()
+        self._day_month = np.zeros(0, dtype=np.int64)
+        self._months = np.zeros(0, dtype='datetime64[M]')
+        self._set_days(dias)
+        if sketch_size:
+            n_groups = len(self._months) * self.n_cells
+            self._items = np.full((n_groups, sketch_size), -1, dtype=np.int32)
+            self._counts = np.zeros((n_groups, sketch_size))
+            self._floor = np.zeros(n_groups)
+            self._update_sketches(0)
+
+    def _columns(self, start=0):
+        tabela = self.tabela
+        return (
+            tabela['dia'].to_numpy()[start:],
+            tabela['categoria'].to_numpy()[start:].astype(np.int64) * self.n_regioes
+            + tabela['regiao'].to_numpy()[start:],
+            tabela['produto'].to_numpy()[start:],
+            tabela['receita'].to_numpy()[start:],
+            tabela['linhas'].to_numpy()[start:],
+        )
+
+    def _seal(self):
+        """Copia todas as entradas atuais em ordem célula → dia."""
+        dia, cell, produto, receita, linhas = self._columns()
+        order = np.lexsort((dia, cell))
+        self._dia = dia[order]
+        self._produto = produto[order]
+        self._receita = receita[order]
+        self._linhas = linhas[order]
+        self._offsets = np.searchsorted(cell[order], np.arange(self.n_cells + 1))
+        self._sealed = len(order)
+
+    def _set_days(self, dias):
+        months = np.asarray(dias).astype('datetime64[M]')
+        self._months = np.unique(np.concatenate([self._months, months]))
+        self._day_month = np.searchsorted(self._months, months)
+        # Primeiro dia (índice no eixo do cubo) de cada mês
+        self._month_start = np.searchsorted(self._day_month, np.arange(len(self._months) + 1))
+
+    def appended(self, tabela, dias):
+        """Índice com as entradas novas da tabela lateral (que só cresce no final); o índice atual não muda."""
+        index = copy.copy(self)
+        index._append(tabela, dias)
+        return index
+
+    def _append(self, tabela, dias):
+        # Só roda sobre a cópia de `appended`: os arrays são substituídos, nunca escritos no lugar
+        start = len(self.tabela)
+        self.tabela = tabela
+        n_months = len(self._months)
+        self._set_days(dias)
+        if len(tabela) - self._sealed > self.reseal_fraction * max(self._sealed, 1):
+            self._seal()
+        if self.sketch_size:
+            grow = (len(self._months) - n_months) * self.n_cells
+            self._items = np.vstack([self._items, np.full((grow, self.sketch_size), -1, dtype=np.int32)])
+            self._counts = np.vstack([self._counts, np.zeros((grow, self.sketch_size))])
+            self._floor = np.concatenate([self._floor, np.zeros(grow)])
+            self._update_sketches(start)
+
+    def _update_sketches(self, start):
+        """
+        Funde as entradas a partir de `start` nos resumos dos seus (mês, célula).
+
+        Produto fora do resumo entra com o piso do grupo somado (sua receita
+        anterior pode ser até o piso); o piso novo é o maior entre o antigo e
+        o maior valor descartado, então continua limitando os ausentes.
+        """
+        dia, cell, produto, receita, _ = self._columns(start)
+        if not len(dia):
+            return
+        groups, items, values = _sum_by_key(self._day_month[dia] * self.n_cells + cell, produto, receita, self.n_produtos)
+        affected = np.unique(groups)
+        current = self._items[affected]
+        monitored = current >= 0
+        old_groups = np.repeat(affected, self.sketch_size).reshape(current.shape)[monitored]
+        old_items = current[monitored]
+        old_keys = old_groups.astype(np.int64) * self.n_produtos + old_items
+        known = np.isin(groups.astype(np.int64) * self.n_produtos + items, old_keys)
+        values = values + np.where(known, 0.0, self._floor[groups])
+
+        groups, items, values = _sum_by_key(
+            np.concatenate([old_groups, groups]),
+            np.concatenate([old_items, items]),
+            np.concatenate([self._counts[affected][monitored], values]),
+            self.n_produtos,
+        )
+        local = np.searchsorted(affected, groups)
+        top_items, top_counts, evicted = _top_k_per_group(local, items, values, len(affected), self.sketch_size)
+        self._items[affected] = top_items
+        self._counts[affected] = top_counts
+        self._floor[affected] = np.maximum(self._floor[affected], evicted)
+
+    def _exact_parts(self, lo, hi, cells):
+        """Produtos e receitas das entradas das células nos dias [lo, hi), da cópia ordenada e da cauda."""
+        parts = []
+        if lo == 0 and hi >= len(self._day_month) and len(cells) == self.n_cells:
+            parts.append((self._produto, self._receita, self._linhas))
+        else:
+            for cell in cells:
+                a, b = self._offsets[cell], self._offsets[cell + 1]
+                i = a + np.searchsorted(self._dia[a:b], lo)
+                j = a + np.searchsorted(self._dia[a:b], hi)
+                if j > i:
+                    parts.append((self._produto[i:j], self._receita[i:j], self._linhas[i:j]))
+        if len(self.tabela) > self._sealed:
+            parts.append(self._scan(self._sealed, len(self.tabela), lo, hi, cells))
+        return parts
+
+    def _scan(self, start, stop, lo, hi, cells):
+        """Entradas [start, stop) da tabela (ordenada por dia) nos dias e células pedidos, por máscara."""
+        dia, cell, produto, receita, linhas = (column[:stop - start] for column in self._columns(start))
+        mask = (dia >= lo) & (dia < hi) & np.isin(cell, cells)
+        return produto[mask], receita[mask], linhas[mask]
+
+    def totals(self, lo, hi, cat_idx, reg_idx):
+        """
+        Receita e linhas por produto nos dias [lo, hi) das categorias e
+        regiões selecionadas, mais o erro máximo da receita (0 no modo exato).
+        """
+        cells = (np.asarray(cat_idx)[:, None] * self.n_regioes + np.asarray(reg_idx)).ravel()
+        cells.sort()
+        if not self.sketch_size:
+            return self._merge(self._exact_parts(lo, hi, cells)) + (0.0,)
+
+        # Meses inteiros da seleção saem dos resumos; as bordas, das entradas exatas
+        if hi <= lo:
+            return self._merge([]) + (0.0,)
+        first = self._day_month[lo]
+        if self._month_start[first] < lo:
+            first += 1
+        last = self._day_month[hi - 1] + 1
+        if self._month_start[last] > hi:
+            last -= 1
+        if last <= first:
+            return self._merge(self._exact_parts(lo, hi, cells)) + (0.0,)
+        inner_lo, inner_hi = self._month_start[first], self._month_start[last]
+        groups = (np.arange(first, last)[:, None] * self.n_cells + cells).ravel()
+        items, counts = self._items[groups], self._counts[groups]
+        monitored = items >= 0
+        parts = [(items[monitored], counts[monitored], np.ones(monitored.sum(), dtype=np.int64))]
+        parts += self._exact_parts(lo, inner_lo, cells) if inner_lo > lo else []
+        parts += self._exact_parts(inner_hi, hi, cells) if hi > inner_hi else []
+        return self._merge(parts) + (float(self._floor[groups].sum()),)
+
+    def _merge(self, parts):
+        if not parts:
+            return np.zeros(self.n_produtos), np.zeros(self.n_produtos, dtype=np.int64)
+        produto = np.concatenate([p[0] for p in parts]) if len(parts) > 1 else parts[0][0]
+        receita = np.concatenate([p[1] for p in parts]) if len(parts) > 1 else parts[0][1]
+        linhas = np.concatenate([p[2] for p in parts]) if len(parts) > 1 else parts[0][2]
+        return (
+            np.bincount(produto, weights=receita, minlength=self.n_produtos),
+            np.bincount(produto, weights=linhas, minlength=self.n_produtos).astype(np.int64),
+        )